@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+
+"""
+Micro benchmarks for performance critical parts of the model.
+
+Run all benchmarks:
+    python benchmarks.py
+Run selected benchmarks:
+    python benchmarks.py board-snapshot
+"""
+
+# standard libraries
+import sys
+import timeit
+
+# other libraries
+import model
+import model_board
+import model_object_catalog as objects
+
+
+BENCHMARKS = list()
+
+def benchmark(name):
+    def decorator(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return decorator
+
+
+def measure(func, number):
+    '''returns the average time of one call to func in seconds'''
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+def printTime(label, seconds):
+    print(u"    {label:<45} {t:10.3f} us".format(label=label, t=seconds*1e6))
+
+def printSize(label, size):
+    print(u"    {label:<45} {size:7d} bytes".format(label=label, size=size))
+
+def sizeOfListBoard(board):
+    # the ints are small ints which are cached by the interpreter
+    return sys.getsizeof(board) + sum(sys.getsizeof(col) for col in board)
+
+
+
+# ---------- board ----------
+
+@benchmark('board-snapshot')
+def benchmarkBoardSnapshot():
+    '''cost of one history entry for the board: before (list of lists) and after (Board)'''
+    COLS = model.Model.COLS
+    ROWS = model.Model.ROWS
+    EMPTY = model.Model.FLD_EMPTY
+
+    listBoard = list(list(EMPTY for y in range(ROWS)) for x in range(COLS))
+    copyListBoard = lambda l: list(list(i) for i in l)
+
+    board = model_board.Board(fill=EMPTY)
+    copyBoard = model_board.Board.copy
+
+    printTime("copy list of lists", measure(lambda: copyListBoard(listBoard), 10000))
+    printTime("copy Board", measure(lambda: copyBoard(board), 10000))
+    printSize("size list of lists", sizeOfListBoard(copyListBoard(listBoard)))
+    printSize("size Board", sys.getsizeof(copyBoard(board)))
+
+    m = model.Model()
+    m.setField(0, 0, model.Model.FLD_START)
+    printTime("Model.boardToString", measure(m.boardToString, 10000))
+
+
+def createExampleModel():
+    m = model.Model()
+    m.disableNotifications()
+    m.setField(0, 9, model.Model.FLD_START)
+    m.setField(17, 0, model.Model.FLD_END)
+    for x in range(0, model.Model.COLS, 2):
+        m.setField(x, 3, 65)
+        m.setField(x, 5, objects.OBJ_FIRE)
+        m.setField(x, 7, 58)
+    m.enableNotifications()
+    m.onChange(model.Model.CHANGE_ALL)
+    return m
+
+@benchmark('board-queries')
+def benchmarkBoardQueries():
+    '''find/findAll/count: full scan of all fields (before) and position index (after)'''
+    m = createExampleModel()
+
+    def scanFind(value):
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                if m.getField(x, y) == value:
+                    return x, y
+        return None, None
+    def scanFindAll(value):
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                if m.getField(x, y) == value:
+                    yield x, y
+
+    printTime("find by scan", measure(lambda: scanFind(model.Model.FLD_END), 10000))
+    printTime("find by index", measure(lambda: m.find(model.Model.FLD_END), 10000))
+    printTime("findAll by scan", measure(lambda: list(scanFindAll(65)), 10000))
+    printTime("findAll by index", measure(lambda: list(m.findAll(65)), 10000))
+    printTime("getForbiddenFields uncached", measure(m._calculateForbiddenFields, 1000))
+    printTime("getForbiddenFields cached", measure(m.getForbiddenFields, 1000))
+    printTime("sanityCheckBoard", measure(lambda: m.sanityCheckBoard(lambda lv, msg: None), 1000))
+
+
+# ---------- cursors ----------
+
+@benchmark('cursors')
+def benchmarkCursors():
+    '''membership test and moving fields with many cursors'''
+    cursorList = model.CursorList()
+    plainList = list()
+    for x in range(model.Model.COLS):
+        for y in range(model.Model.ROWS):
+            cursorList.append((x, y))
+            plainList.append((x, y))
+    printTime("180 membership tests in list", measure(lambda: [(x, 9) in plainList for x in range(180)], 1000))
+    printTime("180 membership tests in CursorList", measure(lambda: [(x, 9) in cursorList for x in range(180)], 1000))
+
+    m = createExampleModel()
+    def selectAllAndMoveRight():
+        m.selectAll()
+        m.moveFieldRight()
+    printTime("selectAll + moveFieldRight", measure(selectAllAndMoveRight, 100))
+    def selectAllAndSwapRight():
+        m.selectAll()
+        m.swapFieldRight()
+    printTime("selectAll + swapFieldRight", measure(selectAllAndSwapRight, 100))
+
+    def selectLeftHalfAndMoveToRight():
+        m.selectAll()
+        for x in range(model.Model.COLS//2, model.Model.COLS):
+            for y in range(model.Model.ROWS):
+                m.cursors.remove((x, y))
+        m.moveFieldToRight()
+    printTime("select left half + moveFieldToRight", measure(selectLeftHalfAndMoveToRight, 10))
+
+
+@benchmark('move-field')
+def benchmarkMoveField():
+    '''moving the selected fields with 1, 20 and 180 cursors'''
+    m = createExampleModel()
+    def select(columns):
+        cursors = model.CursorList()
+        for x in range(columns):
+            for y in range(model.Model.ROWS):
+                cursors.append((x, y))
+        m.cursors = cursors
+    for name, columns in (("1", None), ("20", 2), ("180", model.Model.COLS)):
+        if columns == None:
+            selectCursors = lambda: m.setCursor(0, 0)
+        else:
+            selectCursors = lambda: select(columns)
+        def moveRight():
+            selectCursors()
+            m.moveFieldRight()
+        printTime("{n:>3} cursors: moveFieldRight".format(n=name), measure(moveRight, 1000))
+        if columns != model.Model.COLS:
+            def moveToRight():
+                selectCursors()
+                m.moveFieldToRight()
+            printTime("{n:>3} cursors: moveFieldToRight".format(n=name), measure(moveToRight, 1000))
+
+
+# ---------- history ----------
+
+@benchmark('history')
+def benchmarkHistory():
+    '''makeBackup and undo for a long solution with full copies (History) and with changes only (DeltaHistory)'''
+    import model_history
+    N = 2000
+    K = 10
+
+    class FullHistorySolution(model.Solution):
+        USE_DELTA_HISTORY = False
+
+    def createSolution(cls):
+        m = model.Model()
+        m.setField(0, 9, model.Model.FLD_START)
+        solution = cls()
+        solution.init(m)
+        steps = [solution.STEP_RIGHT if i % 2 == 0 else solution.STEP_LEFT for i in range(N)]
+        solution._replaceSteps(0, 0, steps)
+        solution._onStepsChanged(0)
+        solution.history.clear()
+        solution.history.makeBackup()
+        return solution
+
+    def getSizeOfLastEntries(history, n):
+        entries = history.history[-n:]
+        if isinstance(history, model_history.DeltaHistory):
+            return sum(e.size for e in entries) // n
+        return sum(sum(model_history.sizeOf(v) for v in e.values()) for e in entries) // n
+
+    for cursor, where in ((N, "end"), (N // 2, "middle")):
+        for cls, name in ((FullHistorySolution, "History"), (model.Solution, "DeltaHistory")):
+            solution = createSolution(cls)
+            solution.moveCursorTo(cursor)
+            t0 = timeit.default_timer()
+            for i in range(K):
+                solution.insertStep(solution.STEP_UP)
+            t1 = timeit.default_timer()
+            printTime("%s: insert at %s + makeBackup" % (name, where), (t1 - t0) / K)
+            printSize("%s: size per entry" % name, getSizeOfLastEntries(solution.history, K))
+            t0 = timeit.default_timer()
+            for i in range(K):
+                solution.history.undo()
+            t1 = timeit.default_timer()
+            printTime("%s: undo" % name, (t1 - t0) / K)
+
+
+@benchmark('solution-cursor')
+def benchmarkSolutionCursor():
+    '''visited fields after moving the cursor of a long solution: replay (before) and cache (after)'''
+    N = 2000
+    m = model.Model()
+    m.setField(0, 9, model.Model.FLD_START)
+    solution = m.getSolution()
+    solution.init(m)
+    steps = [solution.STEP_RIGHT if i % 2 == 0 else solution.STEP_LEFT for i in range(N)]
+    solution._replaceSteps(0, 0, steps)
+    solution._onStepsChanged(0)
+
+    def replay():
+        cors = [solution._start]
+        cor = solution._start
+        for step in solution.iterSteps()[:solution.getCursorMain()]:
+            cor = step.jump(*cor)
+            cors.append(cor)
+        return set(cors)
+
+    def moveCursor(getVisitedFields):
+        if solution.getCursorMain() % 2:
+            solution.moveCursorUp()
+        else:
+            solution.moveCursorDown()
+        return getVisitedFields()
+
+    solution.moveCursorTo(N // 2)
+    printTime("move cursor + replay", measure(lambda: moveCursor(replay), 100))
+    printTime("move cursor + getVisitedFields", measure(lambda: moveCursor(solution.getVisitedFields), 100))
+
+
+# ---------- physics ----------
+
+@benchmark('physics')
+def benchmarkPhysics():
+    '''simulating a solution with 500 steps from scratch and after changing a step near the end'''
+    import model_physics
+    N = 500
+    m = createExampleModel()
+    solution = m.getSolution()
+    solution.init(m)
+    steps = [solution.STEP_UP] + [solution.STEP_RIGHT if i % 2 == 0 else solution.STEP_LEFT for i in range(N-1)]
+    solution._replaceSteps(0, 0, steps)
+    solution._onStepsChanged(0)
+    assert solution.simulate().isOk()
+
+    printTime("simulate %s steps from scratch" % N, measure(lambda: model_physics.Simulator(m.board, solution._start).simulate(steps), 100))
+    def changeLastSteps():
+        solution._invalidateCache(N - 10)
+        return solution.simulate()
+    printTime("simulate %s steps after change" % N, measure(changeLastSteps, 1000))
+
+
+@benchmark('solver')
+def benchmarkSolver():
+    '''expanded nodes per second of the solver'''
+    import model_solver
+    m = model.Model()
+    m.setField(0, 9, model.Model.FLD_START)
+    m.setField(17, 0, model.Model.FLD_END)
+    for x in range(2, model.Model.COLS, 3):
+        m.setField(x, 9, 58)
+        m.setField(x, 2, 65)
+    solver = model_solver.Solver(m)
+    solver.solve()
+    print(u"    {status}: {steps} steps, {nodes} nodes expanded, {table} states in table".format(status=solver.status, steps=solver.getNumberCountedSteps(), nodes=solver.nodesExpanded, table=solver.tableSize))
+    printTime("per expanded node", 1.0 / solver.getNodesPerSecond())
+
+
+# ---------- bitboard ----------
+
+@benchmark('bitboard')
+def benchmarkBitboard():
+    '''gravity and column queries: list of lists walked cell by cell (before) and bit masks (after)'''
+    import model_bitboard
+    COLS = model.Model.COLS
+    ROWS = model.Model.ROWS
+    EMPTY = model.Model.FLD_EMPTY
+    FALLS = frozenset(objects.GRAVITY_OBEYING)
+
+    m = model.Model()
+    m.setField(0, 9, model.Model.FLD_START)
+    for x in range(1, COLS, 2):
+        m.setField(x, 0, 65)
+        m.setField(x, 1, 37)
+        m.setField(x, 5, 58)
+    m.setField(4, 9, objects.OBJ_FIRE)
+    listBoard = [[m.getField(x, y) for y in range(ROWS)] for x in range(COLS)]
+    bitboard = m.getBitboard()
+
+    def applyGravityToListBoard(board):
+        changed = True
+        while changed:
+            changed = False
+            for x in range(COLS):
+                for y in range(ROWS-2, -1, -1):
+                    if board[x][y] in FALLS and board[x][y+1] == EMPTY:
+                        board[x][y+1] = board[x][y]
+                        board[x][y] = EMPTY
+                        changed = True
+    def isBelowInListBoard(board, x, y, value):
+        for y in range(y+1, ROWS):
+            if board[x][y] == value:
+                return True
+        return False
+    def isStableListBoard(board):
+        for x in range(COLS):
+            for y in range(ROWS-1):
+                if board[x][y] in FALLS and board[x][y+1] == EMPTY:
+                    return False
+        return True
+
+    printTime("gravity list of lists", measure(lambda: applyGravityToListBoard([list(col) for col in listBoard]), 100))
+    printTime("gravity Bitboard", measure(lambda: bitboard.copy().applyGravity(), 100))
+    # worst case for the stability test: every field needs to be checked
+    applyGravityToListBoard(listBoard)
+    bitboard.applyGravity()
+    printTime("stability test list of lists", measure(lambda: isStableListBoard(listBoard), 1000))
+    printTime("stability test Bitboard", measure(bitboard.isStable, 1000))
+    printTime("isBelow list of lists", measure(lambda: isBelowInListBoard(listBoard, 4, 0, objects.OBJ_FIRE), 10000))
+    printTime("isBelow Bitboard", measure(lambda: bitboard.isBelow(4, 0, objects.OBJ_FIRE), 10000))
+    printTime("Model.getBitboard", measure(m.getBitboard, 1000))
+
+
+@benchmark('level-pack')
+def benchmarkLevelPack():
+    '''reading the last of many levels: one .afg file per level (before) and one level pack (after)'''
+    import os
+    import shutil
+    import tempfile
+    import model_level_pack
+    N = 1000
+
+    m = createExampleModel()
+    m.enableNotifications()
+    m.getSolution().init(m)
+    for i in range(200):
+        m.getSolution().insertStep(model.Solution.STEP_RIGHT if i % 2 == 0 else model.Solution.STEP_LEFT)
+
+    path = tempfile.mkdtemp()
+    try:
+        levels = list()
+        for i in range(N):
+            ffn = os.path.join(path, "%04d%s" % (i, model.Model.EXT_TASK))
+            m.writeCopy(ffn)
+            levels.append(m.toPackedLevel(os.path.split(ffn)[1]))
+        pack = os.path.join(path, "levels" + model.Model.EXT_PACK)
+        model_level_pack.writePack(pack, levels)
+
+        log = lambda lv, msg: None
+        printTime("readFile .afg", measure(lambda: model.Model().readFile(ffn, log), 20))
+        printTime("readFile level pack", measure(lambda: model.Model().readFile(pack, log, N-1), 20))
+        printTime("read all .afg files", measure(lambda: [model.Model().readFile(os.path.join(path, level.name), log) for level in levels], 1))
+        printTime("read all levels of the pack", measure(lambda: [model.Model().readFile(pack, log, i) for i in range(N)], 1))
+        printSize("size of .afg files", sum(os.path.getsize(os.path.join(path, level.name)) for level in levels))
+        printSize("size of level pack", os.path.getsize(pack))
+    finally:
+        shutil.rmtree(path)
+
+
+@benchmark('step-parser')
+def benchmarkStepParser():
+    '''parsing the step lines of a solution with 10000 steps: eval (before) and dispatch table (after)'''
+    N = 10000
+    steps = [model.Solution.STEP_RIGHT, model.Solution.STEP_UP, model.PipeJump(), model.HeliumJump(-2), model.Solution.STEP_LEFT]
+    lines = ["#%r" % (steps[i % len(steps)],) for i in range(N)]
+    namespace = vars(model)
+
+    def parseWithEval():
+        result = list()
+        for line in lines:
+            m = model.Model.RO_STEP.match(line)
+            result.append(eval(m.group('instantiation'), namespace))
+        return result
+
+    def parseWithDispatchTable():
+        result = list()
+        parsedSteps = dict()
+        matchStep = model.Model.RO_STEP.match
+        for line in lines:
+            step = parsedSteps.get(line)
+            if step == None:
+                step = model.Model._createStepFromMatch(matchStep(line))
+                parsedSteps[line] = step
+            result.append(step)
+        return result
+
+    def parseWithoutCache():
+        matchStep = model.Model.RO_STEP.match
+        return [model.Model._createStepFromMatch(matchStep(line)) for line in lines]
+
+    assert parseWithEval() == parseWithDispatchTable() == parseWithoutCache()
+    printTime("eval", measure(parseWithEval, 3))
+    printTime("dispatch table without reusing steps", measure(parseWithoutCache, 3))
+    printTime("dispatch table", measure(parseWithDispatchTable, 3))
+
+
+# ---------- main ----------
+
+def main(args):
+    names = [name for name, func in BENCHMARKS]
+    for name in args:
+        if name not in names:
+            print(u"unknown benchmark {name!r}, should be one of {names}".format(name=name, names=", ".join(names)))
+            return 1
+
+    for name, func in BENCHMARKS:
+        if args and name not in args:
+            continue
+        print(name)
+        func()
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -94,6 +94,15 @@ class Board(tk.Canvas):
         self.debugCursor = False
         self.viewObjectCode = self.OBJECT_CODE_OFF
         self.onObjectCodeChangeListener = set()
+
+        # canvas items which are created once and reconfigured when the field changes.
+        # the keys are the canvas coordinates (which differ from the model coordinates if the board is flipped).
+        self._fieldItems = dict()
+        self._fieldTextItems = dict()
+        self._fieldStates = dict()
+        self._catItem = None
+        self._catState = None
+        self._boardState = None
         
         self.drawBorder()
         self.drawBoard()
@@ -235,7 +244,7 @@ class Board(tk.Canvas):
             self.canvas.delete(self.TAG_CURSOR)
             self.drawCursor()
         elif change == model.CHANGE_ALL:
-            self.canvas.delete(tk.ALL)
+            self.canvas.delete(self.TAG_BORDER, self.TAG_CURSOR)
             self.drawBorder()
             self.drawBoard()
             self.drawCursor()
@@ -243,15 +252,19 @@ class Board(tk.Canvas):
             return
         elif change == model.CHANGE_AUTHOR:
             return
+        elif change == model.CHANGE_BOARD:
+            self.canvas.delete(self.TAG_CURSOR)
+            self.drawBoard(model.getChangedFields())
+            self.drawCursor()
         else:
-            self.canvas.delete(self.TAG_BOARD, self.TAG_CURSOR)
+            self.canvas.delete(self.TAG_CURSOR)
             self.drawBoard()
             self.drawCursor()
         self.update_idletasks()
 
     def onSolutionChangeListener(self):
         assert self.isModeEditSolution()
-        self.canvas.delete(self.TAG_BOARD, self.TAG_CURSOR)
+        self.canvas.delete(self.TAG_CURSOR)
         self.drawBoard()
 
 
@@ -446,10 +459,10 @@ class Board(tk.Canvas):
     # ---------- drawing ----------
 
     def drawImage(self, x, y, image, **kw):
-        self.canvas.create_image(self.modelToCanvasX(x), self.modelToCanvasY(y), anchor='nw', image=image, **kw)
+        return self.canvas.create_image(self.modelToCanvasX(x), self.modelToCanvasY(y), anchor='nw', image=image, **kw)
 
     def drawRectangle(self, x, y, **kw):
-        self.canvas.create_rectangle(
+        return self.canvas.create_rectangle(
             self.modelToCanvasX(x), self.modelToCanvasY(y),
             self.modelToCanvasX(x+1), self.modelToCanvasY(y+1),
             **kw
@@ -475,53 +488,137 @@ class Board(tk.Canvas):
             for y in range(-1, model.ROWS+1):
                 self.drawImage(x, y, imageBG, tags=(self.TAG_BORDER,))
         
-    def drawBoard(self):
+    def drawBoard(self, fields=None):
+        '''Updates the fields at the given model coordinates or all fields if fields is None.
+        The canvas items are created once, afterwards an item is only reconfigured
+        if the image or text it displays has changed.'''
         model = self.model
         isModeSolution = self.isModeEditSolution()
         
         if isModeSolution:
             solution = model.getSolution()
-            visitedFields = solution.getBoardCoordinates()
+            visitedFields = solution.getVisitedFields()
+            catField      = solution.getBoardCoordinate(solution.getCursorMain())
             isFlipped     = solution.isFlipped()
         else:
-            visitedFields = tuple(model.findAll(model.FLD_START))
+            visitedFields = set(model.findAll(model.FLD_START))
+            catField      = None
             isFlipped     = False
+
+        isObjectCodeVisible = not isModeSolution and self.viewObjectCode != self.OBJECT_CODE_OFF
+
+        if not self._fieldItems:
+            self.createFieldItems()
+        boardState = (isModeSolution, isFlipped, isObjectCodeVisible)
+        if boardState != self._boardState:
+            # all fields may look different
+            fields = None
+            self._boardState = boardState
+        if fields == None:
+            fields = ((x, y) for x in range(model.COLS) for y in range(model.ROWS))
         
         imageBg = imageOpener.getBackground(model.getBgUntouched())
         imageBgTouched = imageOpener.getBackground(model.getBgTouched())
+        for x, y in fields:
+            fld = model.getField(x=x, y=y)
+            if (x,y) in visitedFields:
+                imageField = imageBgTouched
+            else:
+                imageField = imageBg
+
+            if isFlipped:
+                y = model.ROWS - y - 1
+
+            if fld == model.FLD_EMPTY:
+                imageObject = None
+            elif fld == model.FLD_START and isModeSolution:
+                #TODO: do I want to draw the door or continue?
+                imageObject = None
+            else:
+                imageObject = imageOpener.getImage(fld)
+
+            if isObjectCodeVisible and imageObject != None:
+                text = imageOpener.getImage.getShortName(fld)
+            else:
+                text = None
+
+            self.updateField(x, y, (imageField, imageObject, text))
+
+        self.drawCat(catField, isFlipped)
+
+    def createFieldItems(self):
+        model = self.model
         for x in range(model.COLS):
             for y in range(model.ROWS):
-                fld = model.getField(x=x, y=y)
-                if (x,y) in visitedFields:
-                    tmp = imageBgTouched
-                else:
-                    tmp = imageBg
+                itemField  = self.drawImage(x, y, image='', tags=(self.TAG_BOARD,))
+                itemObject = self.drawImage(x, y, image='', state=tk.HIDDEN, tags=(self.TAG_BOARD,))
+                self._fieldItems[(x,y)] = (itemField, itemObject)
+        self._catItem = self.drawImage(0, 0, image=imageOpener.getImage(self.OBJ_CAT), state=tk.HIDDEN, tags=(self.TAG_BOARD,))
+
+    def updateField(self, x, y, state):
+        '''x, y: canvas coordinates
+        state: (field image, object image or None, object code text or None)'''
+        lastState = self._fieldStates.get((x,y), (None, None, None))
+        if state == lastState:
+            return
 
-                if isFlipped:
-                    y = model.ROWS - y - 1
-                
-                self.drawImage(x, y, image=tmp, tags=(self.TAG_BOARD,))
-                if fld == model.FLD_EMPTY:
-                    continue
-                if fld == model.FLD_START and isModeSolution:
-                    fld = self.OBJ_DOOR_OPEN
-                    #TODO: do I want to draw the door or continue?
-                    continue
-                self.drawImage(x, y, image=imageOpener.getImage(fld), tags=(self.TAG_BOARD,))
-                
-                if not isModeSolution and self.viewObjectCode != self.OBJECT_CODE_OFF:
-                    text = imageOpener.getImage.getShortName(fld),
-                    self.drawRectangle(x, y, fill=self.textFill, stipple=self.textStipple, width=0)
-                    self.drawText(x, y, text=text, font="-weight bold", fill=self.textColor, tags=(self.TAG_BOARD,))
+        imageField, imageObject, text = state
+        lastImageField, lastImageObject, lastText = lastState
+        itemField, itemObject = self._fieldItems[(x,y)]
+        if imageField is not lastImageField:
+            self.canvas.itemconfigure(itemField, image=imageField)
+        if imageObject is not lastImageObject:
+            if imageObject == None:
+                self.canvas.itemconfigure(itemObject, state=tk.HIDDEN)
+            else:
+                self.canvas.itemconfigure(itemObject, image=imageObject, state=tk.NORMAL)
+        if text != lastText:
+            self.updateFieldText(x, y, text)
 
-        if isModeSolution:
-            x, y = visitedFields[-1]
+        self._fieldStates[(x,y)] = state
+
+    def updateFieldText(self, x, y, text):
+        items = self._fieldTextItems.get((x,y))
+        if items == None:
+            if text == None:
+                return
+            items = (
+                self.drawRectangle(x, y, fill=self.textFill, stipple=self.textStipple, width=0, tags=(self.TAG_BOARD,)),
+                self.drawText(x, y, font="-weight bold", fill=self.textColor, tags=(self.TAG_BOARD,)),
+            )
+            self._fieldTextItems[(x,y)] = items
+            self.canvas.tag_raise(self.TAG_CURSOR)
+
+        itemRectangle, itemText = items
+        if text == None:
+            self.canvas.itemconfigure(itemRectangle, state=tk.HIDDEN)
+            self.canvas.itemconfigure(itemText, state=tk.HIDDEN)
+        else:
+            self.canvas.itemconfigure(itemRectangle, state=tk.NORMAL)
+            self.canvas.itemconfigure(itemText, text=text, state=tk.NORMAL)
+
+    def drawCat(self, catField, isFlipped):
+        '''catField: unflipped model coordinates of the cat or None if the cat is not to be drawn'''
+        model = self.model
+        catState = None
+        if catField != None:
+            x, y = catField
             if isFlipped:
                 y = model.ROWS - y - 1
-            if self.model.isValidField(x, y):
-                self.drawImage(x, y, image=imageOpener.getImage(self.OBJ_CAT), tags=(self.TAG_BOARD,))
+            if model.isValidField(x, y):
+                catState = (x, y)
             #TODO: else: draw indicator in which direction the cat is
 
+        if catState == self._catState:
+            return
+        if catState == None:
+            self.canvas.itemconfigure(self._catItem, state=tk.HIDDEN)
+        else:
+            x, y = catState
+            self.canvas.coords(self._catItem, self.modelToCanvasX(x), self.modelToCanvasY(y))
+            self.canvas.itemconfigure(self._catItem, state=tk.NORMAL)
+        self._catState = catState
+
 
     def drawCursor(self):
         if self.isModeEditSolution():
@@ -87,17 +87,62 @@ class Strut(tk.Label):
 
 class Catalog(tk.Frame):
 
+    '''
+    The items are created when the catalog becomes visible for the first time
+    so that the catalogs in the tabs which are not selected do not slow down the start.
+    Options which are configured for the catalog before the items exist are applied
+    to the items when they are created, like gui_main.MainWindow.configAll does.
+    '''
+
     COLUMNS = 18
 
     ITEM_STRUT = 'strut'
 
     def __init__(self, master):
         tk.Frame.__init__(self, master)
+        self._pendingItems = None
+        self._isBackgroundVisible = False
+        # option -> value, merged so that it does not grow with every call
+        self._configuredOptions = dict()
+        self.bind('<Map>', self._onMap, '+')
+
+    def config(self, cnf=None, **kw):
+        if isinstance(cnf, dict):
+            kw.update(cnf)
+            cnf = None
+        if cnf != None or not kw:
+            # a query
+            return tk.Frame.config(self, cnf)
+
+        # options like fg are meant for the items only, a Frame rejects them
+        self._configuredOptions.update(kw)
+        for key, value in kw.items():
+            try:
+                tk.Frame.config(self, {key: value})
+            except tk.TclError:
+                pass
+
+    configure = config
 
     def setItems(self, items, imageOpener, onClickListener, onRightClickListener=None):
         for child in self.winfo_children():
             child.destroy()
 
+        self._pendingItems = (items, imageOpener, onClickListener, onRightClickListener)
+        if self.winfo_ismapped():
+            self.createItems()
+
+    def _onMap(self, event):
+        if event.widget == self:
+            self.createItems()
+
+    def createItems(self):
+        '''creates the items passed to setItems if that has not happened yet'''
+        if self._pendingItems == None:
+            return
+        items, imageOpener, onClickListener, onRightClickListener = self._pendingItems
+        self._pendingItems = None
+
         listener = lambda event: onClickListener(event, event.widget.name)
         listenerR = lambda event: onRightClickListener(event, event.widget.name)
         i = 0
@@ -109,6 +154,13 @@ class Catalog(tk.Frame):
                 child.bind('<Button-1>', listener)
                 if onRightClickListener != None:
                     child.bind('<Button-3>', listenerR)
+                if self._isBackgroundVisible:
+                    child.showBackground(True)
+            for key, value in self._configuredOptions.items():
+                try:
+                    child.config({key: value})
+                except tk.TclError:
+                    pass
             child.grid(column=i%self.COLUMNS, row=i//self.COLUMNS)
             i += 1
 
@@ -118,6 +170,7 @@ class Catalog(tk.Frame):
                 child.updateShortName()
 
     def showBackground(self, flag):
+        self._isBackgroundVisible = flag
         for child in self.winfo_children():
             if isinstance(child, CatalogItem):
                 child.showBackground(flag)
@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 
 # standard
-import os.path
+import os
+import time
+import base64
+import threading
 
 # other
 import model_object_catalog as objects
+import model_background_catalog as backgrounds
 from locales import _
 
 import tkinter_extensions as tkx
@@ -12,16 +16,32 @@ tk = tkx.tk
 
 
 toAbsPath = objects.toAbsPath
-PATH_BACKGROUNDS = toAbsPath('backgrounds/gif')
+PATH_BACKGROUNDS = backgrounds.PATH_BACKGROUNDS
 PATH_IMAGES      = objects.PATH
 
-EXT_BACKGROUND = '.fld'
+EXT_BACKGROUND = backgrounds.EXT_BACKGROUND
 
 FLD_SIZE = 32
 
 
 class ImageOpener(object):
 
+    '''
+    isValid is answered from a listing of path which is created when it is needed the first time.
+    The listing is created again if refresh is called or if the modification time
+    of path has changed. The modification time is checked at most every MTIME_CHECK_INTERVAL seconds.
+    cacheHits and cacheMisses count how often isValid could use the listing and how often it had to be created.
+
+    Images are decoded by Tk when getImage is called the first time.
+    preload reads the files in a background thread before they are needed
+    and createImagesWhenIdle decodes them while the main loop has nothing else to do.
+    The decoding itself happens in the Tk thread: Tk is not thread safe and
+    without an imaging library a decoder would have to be written in Python,
+    which would hold the GIL for longer than Tk needs to decode the images.
+    '''
+
+    MTIME_CHECK_INTERVAL = 2.0
+
     def __init__(self, path, pattern, splitOldExtension=False, isEmptyImage=None, getShortName=None, getLongName=None, shortNameToValue=None):
         self.path = path
         self.pattern = pattern
@@ -31,6 +51,14 @@ class ImageOpener(object):
         self._getLongName = getLongName
         self._shortNameToValue = shortNameToValue
         self.images = dict()
+        # name -> base64 encoded content of the file, filled by preload
+        self._fileData = dict()
+
+        self._fileNames = None
+        self._mtime = None
+        self._lastMtimeCheck = None
+        self.cacheHits = 0
+        self.cacheMisses = 0
 
     def getImage(self, name):
         if self.isEmptyImage!=None and self.isEmptyImage(name):
@@ -38,14 +66,66 @@ class ImageOpener(object):
         
         img = self.images.get(name, None)
         if img == None:
-            ffn = os.path.join(self.path, self.toFilename(name))
-            img = tk.PhotoImage(file=ffn)
+            data = self._fileData.get(name, None)
+            if data != None:
+                img = tk.PhotoImage(data=data)
+            else:
+                ffn = os.path.join(self.path, self.toFilename(name))
+                img = tk.PhotoImage(file=ffn)
             self.images[name] = img
+            # pop after setting self.images, _readFiles relies on this order
+            self._fileData.pop(name, None)
 
         return img
             
     __call__ = getImage
 
+
+    # ---------- preloading ----------
+
+    def preload(self, names):
+        '''reads the files of the images in a background thread.
+        Tk is not thread safe, therefore the images are not created here.
+        returns the thread.'''
+        names = [name for name in names if name not in self.images and not (self.isEmptyImage!=None and self.isEmptyImage(name))]
+        thread = threading.Thread(target=self._readFiles, args=(names,))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _readFiles(self, names):
+        for name in names:
+            if name in self.images:
+                continue
+            ffn = os.path.join(self.path, self.toFilename(name))
+            try:
+                with open(ffn, 'rb') as f:
+                    data = f.read()
+            except EnvironmentError:
+                # getImage will report the error when the image is needed
+                continue
+            # setting an item of a dict is atomic, no lock is needed
+            self._fileData[name] = base64.b64encode(data).decode('ascii')
+            # getImage may have created the image from the file in the meantime
+            if name in self.images:
+                self._fileData.pop(name, None)
+
+    def createImagesWhenIdle(self, widget, names, batchSize=10):
+        '''creates the images for names which have not been created yet, batchSize images at a time whenever widget's main loop is idle'''
+        names = [name for name in names if name not in self.images and not (self.isEmptyImage!=None and self.isEmptyImage(name))]
+        names.reverse()
+
+        def createBatch():
+            for i in range(batchSize):
+                if not names:
+                    return
+                name = names.pop()
+                if name not in self.images and self.isValid(name):
+                    self.getImage(name)
+            widget.after_idle(lambda: widget.after(1, createBatch))
+
+        widget.after_idle(createBatch)
+
     def toFilename(self, name):
         if self.splitOldExtension:
             name = os.path.splitext(name)[0]
@@ -54,9 +134,35 @@ class ImageOpener(object):
     def isValid(self, name):
         if self.isEmptyImage!=None and self.isEmptyImage(name):
             return True
-        
-        ffn = os.path.join(self.path, self.toFilename(name))
-        return os.path.isfile(ffn)
+
+        return self.toFilename(name) in self._getFileNames()
+
+    def refresh(self):
+        '''lists path again, call this after images have been added or removed'''
+        self._fileNames = None
+
+    def _getFileNames(self):
+        now = time.time()
+        if self._fileNames != None and now - self._lastMtimeCheck >= self.MTIME_CHECK_INTERVAL:
+            self._lastMtimeCheck = now
+            if self._getMtime() != self._mtime:
+                self._fileNames = None
+
+        if self._fileNames == None:
+            self.cacheMisses += 1
+            self._lastMtimeCheck = now
+            self._mtime = self._getMtime()
+            self._fileNames = frozenset(listFiles(self.path))
+        else:
+            self.cacheHits += 1
+
+        return self._fileNames
+
+    def _getMtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
 
     def getShortName(self, name):
         if self._getShortName == None:
@@ -76,6 +182,17 @@ class ImageOpener(object):
         else:
             return self._shortNameToValue(self, name)
 
+def listFiles(path):
+    '''returns the names of the files (not directories) in path or an empty list if path can not be listed'''
+    try:
+        if hasattr(os, 'scandir'):
+            # the type is known from the listing on most platforms, no stat per file is needed
+            return [entry.name for entry in os.scandir(path) if entry.is_file()]
+        # Python 2
+        return [fn for fn in os.listdir(path) if os.path.isfile(os.path.join(path, fn))]
+    except OSError:
+        return []
+
 def setObjectCodeCharacter():
     getImage._getShortName = lambda self, value: objects.codeToChr(value)
 
@@ -92,7 +209,7 @@ getBackground = ImageOpener(
     path = PATH_BACKGROUNDS,
     pattern = "{0}.gif",
     splitOldExtension = True,
-    getShortName=lambda self,name: os.path.splitext(name[6:] if name[:6]=="irka3_" else name)[0],
+    getShortName=lambda self,name: backgrounds.getShortName(name),
     shortNameToValue = lambda self,name: "irka3_{name}{ext}".format(name=name, ext=EXT_BACKGROUND),
 )
 
@@ -161,6 +278,19 @@ getImage.getBackground = BitmapOpener()
 setObjectCodeCharacter()
 
 
+def preloadAll():
+    '''starts reading all object and background images in the background, see ImageOpener.preload'''
+    return (
+        getImage.preload(sorted(objects.VALID_CODES)),
+        getBackground.preload(backgrounds.CATEGORY_ALL),
+    )
+
+def createAllImagesWhenIdle(widget):
+    '''see ImageOpener.createImagesWhenIdle'''
+    getImage.createImagesWhenIdle(widget, sorted(objects.VALID_CODES))
+    getBackground.createImagesWhenIdle(widget, backgrounds.CATEGORY_ALL)
+
+
 if __name__=='__main__':
     import model
     c = tk.Canvas()
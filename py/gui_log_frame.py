@@ -4,6 +4,7 @@ import tkinter_extensions as tkx
 tk  = tkx.tk
 
 import logging
+import difflib
 
 import locales
 _ = locales._
@@ -11,6 +12,19 @@ _ = locales._
 
 class LogFrame(tkx.FrameWithTitle):
 
+    '''
+    All messages are displayed in one Text widget. Every message is one line
+    with a tag of it's own (see getTagMessage) so that it can be removed.
+
+    clear() does not remove the messages. The messages added after clear()
+    are compared to the displayed messages in complete() and only the
+    differences are changed in the Text widget. Therefore reloading a log
+    which has not changed costs almost nothing.
+
+    At most MAX_MESSAGES messages are displayed, the number of the other
+    messages is displayed below them.
+    '''
+
     BULLET = u'\u2B25' # black medium diamond
     #BULLET = u'\u25B3' # white up-pointing triangle
     BULLET = u'\u26A0' # warning sign
@@ -20,13 +34,24 @@ class LogFrame(tkx.FrameWithTitle):
     BULLET = u'\u2023' # triangular bullet
     #BULLET = u'\u2022' # circular bullet
     #BULLET = u'\u26AB' # medium black circle
+
+    CLOSE = u'\u2715' # multiplication x
     
 
     PAD_Y = 2
 
-    COL_BULLET = 0
-    COL_MSG = 1
-    COL_BTN = 2
+    MAX_MESSAGES = 100
+
+    TAG_NORMAL  = 'normal'
+    TAG_ERROR   = 'error'
+    TAG_WARNING = 'warning'
+    TAG_SUCCESS = 'success'
+    TAG_MESSAGE = 'message'
+    TAG_CLOSE   = 'close'
+    TAG_INFO    = 'info'
+    TAG_MORE    = 'more'
+
+    TAG_PREFIX_MESSAGE = 'msg-'
 
 
     # ---------- initialization ----------
@@ -34,10 +59,27 @@ class LogFrame(tkx.FrameWithTitle):
     def __init__(self, master, autoReload=True, **kw):
         self.__takefocus = kw.get('takefocus', True)
         tkx.FrameWithTitle.__init__(self, master, **kw)
-        self.msgFrame = tk.Frame(self)
+        self.msgFrame = tk.Text(self, bg=self['bg'], relief=tk.FLAT, highlightthickness=0, borderwidth=0,
+            wrap=tk.WORD, cursor='arrow', width=1, height=1, spacing1=self.PAD_Y, spacing3=self.PAD_Y, takefocus=False)
         self.msgFrame.pack(side=tk.TOP, expand=tk.YES, fill=tk.BOTH)
-        self.msgFrame.grid_columnconfigure(self.COL_MSG, weight=1)
-        self.row = 1
+        self.msgFrame.configure(state=tk.DISABLED)
+
+        # continuation lines of a message start below the message, not below the bullet
+        font = tkx.tkFont.Font(font=self.msgFrame['font'])
+        self.msgFrame.tag_configure(self.TAG_MESSAGE, lmargin2=font.measure(self.BULLET + u" "))
+        self.msgFrame.tag_configure(self.TAG_INFO, justify=tk.CENTER)
+        self.msgFrame.tag_configure(self.TAG_MORE, justify=tk.CENTER)
+        self.msgFrame.tag_bind(self.TAG_CLOSE, '<Button-1>', self._onCloseClick)
+        self.msgFrame.tag_bind(self.TAG_CLOSE, '<Enter>', lambda e: self.msgFrame.configure(cursor='hand2'))
+        self.msgFrame.tag_bind(self.TAG_CLOSE, '<Leave>', lambda e: self.msgFrame.configure(cursor='arrow'))
+
+        # (level, msg, tag) of the displayed messages
+        self._messages = list()
+        # (level, msg) added since clear, None if complete has been called
+        self._newMessages = None
+        self._numberMessages = 0
+        self._numberHidden = 0
+        self._nextId = 0
 
         self.setTextColors(normal = 'black', error = 'red', warning = 'orange', success = 'green')
 
@@ -59,6 +101,13 @@ class LogFrame(tkx.FrameWithTitle):
         self.textColorWarning = warning
         self.textColorSuccess = success
 
+        self.msgFrame.configure(fg=normal)
+        self.msgFrame.tag_configure(self.TAG_NORMAL,  foreground=normal)
+        self.msgFrame.tag_configure(self.TAG_ERROR,   foreground=error)
+        self.msgFrame.tag_configure(self.TAG_WARNING, foreground=warning)
+        self.msgFrame.tag_configure(self.TAG_SUCCESS, foreground=success)
+        self.msgFrame.tag_configure(self.TAG_CLOSE,   foreground=normal)
+
 
 
     # ---------- reload ----------
@@ -122,45 +171,132 @@ class LogFrame(tkx.FrameWithTitle):
     # ---------- messages ----------
 
     def addMessage(self, level, msg):
-        bg = self['bg']
-        fg = self.textColorNormal
-        if level >= logging.ERROR:
-            color = self.textColorError
-        elif level >= logging.WARNING:
-            color = self.textColorWarning
+        if self._newMessages != None:
+            # displayed in complete
+            self._newMessages.append((level, msg))
+            return
+
+        self._edit(self._removeInfo)
+        self._numberMessages += 1
+        if len(self._messages) < self.MAX_MESSAGES:
+            self._edit(lambda: self._insertMessages(len(self._messages), [(level, msg)]))
         else:
-            color = self.textColorNormal
-        
-        blt = tk.Label(self.msgFrame, text=self.BULLET, bg=bg, fg=color, padx=0)
-        lbl = tk.Label(self.msgFrame, text=msg, bg=bg, fg=color, justify=tk.LEFT, padx=0)
-        btn = tkx.SmallCloseButton(self.msgFrame, takefocus=self.__takefocus, bg=bg, fg=fg)
-        btn.configure(command=lambda: self._rmMessage(blt, lbl, btn))
+            self._numberHidden += 1
+            self._edit(self._updateMore)
 
-        blt.grid(row=self.row, column=self.COL_BULLET, sticky=tk.NE, pady=self.PAD_Y)
-        lbl.grid(row=self.row, column=self.COL_MSG, sticky=tk.NW, pady=self.PAD_Y)
-        btn.grid(row=self.row, column=self.COL_BTN, sticky=tk.NE, pady=self.PAD_Y)
+    def complete(self):
+        if self._newMessages != None:
+            newMessages = self._newMessages
+            self._newMessages = None
+            self._numberMessages = len(newMessages)
+            self._numberHidden = max(0, len(newMessages) - self.MAX_MESSAGES)
+            self._edit(lambda: self._update(newMessages[:self.MAX_MESSAGES]))
+        self._messageIfEmpty(_("(no problems\nhave been found)"), self.TAG_SUCCESS)
 
-        self.row += 1
+    def isEmpty(self):
+        return self._numberMessages == 0
 
-    def _rmMessage(self, blt, lbl, btn):
-        blt.destroy()
-        lbl.destroy()
-        btn.destroy()
-        self._messageIfEmpty(_("(all found problems\nhave been removed)"), self.colorWarning)
+    def clear(self):
+        '''starts a new set of messages. the displayed messages are kept until complete is called.'''
+        self._newMessages = list()
+
+
+    def _update(self, newMessages):
+        self._removeInfo()
+        oldMessages = [(level, msg) for level, msg, tag in self._messages]
+        matcher = difflib.SequenceMatcher(None, oldMessages, newMessages, autojunk=False)
+        # backwards so that the indices of the changes which are still to be done stay valid
+        for opcode, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if opcode == 'equal':
+                continue
+            self._removeMessages(i1, i2)
+            self._insertMessages(i1, newMessages[j1:j2])
+        self._updateMore()
+
+    def _insertMessages(self, i, messages):
+        if i < len(self._messages):
+            index = self.msgFrame.index(self.getTagMessage(self._messages[i]) + '.first')
+        elif self._numberHidden > 0 and self.msgFrame.tag_ranges(self.TAG_MORE):
+            index = self.msgFrame.index(self.TAG_MORE + '.first')
+        else:
+            index = self.msgFrame.index(tk.END + '-1c')
+
+        newItems = list()
+        for level, msg in messages:
+            tag = self.TAG_PREFIX_MESSAGE + str(self._nextId)
+            self._nextId += 1
+            tagLevel = self.getTagLevel(level)
+            self.msgFrame.insert(index,
+                self.BULLET + u" ", (tag, self.TAG_MESSAGE, tagLevel),
+                msg, (tag, self.TAG_MESSAGE, tagLevel),
+                u" ", (tag, self.TAG_MESSAGE),
+                self.CLOSE, (tag, self.TAG_MESSAGE, self.TAG_CLOSE),
+                u"\n", (tag, self.TAG_MESSAGE),
+            )
+            index = self.msgFrame.index(tag + '.last')
+            newItems.append((level, msg, tag))
+        self._messages[i:i] = newItems
+
+    def _removeMessages(self, i1, i2):
+        if i1 >= i2:
+            return
+        first = self.msgFrame.index(self.getTagMessage(self._messages[i1]) + '.first')
+        last = self.msgFrame.index(self.getTagMessage(self._messages[i2-1]) + '.last')
+        self.msgFrame.delete(first, last)
+        for item in self._messages[i1:i2]:
+            self.msgFrame.tag_delete(self.getTagMessage(item))
+        del self._messages[i1:i2]
+
+    def _updateMore(self):
+        ranges = self.msgFrame.tag_ranges(self.TAG_MORE)
+        if ranges:
+            self.msgFrame.delete(*ranges)
+        if self._numberHidden > 0:
+            text = _("({n} more)").format(n=self._numberHidden)
+            self.msgFrame.insert(tk.END + '-1c', u"\n" + text + u"\n", (self.TAG_MORE,))
+
+    def _removeInfo(self):
+        ranges = self.msgFrame.tag_ranges(self.TAG_INFO)
+        if ranges:
+            self.msgFrame.delete(*ranges)
+
+    def _onCloseClick(self, event):
+        for tag in self.msgFrame.tag_names(tk.CURRENT):
+            if tag.startswith(self.TAG_PREFIX_MESSAGE):
+                break
+        else:
+            return
+        i = [self.getTagMessage(item) for item in self._messages].index(tag)
+        self._edit(lambda: self._removeMessages(i, i+1))
+        self._numberMessages -= 1
+        self._messageIfEmpty(_("(all found problems\nhave been removed)"), self.TAG_WARNING)
 
-    def _messageIfEmpty(self, msg, color):
-        if self.isEmpty():
-            tk.Label(self.msgFrame, text="\n"+msg, bg=self['bg'], fg=color, anchor=tk.CENTER).pack(side=tk.TOP)
+    def _messageIfEmpty(self, msg, tagColor):
+        if self.isEmpty() and not self.msgFrame.tag_ranges(self.TAG_INFO):
+            self._edit(lambda: self.msgFrame.insert(tk.END + '-1c', u"\n" + msg + u"\n", (self.TAG_INFO, tagColor)))
 
-    def complete(self):
-        self._messageIfEmpty(_("(no problems\nhave been found)"), self.textColorSuccess)
+    def _edit(self, function):
+        # the user shall not be able to type into the log
+        self.msgFrame.configure(state=tk.NORMAL)
+        try:
+            function()
+        finally:
+            self.msgFrame.configure(state=tk.DISABLED)
 
-    def isEmpty(self):
-        return len(self.msgFrame.winfo_children()) == 0
 
-    def clear(self):
-        for w in self.msgFrame.winfo_children():
-            w.destroy()
+    # ---------- support ----------
+
+    def getTagLevel(self, level):
+        if level >= logging.ERROR:
+            return self.TAG_ERROR
+        elif level >= logging.WARNING:
+            return self.TAG_WARNING
+        else:
+            return self.TAG_NORMAL
+
+    @staticmethod
+    def getTagMessage(item):
+        return item[2]
         
 
 
@@ -1,5 +1,12 @@
 #!/usr/bin/env python
 
+import sys
+
+# must be imported first to measure the imports of all other modules
+import startup_profiler as profiler
+if __name__=='__main__':
+    profiler.init(sys.argv)
+
 import os.path
 import logging
 
@@ -14,6 +21,7 @@ import gui_catalog
 import gui_image_opener as imageOpener
 import gui_board
 import gui_log_frame
+import gui_sanity_check_worker
 import gui_solution_view
 
 import model
@@ -29,6 +37,7 @@ _ = locales._
 
 
 print(settings_manager.get_fullfilename())
+profiler.mark("imports of gui_main")
 
 FILETYPES = (
     (_("Aufgaben Datei"), "*"+model.Model.EXT_TASK),
@@ -133,7 +142,10 @@ class MainWindow(tk.Tk):
     # ---------- initialization ----------
     
     def __init__(self, model):
+        # read the images while Tk is initialized and the widgets are created
+        imageOpener.preloadAll()
         tk.Tk.__init__(self)
+        profiler.mark("MainWindow: Tk")
         self.model = model
         self.model.addOnChangeListener(self.onModelChange)
         self.initSettings()
@@ -166,14 +178,17 @@ class MainWindow(tk.Tk):
 
         if settings[KEY.VIEW_MOVABILITY_INDICATORS]:
             self.showMovabilityIndicators(True)
+        profiler.mark("MainWindow: catalogs")
 
         self.update()
+        profiler.mark("MainWindow: first update")
 
         # board
         self.board = gui_board.Board(master=self.frameMain, model=self.model)
         self.board.addOnObjectCodeChangeListener(self.onObjectCodeChangeListener)
         self.board.pack(expand=tk.YES, fill=tk.X, pady=self.PAD_Y)
         self.board.center()
+        profiler.mark("MainWindow: board")
 
         # author
         frame = tk.Frame(self.frameMain)
@@ -194,6 +209,7 @@ class MainWindow(tk.Tk):
         self.sideFrame = gui_log_frame.LogFrame(self, padx=self.PAD_X, pady=self.PAD_Y, closecommand=self.closeSideFrame, autoReload=settings[KEY.AUTO_TRIGGER_SANITY_CHECK], takefocus=False)
         self.sideFrame.title(_("Sanity Check Incident Log"))
         # (pack happens in self.openSideFrame)
+        self.checkWorker = gui_sanity_check_worker.SanityCheckWorker(self, self.onBackgroundChecksDone)
 
         # notes
         self.frameNotes = tkx.FrameWithTitle(self, padx=self.PAD_X, pady=self.PAD_Y, closecommand=lambda: self.showNotes(False))
@@ -208,6 +224,7 @@ class MainWindow(tk.Tk):
         self.solutionFrame = gui_solution_view.SolutionFrame(self, self.model, padx=self.PAD_X, pady=self.PAD_Y, highlightthickness = 1)
         
         self.model.solution.addOnStepsChangeListener(self.sideFrame.autoReload)
+        profiler.mark("MainWindow: side frames")
         
 
         self.createMenuBackgroundUsage()
@@ -224,7 +241,12 @@ class MainWindow(tk.Tk):
         self.textNotes.bind('<FocusIn>',  self.setReturnFocusToNotes, '+')
         self.textNotes.bind('<Tab>', lambda event: tkx.only(event.widget.tk_focusNext().focus_set()))
         self.protocol(tkc.WM_DELETE_WINDOW, self.myExit)
+        profiler.mark("MainWindow: menus and bindings")
         self.applySettings()
+        profiler.mark("MainWindow: settings")
+
+        # decode the images which have not been needed yet while the user is not doing anything
+        imageOpener.createAllImagesWhenIdle(self)
 
     def updateTitle(self):
         self.title(self.titleFormat.format(
@@ -1227,14 +1249,25 @@ class MainWindow(tk.Tk):
     
     def performChecks(self, *checks):
         assert len(checks) > 0
+        # the result of a check in the background would be older than this one
+        self.checkWorker.cancel()
         self.sideFrame.clear()
-        self.sideFrame.setReloadCommand(lambda: self.performChecks(*checks))
+        # reloads happen on every change, they run in the background to not block the gui
+        self.sideFrame.setReloadCommand(lambda: self.checkWorker.schedule(self.model, checks))
         out = model.LOGLEVEL_NONE
         for check in checks:
             out = max(out, check(self.sideFrame.addMessage))
         self.sideFrame.complete()
         return out
 
+    def onBackgroundChecksDone(self, messages, logLevel, checkedModel):
+        self.sideFrame.clear()
+        for lv, msg in messages:
+            self.sideFrame.addMessage(lv, msg)
+        self.sideFrame.complete()
+        # Solution.sanityCheck remembers whether it has found problems
+        self.model.getSolution().isDirty = checkedModel.getSolution().isDirty
+
     def openSideFrame(self):
         self.sideFrame.pack(side=tk.RIGHT, anchor=tk.N, padx=self.PAD_X, pady=self.PAD_Y, expand=tk.YES, fill=tk.BOTH)
         self.menubar.menu_view.set_named_checkbutton('log', True)
@@ -1295,12 +1328,11 @@ class MainWindow(tk.Tk):
 
 
 if __name__=='__main__':
-    import sys
     error = logging.error
 
     def printUsage():
         error("usage:")
-        error("%s [level.afg]" % (sys.argv[0],))
+        error("%s [%s] [level.afg]" % (sys.argv[0], profiler.OPTION))
     
     m = model.Model()
     w = MainWindow(model=m)
@@ -1314,5 +1346,11 @@ if __name__=='__main__':
         fn = sys.argv[1]
         fn = os.path.abspath(fn)
         w.openTheFile(fn)
+        profiler.mark("open file")
+
+    def printTimeToInteractive():
+        profiler.mark("first idle main loop")
+        profiler.report(totalName="time to interactive")
+    w.after_idle(printTimeToInteractive)
     
     w.mainloop()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""
+Runs sanity checks in a background thread.
+
+Every call to schedule restarts a short delay, the checks are started
+only when the model has not been changed for DELAY milliseconds so
+that a fast series of changes (e.g. holding down an arrow key) causes
+only one check. The checks run on a snapshot of the model
+(see model.ModelSnapshot), which is taken in the main thread when the
+delay has passed. Only one check runs at a time.
+
+Tk must only be used from the main thread, therefore the results are
+put into a queue which the main thread polls. Results of a check which
+has been superseded by a later call to schedule or cancel are dropped.
+"""
+
+# standard libraries
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# other libraries
+import model
+
+
+class SanityCheckWorker(object):
+
+    DELAY = 150  # ms
+    POLL_INTERVAL = 20  # ms
+
+    def __init__(self, widget, onResult):
+        '''widget: any tk widget, used for after.
+        onResult: called in the main thread with (messages, logLevel, checkedModel)
+        where messages is a list of (logLevel, msg) and checkedModel is the Model created from the snapshot.'''
+        self.widget = widget
+        self.onResult = onResult
+        self._results = queue.Queue()
+        # increased whenever the running check becomes outdated
+        self._generation = 0
+        self._pending = None
+        self._afterIdDelay = None
+        self._isRunning = False
+        self._startWhenDone = False
+
+    def schedule(self, model, checks):
+        '''checks: bound methods of model like model.sanityCheckBoard.
+        they are called with the same name on the snapshot.'''
+        self._generation += 1
+        self._pending = (model, [check.__name__ for check in checks])
+        if self._afterIdDelay != None:
+            self.widget.after_cancel(self._afterIdDelay)
+        self._afterIdDelay = self.widget.after(self.DELAY, self._onDelayPassed)
+
+    def cancel(self):
+        '''drops the scheduled check and the result of the running check'''
+        self._generation += 1
+        self._pending = None
+        self._startWhenDone = False
+        if self._afterIdDelay != None:
+            self.widget.after_cancel(self._afterIdDelay)
+            self._afterIdDelay = None
+
+    def _onDelayPassed(self):
+        self._afterIdDelay = None
+        if self._isRunning:
+            self._startWhenDone = True
+            return
+        self._start()
+
+    def _start(self):
+        if self._pending == None:
+            return
+        m, checkNames = self._pending
+        self._pending = None
+        snapshot = m.createSnapshot()
+
+        thread = threading.Thread(target=self._run, args=(self._generation, snapshot, checkNames))
+        thread.daemon = True
+        self._isRunning = True
+        thread.start()
+        self.widget.after(self.POLL_INTERVAL, self._poll)
+
+    def _run(self, generation, snapshot, checkNames):
+        # this is executed in the background thread, do not use Tk here
+        messages = list()
+        log = lambda lv, msg: messages.append((lv, msg))
+        logLevel = model.LOGLEVEL_NONE
+        checkedModel = None
+        try:
+            checkedModel = snapshot.toModel()
+            for name in checkNames:
+                logLevel = max(logLevel, getattr(checkedModel, name)(log))
+        finally:
+            self._results.put((generation, messages, logLevel, checkedModel))
+
+    def _poll(self):
+        try:
+            generation, messages, logLevel, checkedModel = self._results.get_nowait()
+        except queue.Empty:
+            self.widget.after(self.POLL_INTERVAL, self._poll)
+            return
+
+        self._isRunning = False
+        if generation == self._generation and checkedModel != None:
+            self.widget.after_idle(lambda: self._deliver(generation, messages, logLevel, checkedModel))
+        if self._startWhenDone:
+            self._startWhenDone = False
+            self._start()
+
+    def _deliver(self, generation, messages, logLevel, checkedModel):
+        # the model may have changed while waiting for idle
+        if generation == self._generation:
+            self.onResult(messages, logLevel, checkedModel)
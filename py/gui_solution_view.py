@@ -24,6 +24,14 @@ import model_object_catalog as objects
 
 class SolutionViewRaw(tk.Canvas):
 
+    '''
+    Only the rows inside of the visible area (plus MARGIN_ROWS above and below)
+    are drawn. When the view is scrolled updateVisibleRows moves the items of the
+    rows which are not visible anymore to the rows which have become visible.
+    All positions are calculated from the row index, therefore the size of the
+    solution does not need to be measured with bbox.
+    '''
+
     ICON_PATH_SMALL = imageOpener.toAbsPath(os.path.join("icons", "small"))
     ICON_EXT  = '.gif'
 
@@ -49,6 +57,8 @@ class SolutionViewRaw(tk.Canvas):
     HEIGHT_CURSOR = WIDTH_CURSOR
     HEIGHT_ROW = 32
 
+    MARGIN_ROWS = 10
+
     COLOR_SELECTION_FILL    = '#D1E3F5'
     COLOR_SELECTION_OUTLINE = '#4A90D9'
     
@@ -86,12 +96,18 @@ class SolutionViewRaw(tk.Canvas):
 
         # memory initialization
         self._lastWidth = 1
-        self._gridWidgets = list()
         self._colWidths = [0, 0, 0]
         self._colAligns = [self.ALIGN_RIGHT, self.ALIGN_CENTER, self.ALIGN_LEFT]
         self._x         = [0, 0, 0]
         self._x0        = self.PAD_LEFT + self.WIDTH_CURSOR
         self._labelNoStepsExisting = None
+        # row index -> [step number ID, text ID, icon ID] for the rows which are drawn
+        self._rows = dict()
+        # coordinate index -> [coordinate ID, line ID, isDoor] for the coordinates which are drawn
+        self._coordinates = dict()
+        self._coordinatesX = None
+        self._measureID = None
+        self._textWidths = dict()
         self._lastCursorMain = self.solution.getCursorMain()
         self._lastCursorSecondary = self.solution.getCursorSecondary()        
 
@@ -161,9 +177,11 @@ class SolutionViewRaw(tk.Canvas):
         self.drawSelection()
 
     def onStepsChange(self):
-        self.drawSteps()
+        # the steps before this index and their coordinates are unchanged
+        start = self.solution.getFirstChangedStepIndex()
+        self.drawSteps(start)
         self.update_idletasks()
-        self.drawCoordinates(self.winfo_width())
+        self.drawCoordinates(self.winfo_width(), start)
 
     def _onConfigure(self, event):
         if self._lastWidth != event.width:
@@ -181,18 +199,13 @@ class SolutionViewRaw(tk.Canvas):
     # ---------- user input listener ----------
 
     def _onClick(self, event):
-        x = self._xClick
         y = self.canvasy(event.y)
-        items = self.find_closest(x, y)
-        if len(items) == 1:
-            i = self._coordinateIDs.index(items[0])
-            if event.state & tkc.MODIFIER_MASK_SHIFT_ONLY:
-                setCursor = self.solution.expandCursorTo
-            else:
-                setCursor = self.solution.moveCursorTo
-            assert setCursor(i)
+        i = self.getClosestCoordinateIndex(y)
+        if event.state & tkc.MODIFIER_MASK_SHIFT_ONLY:
+            setCursor = self.solution.expandCursorTo
         else:
-            assert False
+            setCursor = self.solution.moveCursorTo
+        assert setCursor(i)
 
     #TODO: right click: change number of steps of helium jump, resolve ambiguous jump
 
@@ -219,59 +232,56 @@ class SolutionViewRaw(tk.Canvas):
 
     def getCursorCanvasBbox(self):
         """returns (x0, y0, x1, y1) in canvas coordinates [not widget coordinates]"""
-        # Canvas.bbox returns (x0, y0, x1, y1)  [unlike grid_bbox which returns (x0, y0, width, height)]
-        bbox  = list(self.bbox(self._coordinateIDs[self.solution.getCursorMain()]))
-        bbox2 = list(self.bbox(self._coordinateIDs[self.solution.getCursorSecondary()]))
-        
-        bbox[0] = min(bbox[0], bbox2[0])
-        bbox[1] = min(bbox[1], bbox2[1])
-        bbox[2] = max(bbox[2], bbox2[2])
-        bbox[3] = max(bbox[3], bbox2[3])
-        
-        return bbox
+        # the coordinates may not be drawn, therefore the bbox is calculated
+        iMin = min(self.solution.getCursorMain(), self.solution.getCursorSecondary())
+        iMax = max(self.solution.getCursorMain(), self.solution.getCursorSecondary())
+        x0 = self._xClick - self.WIDTH_COR/2
+        x1 = self._xClick + self.WIDTH_COR/2
+        y0 = self.getCoordinateCenterY(iMin) - self.HEIGHT_CURSOR/2
+        y1 = self.getCoordinateCenterY(iMax) + self.HEIGHT_CURSOR/2
+        return [x0, y0, x1, y1]
     
 
     # ---------- draw ----------
     
-    def drawSteps(self):
-        n = len(self._gridWidgets)
+    def drawSteps(self, start=0):
+        '''start: index of the first step which may have been changed.
+        the rows of the steps before start are not touched.'''
+        steps = self.solution.iterSteps()
+        numberSteps = len(steps)
+
+        self._updateColumns(steps)
+        first, stop = self.getVisibleRows()
+        self._drawRows(first, min(stop, numberSteps), start)
+
+        if numberSteps == 0:
+            if self._labelNoStepsExisting == None:
+                x = self._x0 + self.PAD_X_CURSOR
+                y = self.getRowCenterY(0.5)
+                #TODO: center (place real label)
+                self._labelNoStepsExisting = self.create_text(x,y, anchor=self.ALIGN_LEFT, text=_("(No steps existing yet)"), **self.KW_INFO)
+                width = self.getWidth(self._labelNoStepsExisting)
+                self._xLast = x + width
+            return
         
-        stepNumber = 0
-        row = None
-        for row, step in enumerate(self.solution.iterSteps(), 0):
-            if row < n:
-                widgets = self._gridWidgets[row]
-            else:
-                y = self.getRowCenterY( row )
-                widgets = list()
-                widgets.append( self._mycreate(self.create_text,  self.COL_STEP_NUMBER, y, **self.KW_STEP_NUMBER) )
-                widgets.append( self._mycreate(self.create_text,  self.COL_TEXT, y, **self.KW_STEP_TEXT) )
-                widgets.append( self._mycreate(self.create_image, self.COL_ICON, y) )
-                self._gridWidgets.append( widgets )
-            
-            if not step.isUncountedJump():
-                stepNumber += 1
-                self.itemconfigure(widgets[0], text="%s)"%stepNumber)
-            else:
-                self.itemconfigure(widgets[0], text="")
-            
-            self.itemconfigure(widgets[1], text=self.getText(step))
-            self.itemconfigure(widgets[2], image=self.getSmallIcon(step))
+        elif self._labelNoStepsExisting != None:
+            self.delete(self._labelNoStepsExisting)
+            self._labelNoStepsExisting = None
 
-        if row == None:
-            numberRowsToBeRemoved = n
-        else:
-            numberRowsToBeRemoved = n - row - 1
-        for _dummy in range( numberRowsToBeRemoved ):
-            for widget in self._gridWidgets[-1]:
-                self.delete(widget)
-            del self._gridWidgets[-1]
+    def _updateColumns(self, steps):
+        '''calculates the width of the columns for all steps (not only the drawn ones) and moves the drawn items accordingly'''
+        # the kinds are counted by the solution, the steps are not iterated here
+        kinds = self.solution.getStepKinds()
+        widths = [
+            self.measureText("%s)" % self.solution.getNumberCountedSteps()) if steps else 0,
+            max([self._iconsSmall[kind].width() for kind in kinds] or [0]),
+            max([self.measureText(text) for kind in kinds for text in self.getWidestTexts(kind)] or [0]),
+        ]
 
         # set x coorinate
         x = self._x0 + self.PAD_X_CURSOR
         for col in range(len(self._colWidths)):
-            # calculate width
-            width = self.getWidth(self.getTagColumn(col))
+            width = widths[col]
             self._colWidths[col] = width
 
             # align
@@ -294,28 +304,50 @@ class SolutionViewRaw(tk.Canvas):
         
         self._xLast = x - self.PAD_X + self.PAD_X_COR
 
-        if row == None:
-            if self._labelNoStepsExisting == None:
-                x = self._x0 + self.PAD_X_CURSOR
-                y = self.getRowCenterY(0.5)
-                #TODO: center (place real label)
-                self._labelNoStepsExisting = self.create_text(x,y, anchor=self.ALIGN_LEFT, text=_("(No steps existing yet)"), **self.KW_INFO)
-                width = self.getWidth(self._labelNoStepsExisting)
-                self._xLast = x + width
-            return
-        
-        elif self._labelNoStepsExisting != None:
-            self.delete(self._labelNoStepsExisting)
-            self._labelNoStepsExisting = None
+    def _drawRows(self, first, stop, start):
+        '''makes sure that exactly the rows first, ..., stop-1 are drawn.
+        rows which are drawn already are updated only if they are >= start.
+        the items of the other rows are reused.'''
+        unused = [self._rows.pop(i) for i in list(self._rows) if not first <= i < stop]
+        steps = self.solution.iterSteps()
+        for row in range(first, stop):
+            widgets = self._rows.get(row)
+            if widgets != None and row < start:
+                continue
+
+            y = self.getRowCenterY( row )
+            if widgets == None:
+                if unused:
+                    widgets = unused.pop()
+                    for col, widget in zip((self.COL_STEP_NUMBER, self.COL_TEXT, self.COL_ICON), widgets):
+                        self.coords(widget, self._x[col], y)
+                else:
+                    widgets = list()
+                    widgets.append( self._mycreate(self.create_text,  self.COL_STEP_NUMBER, y, **self.KW_STEP_NUMBER) )
+                    widgets.append( self._mycreate(self.create_text,  self.COL_TEXT, y, **self.KW_STEP_TEXT) )
+                    widgets.append( self._mycreate(self.create_image, self.COL_ICON, y) )
+                self._rows[row] = widgets
+
+            step = steps[row]
+            if not step.isUncountedJump():
+                self.itemconfigure(widgets[0], text="%s)" % (self.solution.getStepNumber(row) + 1))
+            else:
+                self.itemconfigure(widgets[0], text="")
+            
+            self.itemconfigure(widgets[1], text=self.getText(step))
+            self.itemconfigure(widgets[2], image=self.getSmallIcon(step))
+
+        for widgets in unused:
+            for widget in widgets:
+                self.delete(widget)
 
     def _mycreate(self, createMethod, col, y, **kw):
         return createMethod(self._x[col], y, tags=[self.getTagColumn(col)], anchor=self._colAligns[col], **kw)
 
 
-    def drawCoordinates(self, width=None):
-        # clear
-        self.delete(self.TAG_COR)
-
+    def drawCoordinates(self, width=None, start=0):
+        '''start: index of the first coordinate which may have been changed.
+        the coordinates before start are kept unless they need to be moved.'''
         # measure
         if width == None:
             width = self.winfo_width()
@@ -330,26 +362,16 @@ class SolutionViewRaw(tk.Canvas):
         # save for _onClick
         self._xClick = xCor
 
-        # definition
-        self._coordinateIDs = list()
-        def drawCoordinate(i):
-            y = self.getCoordinateCenterY(i)
-            if cor == model.Solution.COR_END:
-                corID = self.create_image(xCor, y, image=self.getSmallIcon(self.IMG_DOOR), anchor=tk.CENTER, tags=[self.TAG_COR, self.getTagColumn(self.COL_COORDINATES)])
-            else:
-                if self.model.isValidField(*cor):
-                    kw = self.KW_COR_UNSELECTED
-                    tags = (self.TAG_COR,)
-                else:
-                    kw = self.KW_COR_INVALID_UNSELECTED
-                    tags = (self.TAG_COR, self.TAG_INVALID)
-                corID = self.create_text(xCor, y, text=self.coordinateToText(cor), anchor=tk.CENTER, tags=tags, **kw)
-            self._coordinateIDs.append(corID)
-            self.create_line(x0,y, xLine,y, fill="gray", dash=(4, 4), tags=(self.TAG_COR,))
+        # move
+        if (x0, xLine, xCor) != self._coordinatesX:
+            self._coordinatesX = (x0, xLine, xCor)
+            for i, (corID, lineID, isDoor) in self._coordinates.items():
+                y = self.getCoordinateCenterY(i)
+                self.coords(corID, xCor, y)
+                self.coords(lineID, x0,y, xLine,y)
 
-        # execution
-        for i, cor in enumerate(self.solution.iterViewCoordinates()):
-            drawCoordinate(i)
+        first, stop = self.getVisibleRows()
+        self._drawCoordinateRows(first, stop, start)
 
         # adjust width
         width = self.getWidth( self.getTagColumn(self.COL_COORDINATES) )
@@ -359,31 +381,83 @@ class SolutionViewRaw(tk.Canvas):
         # draw cursor
         self.drawSelection()
 
+    def _drawCoordinateRows(self, first, stop, start):
+        '''like _drawRows for the coordinates'''
+        x0, xLine, xCor = self._coordinatesX
+        unused = [self._coordinates.pop(i) for i in list(self._coordinates) if not first <= i < stop]
+        cursorMain = self.solution.getCursorMain()
+        for i in range(first, stop):
+            item = self._coordinates.get(i)
+            if item != None and i < start:
+                continue
+
+            y = self.getCoordinateCenterY(i)
+            cor = self.solution.getViewCoordinate(i)
+            isDoor = cor == model.Solution.COR_END
+            if item != None and item[2] != isDoor:
+                unused.append(item)
+                item = None
+            if item == None:
+                for j in range(len(unused)):
+                    if unused[j][2] == isDoor:
+                        item = unused.pop(j)
+                        self.coords(item[0], xCor, y)
+                        self.coords(item[1], x0,y, xLine,y)
+                        break
+            if item == None:
+                if isDoor:
+                    corID = self.create_image(xCor, y, image=self.getSmallIcon(self.IMG_DOOR), anchor=tk.CENTER, tags=[self.TAG_COR, self.getTagColumn(self.COL_COORDINATES)])
+                else:
+                    corID = self.create_text(xCor, y, anchor=tk.CENTER, tags=(self.TAG_COR, self.getTagColumn(self.COL_COORDINATES)))
+                lineID = self.create_line(x0,y, xLine,y, fill="gray", dash=(4, 4), tags=(self.TAG_COR,))
+                item = [corID, lineID, isDoor]
+            self._coordinates[i] = item
+
+            if not isDoor:
+                corID = item[0]
+                isValid = self.model.isValidField(*cor)
+                if isValid:
+                    self.dtag(corID, self.TAG_INVALID)
+                else:
+                    self.addtag_withtag(self.TAG_INVALID, corID)
+                self.itemconfigure(corID, text=self.coordinateToText(cor), **self._getCoordinateKw(isValid, i == cursorMain))
+
+        for item in unused:
+            self.delete(item[0])
+            self.delete(item[1])
+
+    def _getCoordinateKw(self, isValid, isSelected):
+        if isValid:
+            return self.KW_COR_SELECTED if isSelected else self.KW_COR_UNSELECTED
+        return self.KW_COR_INVALID_SELECTED if isSelected else self.KW_COR_INVALID_UNSELECTED
+
+    def updateVisibleRows(self):
+        '''draws the rows which have become visible after scrolling or resizing'''
+        if self._coordinatesX == None or not self.solution.isInitialized():
+            # nothing has been drawn yet
+            return
+        first, stop = self.getVisibleRows()
+        self._drawRows(first, min(stop, len(self.solution.iterSteps())), len(self.solution.iterSteps()))
+        self._drawCoordinateRows(first, stop, len(self.solution.iterSteps()) + 1)
+
 
     def drawSelection(self):
         # clear last selection
         self.delete(self.TAG_SEL)
 
-        if self._lastCursorMain < len(self._coordinateIDs):
-            itemID = self._coordinateIDs[self._lastCursorMain]
-            if self.type(itemID) == tkc.TYPE_TEXT:
-                if self.TAG_INVALID not in self.gettags(itemID):
-                    kw = self.KW_COR_UNSELECTED
-                else:
-                    kw = self.KW_COR_INVALID_UNSELECTED
-                self.itemconfig(itemID, **kw)
+        item = self._coordinates.get(self._lastCursorMain)
+        if item != None and not item[2]:
+            itemID = item[0]
+            self.itemconfig(itemID, **self._getCoordinateKw(self.TAG_INVALID not in self.gettags(itemID), False))
 
         # configure existing objects
         self._lastCursorMain = self.solution.getCursorMain()
         self._lastCursorSecondary = self.solution.getCursorSecondary()
 
-        itemID = self._coordinateIDs[self._lastCursorMain]
-        if self.type(itemID) == tkc.TYPE_TEXT:
-            if self.TAG_INVALID not in self.gettags(itemID):
-                kw = self.KW_COR_SELECTED
-            else:
-                kw = self.KW_COR_INVALID_SELECTED
-            self.itemconfig(itemID, **kw)
+        item = self._coordinates.get(self._lastCursorMain)
+        if item != None and not item[2]:
+            itemID = item[0]
+            self.itemconfig(itemID, **self._getCoordinateKw(self.TAG_INVALID not in self.gettags(itemID), True))
 
         # measure
         # grid_bbox returns (x0, y0, width, height)  [unlike Canvas.bbox which returns (x0, y0, x1, y1)]
@@ -423,6 +497,27 @@ class SolutionViewRaw(tk.Canvas):
 
     def getCoordinateCenterY(self, i):
         return self.PAD_TOP + i * (self.HEIGHT_ROW + self.PAD_Y)
+
+    def getClosestCoordinateIndex(self, y):
+        i = int(round((y - self.PAD_TOP) / float(self.HEIGHT_ROW + self.PAD_Y)))
+        return max(0, min(i, len(self.solution.iterSteps())))
+
+    def getVisibleRows(self):
+        '''returns (first, stop) so that the coordinates first, ..., stop-1 are visible or at most MARGIN_ROWS outside of the visible area'''
+        y0 = self.canvasy(0)
+        y1 = y0 + self.winfo_height()
+        rowHeight = self.HEIGHT_ROW + self.PAD_Y
+        first = int((y0 - self.PAD_TOP) // rowHeight) - self.MARGIN_ROWS
+        stop  = int((y1 - self.PAD_TOP) // rowHeight) + 2 + self.MARGIN_ROWS
+        n = len(self.solution.iterSteps()) + 1
+        return max(0, min(first, n)), max(0, min(stop, n))
+
+    def getScrollregion(self):
+        '''returns (x0, y0, x1, y1) which contains all rows whether they are drawn or not'''
+        y0 = self.getCoordinateCenterY(0) - self.HEIGHT_ROW/2
+        y1 = self.getCoordinateCenterY(len(self.solution.iterSteps())) + self.HEIGHT_ROW/2 + self.PAD_BOTTOM
+        x1 = max(self.winfo_width(), self.getReqWidth())
+        return (0, y0, x1, y1)
     
     
     def getWidth(self, tag):
@@ -432,6 +527,18 @@ class SolutionViewRaw(tk.Canvas):
             return 0
         return bbox[2] - bbox[0]
 
+    def measureText(self, text):
+        '''returns the width of text in the font of the steps, the result is cached'''
+        width = self._textWidths.get(text)
+        if width == None:
+            if self._measureID == None:
+                # far outside of the scrollregion
+                self._measureID = self.create_text(-10000, -10000, anchor=tk.W)
+            self.itemconfigure(self._measureID, text=text)
+            width = self.getWidth(self._measureID)
+            self._textWidths[text] = width
+        return width
+
     def getReqWidth(self):
         return self._xLast + self.WIDTH_COR + self.PAD_RIGHT
 
@@ -462,6 +569,20 @@ class SolutionViewRaw(tk.Canvas):
         
         assert False
 
+    @classmethod
+    def getWidestTexts(cls, kind):
+        '''returns the texts of the steps of kind (see Solution.getStepKind) which may be the widest'''
+        if model.Solution.isNormalStep(kind):
+            return [cls.getText(kind)]
+        if kind == model.PipeJump:
+            return [cls.getText(model.PipeJump())]
+        if kind == model.HeliumJump:
+            return [cls.getText(model.HeliumJump(-dy)) for dy in range(1, model.Model.ROWS)]
+        # the distances are limited by the size of the board, the longest numbers are negative with two digits
+        dxs = (-(model.Model.COLS-1), model.Model.COLS-1)
+        dys = (-(model.Model.ROWS-1), model.Model.ROWS-1)
+        return [cls.getText(kind(dx, dy)) for dx in dxs for dy in dys]
+
     @staticmethod
     def getIconID(step):
         if model.Solution.isNormalStep(step):
@@ -501,14 +622,19 @@ class SolutionFrame(tkx.FrameWithTitle):
         self.grid_columnconfigure(0, weight=1)
 
         self.scrollbarVer.config(command = self.solutionView.yview)
-        self.solutionView.config(yscrollcommand = self.scrollbarVer.set)
+        self.solutionView.config(yscrollcommand = self._onYScroll)
         self.mousewheelBinder = tkx.MousewheelBinder(self.solutionView)
 
 
     # ---------- internal methods ----------
 
     def updateScrollregion(self):
-        self.solutionView.configure( scrollregion = self.solutionView.bbox(tk.ALL) )
+        self.solutionView.configure( scrollregion = self.solutionView.getScrollregion() )
+
+    def _onYScroll(self, first, last):
+        # is called by the canvas whenever the visible area changes
+        self.scrollbarVer.set(first, last)
+        self.solutionView.updateVisibleRows()
 
     # @Override
     def focus_set(self):
@@ -528,8 +654,7 @@ class SolutionFrame(tkx.FrameWithTitle):
 
     def scrollUp(self, y):
         """scroll so that y is at top of visible area"""
-        # Canvas.bbox returns (x0, y0, x1, y1)  [unlike grid_bbox which returns (x0, y0, width, height)]
-        scrollregion = self.solutionView.bbox(tk.ALL)
+        scrollregion = self.solutionView.getScrollregion()
         y0 = scrollregion[1]
         y1 = scrollregion[3]
         if y < y0:
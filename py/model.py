@@ -10,14 +10,18 @@ except ImportError:
 import os
 import re
 import logging
+import contextlib
 from io import open
 
 # other libraries
 import model_history
+import model_board
+import model_bitboard
+import model_level_pack
+import model_physics as physics
 import model_background_catalog as backgrounds
 
 import model_object_catalog as objects
-import gui_image_opener as imageOpener
 
 import system
 import locales
@@ -54,8 +58,27 @@ class Logger(object):
         return self._maxLogLevel
 
 
+def createHistory(obj, onUndoOrRedoListener):
+    '''creates the history for a Model or a Solution as specified by it's class attributes'''
+    if obj.USE_DELTA_HISTORY:
+        return model_history.DeltaHistory(obj, obj._ATTRIBUTES_TO_BACKUP, obj.HISTORY_MAX_MEMORY, onUndoOrRedoListener)
+    else:
+        return model_history.History(obj, obj._ATTRIBUTES_TO_BACKUP, obj.HISTORY_MAX_SIZE, onUndoOrRedoListener)
+
+
 class CursorList(object):
 
+    '''
+    An ordered list of cursors (x,y).
+    The order is the order in which the cursors have been added,
+    the last cursor is the main cursor.
+    A cursor may be contained more than once (this may happen temporarily while moving cursors).
+
+    Membership is tested with a dict counting how often each cursor is contained.
+    index looks up the first occurence in a dict which is built when it is needed
+    and dropped whenever the order changes.
+    '''
+
     # ---------- initialization ----------
     
     def __init__(self):
@@ -63,6 +86,8 @@ class CursorList(object):
 
     def clear(self):
         self._cursors = list()
+        self._counts = dict()
+        self._indices = None
 
 
     def __str__(self):
@@ -77,45 +102,81 @@ class CursorList(object):
     def __len__(self):
         return len(self._cursors)
 
-    def __in__(self, cursor):
-        return cursor in self._cursors
+    def __iter__(self):
+        return iter(self._cursors)
+
+    def __contains__(self, cursor):
+        return cursor in self._counts
 
     def index(self, cursor):
-        return self._cursors.index(cursor)
+        if self._indices is None:
+            indices = dict()
+            for i in range(len(self._cursors)-1, -1, -1):
+                indices[self._cursors[i]] = i
+            self._indices = indices
+        try:
+            return self._indices[cursor]
+        except KeyError:
+            raise ValueError("%r is not in CursorList" % (cursor,))
 
 
     # ---------- setters ----------
 
     def __setitem__(self, index, cursor):
+        self._decrementCount(self._cursors[index])
         self._cursors[index] = cursor
+        self._incrementCount(cursor)
+        self._indices = None
         
     def setLast(self, cursor):
-        fromIndex = self._cursors.index(cursor)
+        fromIndex = self.index(cursor)
         del self._cursors[fromIndex]
         self._cursors.append(cursor)
+        self._indices = None
         
 
     def insert(self, index, cursor):
         self._cursors.insert(index, cursor)
+        self._incrementCount(cursor)
+        self._indices = None
 
     def append(self, cursor):
-        self.insert(len(self), cursor)
+        self._cursors.append(cursor)
+        self._incrementCount(cursor)
+        if self._indices is not None and cursor not in self._indices:
+            self._indices[cursor] = len(self._cursors) - 1
 
 
     def remove(self, cursor):
-        i = self._cursors.index(cursor)
+        i = self.index(cursor)
         del self[i]
 
     def __delitem__(self, i):
+        self._decrementCount(self._cursors[i])
         del self._cursors[i]
+        self._indices = None
         
     def removeLast(self):
         del self[-1]
 
 
+    def _incrementCount(self, cursor):
+        self._counts[cursor] = self._counts.get(cursor, 0) + 1
+
+    def _decrementCount(self, cursor):
+        n = self._counts[cursor] - 1
+        if n == 0:
+            del self._counts[cursor]
+        else:
+            self._counts[cursor] = n
+
+
 
 class Jump(object):
 
+    # how the step is performed by model_physics.Simulator
+    physicsKind = physics.STEP_KIND_INVALID
+
     def __init__(self, dx, dy):
         self._dx = dx
         self._dy = dy
@@ -149,6 +210,8 @@ class Jump(object):
 
 class NormalStep(Jump):
 
+    physicsKind = physics.STEP_KIND_NORMAL
+
     def __init__(self, dx, dy):
         assert abs(dx) + abs(dy) == 1
         Jump.__init__(self, dx, dy)
@@ -169,8 +232,11 @@ class IllegalJumpStep(Jump):
 
 class PipeJump(Jump):
 
+    physicsKind = physics.STEP_KIND_PIPE
+
     def __init__(self):
-        pass
+        # the distances are not used for jumping but make pipe jumps comparable
+        Jump.__init__(self, 0, 0)
 
     def jump(self, x, y):
         return x, Model.ROWS - 1 - y
@@ -180,6 +246,8 @@ class PipeJump(Jump):
 
 class HeliumJump(Jump):
 
+    physicsKind = physics.STEP_KIND_HELIUM
+
     def __init__(self, dy):
         '''dy < 0. steps are flipped with board therefore a pipe jump must always point upward, which is negative y direction.'''
         assert dy < 0
@@ -198,32 +266,41 @@ class Solution(object):
     STEP_LEFT  = NormalStep(-1,  0)
     STEP_RIGHT = NormalStep( 1,  0)
 
+    # _coordinates is not backed up because it is derived from _steps
     _ATTRIBUTES_TO_BACKUP = (
-        ('_coordinates', list),
         ('_steps', list),
         ('_cursorMain', None, model_history.UPDATE_LAST),
         ('_cursorSecondary', None, model_history.UPDATE_LAST),
     )
 
+    # if True only the changes are stored in the history and the size of the history is limited by HISTORY_MAX_MEMORY (in bytes)
+    # otherwise every history entry is a full copy and the size of the history is limited to HISTORY_MAX_SIZE entries
+    USE_DELTA_HISTORY = True
+    HISTORY_MAX_MEMORY = 4 * 1024 * 1024
+    HISTORY_MAX_SIZE = 30
+
 
     # ---------- initialization ----------
     
     def __init__(self):
         self._onCursorChangeListener = list()
         self._onStepsChangeListener = list()
-        self.history = model_history.History(self, self._ATTRIBUTES_TO_BACKUP, 30, self._onUndoOrRedo)
+        self.history = createHistory(self, self._onUndoOrRedo)
         self.clear()
 
     def clear(self):
         self.history.clear()
         self._coordinates = list()
         self._steps = None
+        self._stepKindCounts = dict()
         self._start = None
         self.isDirty = False
         
         # selection are indeces of self._steps which are not necessarily the same as for self._coordinates (because self._steps includes uncounted jumps)
         self._cursorMain = 0
         self._cursorSecondary = self._cursorMain
+
+        self._clearCache()
         
 
     def init(self, model):
@@ -241,6 +318,9 @@ class Solution(object):
             self._calculateSteps()
         else:
             self._updateCoordinates()
+        self._clearCache()
+        self._numberCountedSteps = self._countSteps(self._steps)
+        self._countStepKinds()
 
         if len(self.history) == 0:
             self.history.makeBackup()
@@ -258,17 +338,34 @@ class Solution(object):
         for listener in self._onCursorChangeListener:
             listener()
 
-    def _onStepsChanged(self):
+    def _onStepsChanged(self, index=0):
+        '''index: the first step which has been changed, all steps before are unchanged'''
+        self._invalidateCache(index)
         self._updateCoordinates()
         self.history.makeBackup()
+        self._firstChangedStep = index
         self.notifyOnStepsChangedListener()
+        self._firstChangedStep = 0
 
     def notifyOnStepsChangedListener(self):
         for listener in self._onStepsChangeListener:
             listener()
 
+    def getFirstChangedStepIndex(self):
+        '''returns the index of the first step which may have been changed.
+        to be called by listeners which are notified of a change of steps.
+        if called at any other time 0 is returned.'''
+        return self._firstChangedStep
+
 
     def _onUndoOrRedo(self):
+        self._invalidateCache(0)
+        self._updateCoordinates()
+        self._numberCountedSteps = self._countSteps(self._steps)
+        self._countStepKinds()
+        # the cursor is saved with UPDATE_LAST and may be behind the last step of the loaded steps
+        self._cursorMain      = min(self._cursorMain,      self.getCursorMax())
+        self._cursorSecondary = min(self._cursorSecondary, self.getCursorMax())
         self.notifyOnStepsChangedListener()
         self._onCursorChanged()
 
@@ -393,12 +490,25 @@ class Solution(object):
     # ---------- getters ----------
     
     def __len__(self):
+        if self._coordinates == None:
+            return self._numberCountedSteps
         return len(self._coordinates)
 
     def isInitialized(self):
         return self._steps != None
 
+    def getNumberCountedSteps(self):
+        '''returns the number of steps which are not uncounted jumps'''
+        return self._numberCountedSteps
+
+    def getStepKinds(self):
+        '''returns the kinds (see getStepKind) of the existing steps.
+        this is updated with every change, it does not iterate over the steps.'''
+        return self._stepKindCounts.keys()
+
     def iterCoordinates(self):
+        if self._coordinates == None:
+            self._coordinates = self._calculateCoordinates()
         return self._coordinates
 
     def iterSteps(self):
@@ -413,11 +523,8 @@ class Solution(object):
     
 
     def isFlipped(self):
-        n = 0
-        for i in range(self._cursorMain):
-            if isinstance(self._steps[i], PipeJump):
-                n += 1
-        return n % 2
+        self._updateCache(self._cursorMain)
+        return self._cacheIsFlipped[self._cursorMain]
 
 
     # ---------- setters ----------
@@ -430,16 +537,15 @@ class Solution(object):
         if self._cursorMain != self._cursorSecondary:
             i0 = min(self._cursorMain, self._cursorSecondary)
             i1 = max(self._cursorMain, self._cursorSecondary)
-            for i in range(i0, i1):
-                self._steps[i] = step
-            self._onStepsChanged()
+            self._replaceSteps(i0, i1, [step] * (i1 - i0))
+            self._onStepsChanged(i0)
             return
         
         index = self._cursorMain
         self._cursorMain      += 1
         self._cursorSecondary += 1
-        self._steps.insert(index, step)
-        self._onStepsChanged()
+        self._replaceSteps(index, index, [step])
+        self._onStepsChanged(index)
 
 
     def deleteStepAbove(self):
@@ -452,8 +558,8 @@ class Solution(object):
 
         self._cursorMain      -= 1
         self._cursorSecondary -= 1
-        del self._steps[self._cursorMain]
-        self._onStepsChanged()
+        self._replaceSteps(self._cursorMain, self._cursorMain + 1, [])
+        self._onStepsChanged(self._cursorMain)
         return True
 
     def deleteStepBelow(self):
@@ -464,28 +570,180 @@ class Solution(object):
             # cursor is at bottom => can not remove something below
             return False
         
-        del self._steps[self._cursorMain]
-        self._onStepsChanged()
+        self._replaceSteps(self._cursorMain, self._cursorMain + 1, [])
+        self._onStepsChanged(self._cursorMain)
         return True
 
     def _deleteSelectedRange(self):
         i0 = min(self._cursorMain, self._cursorSecondary)
         i1 = max(self._cursorMain, self._cursorSecondary)
         
-        for i in range(i0, i1):
-            del self._steps[i0]
-            # because I am removing element i0, the initially i-th element becomes element i0
+        self._replaceSteps(i0, i1, [])
         
         self._cursorMain      = i0
         self._cursorSecondary = i0
-        self._onStepsChanged()
+        self._onStepsChanged(i0)
         return True
 
+    def replaceSteps(self, i0, i1, steps):
+        '''replaces the steps with the indices i0 <= i < i1 by steps (e.g. by a shorter way found by model_shortener).
+        cursors behind the replaced steps keep pointing to the same step.'''
+        steps = list(steps)
+        delta = len(steps) - (i1 - i0)
+        def adjustCursor(cursor):
+            if cursor >= i1:
+                return cursor + delta
+            return min(cursor, i0 + len(steps))
+        self._replaceSteps(i0, i1, steps)
+        self._cursorMain      = adjustCursor(self._cursorMain)
+        self._cursorSecondary = adjustCursor(self._cursorSecondary)
+        self._onStepsChanged(i0)
+
+    def setSteps(self, steps):
+        '''replaces all steps (e.g. by a solution found by model_solver) and moves the cursor behind the last step'''
+        self._replaceSteps(0, len(self._steps), list(steps))
+        self._cursorMain      = len(self._steps)
+        self._cursorSecondary = self._cursorMain
+        self._onStepsChanged(0)
+
+    def _replaceSteps(self, i0, i1, steps):
+        '''replaces self._steps[i0:i1] by steps. does not notify listeners.'''
+        self._numberCountedSteps += self._countSteps(steps) - self._countSteps(self._steps[i0:i1])
+        self._updateStepKindCounts(self._steps[i0:i1], -1)
+        self._updateStepKindCounts(steps, +1)
+        self._steps[i0:i1] = steps
+        self.history.recordSplice('_steps', i0, i1, i0 + len(steps))
+
+    def _countStepKinds(self):
+        self._stepKindCounts = dict()
+        self._updateStepKindCounts(self._steps, +1)
+
+    def _updateStepKindCounts(self, steps, sign):
+        counts = self._stepKindCounts
+        for step in steps:
+            kind = self.getStepKind(step)
+            n = counts.get(kind, 0) + sign
+            if n == 0:
+                del counts[kind]
+            else:
+                counts[kind] = n
+
+    @staticmethod
+    def _countSteps(steps):
+        '''returns the number of steps which are not uncounted jumps'''
+        n = 0
+        for step in steps:
+            if not step.isUncountedJump():
+                n += 1
+        return n
+
 
     # ---------- calculations ----------
 
     def _updateCoordinates(self):
-        self._coordinates = self._calculateCoordinates()
+        # the coordinates are calculated when they are needed
+        self._coordinates = None
+
+    # cache: the following lists contain the state before the first step
+    # followed by the state after each step. they are valid for the first
+    # _cacheValid steps, elements after that are outdated.
+    # _cacheViewCors:    coordinates as drawn on the board (flipped after a pipe jump)
+    # _cacheIsFlipped:   whether the board is flipped
+    # _cacheStepNumbers: number of steps which are not uncounted jumps
+    # _cacheBoardCors:   absolute board coordinates (unflipped)
+    # _visitedCounts maps the board coordinates of the first _visitedStop
+    # elements of _cacheBoardCors to how often they occur.
+
+    def _clearCache(self):
+        self._cacheViewCors = list()
+        self._cacheIsFlipped = list()
+        self._cacheStepNumbers = list()
+        self._cacheBoardCors = list()
+        self._cacheValid = 0
+        self._visitedCounts = dict()
+        self._visitedStop = 0
+        self._firstChangedStep = 0
+        self._simulator = None
+
+    def _invalidateCache(self, index):
+        '''index: the first step which has been changed'''
+        self._cacheValid = min(self._cacheValid, index)
+        # the outdated coordinates are still in the cache, remove them while they are known
+        self._updateVisited(min(self._visitedStop, index + 1))
+        if self._simulator != None:
+            self._simulator.invalidate(index)
+
+    def _updateCache(self, stop):
+        '''makes sure that the cache is valid for the first stop steps'''
+        cors = self._cacheViewCors
+        if len(cors) == 0:
+            cors.append(self._start)
+            self._cacheIsFlipped.append(False)
+            self._cacheStepNumbers.append(0)
+            self._cacheBoardCors.append(self._start)
+        i = self._cacheValid
+        if i >= stop:
+            return
+
+        flipped = self._cacheIsFlipped
+        numbers = self._cacheStepNumbers
+        boardCors = self._cacheBoardCors
+        flipCoordinate = self.model.flipCoordinate
+        cor = cors[i]
+        isFlipped = flipped[i]
+        n = numbers[i]
+        steps = self._steps
+        for i in range(i, stop):
+            step = steps[i]
+            cor = step.jump(*cor)
+            if isinstance(step, PipeJump):
+                isFlipped = not isFlipped
+            elif not step.isUncountedJump():
+                n += 1
+            boardCor = flipCoordinate(cor) if isFlipped else cor
+            if i + 1 < len(cors):
+                cors[i+1] = cor
+                flipped[i+1] = isFlipped
+                numbers[i+1] = n
+                boardCors[i+1] = boardCor
+            else:
+                cors.append(cor)
+                flipped.append(isFlipped)
+                numbers.append(n)
+                boardCors.append(boardCor)
+        self._cacheValid = stop
+
+    def _updateVisited(self, stop):
+        '''makes sure that _visitedCounts contains the first stop board coordinates.
+        the cache must be valid for the coordinates which are added.'''
+        counts = self._visitedCounts
+        boardCors = self._cacheBoardCors
+        i = self._visitedStop
+        while i < stop:
+            cor = boardCors[i]
+            counts[cor] = counts.get(cor, 0) + 1
+            i += 1
+        while i > stop:
+            i -= 1
+            cor = boardCors[i]
+            if counts[cor] == 1:
+                del counts[cor]
+            else:
+                counts[cor] -= 1
+        self._visitedStop = stop
+
+    def getStepNumber(self, index):
+        '''returns the number of counted steps in self._steps[:index]'''
+        self._updateCache(index)
+        return self._cacheStepNumbers[index]
+
+    def getViewCoordinate(self, index):
+        '''returns the index-th element of iterViewCoordinates'''
+        self._updateCache(index)
+        cor = self._cacheViewCors[index]
+        if self.model.isEndField(cor, self._cacheIsFlipped[index]):
+            return self.COR_END
+        return cor
 
     def _calculateSteps(self):
         self._steps = list()
@@ -626,67 +884,69 @@ class Solution(object):
         Coordinates corresponds to step number.
         Omits start coordinate.
         '''
-        cors = list()
-        cor = self._start
-        for i, step in enumerate(self._steps):
-            cor = step.jump(*cor)
-            if not step.isUncountedJump():
-                cors.append(cor)
-        return cors
+        steps = self._steps
+        self._updateCache(len(steps))
+        cors = self._cacheViewCors
+        return [cors[i+1] for i in range(len(steps)) if not steps[i].isUncountedJump()]
 
     def getBoardCoordinates(self):
         '''Absolute board coordinates (unflipped).
         Includes intermediate results of uncounted jumps.
         Breaks at cursor!'''
-        cors = list()
-        cor = self._start
-        isFlipped = False
-        
-        cors.append(cor)
-        for i, step in enumerate(self._steps):
-            if i == self._cursorMain:
-                break
-            if isinstance(step, PipeJump):
-                isFlipped = not isFlipped
-            else:
-                if isFlipped:
-                    cor = step.flip().jump(*cor)
-                else:
-                    cor = step.jump(*cor)
-            cors.append(cor)
-        return cors
+        self._updateCache(self._cursorMain)
+        return self._cacheBoardCors[:self._cursorMain+1]
+
+    def getBoardCoordinate(self, index):
+        '''returns the index-th element of getBoardCoordinates, ignoring the cursor.
+        getBoardCoordinate(getCursorMain()) is the position of the cat.'''
+        self._updateCache(index)
+        return self._cacheBoardCors[index]
+
+    def getVisitedFields(self):
+        '''returns the fields of getBoardCoordinates as a dict mapping each field
+        to how often it is visited. It must not be changed by the caller.
+        Moving the cursor by n steps costs O(n), not O(cursor).'''
+        self._updateCache(self._cursorMain)
+        self._updateVisited(self._cursorMain + 1)
+        return self._visitedCounts
+
+    def simulate(self):
+        '''Simulates the steps with model_physics and returns a model_physics.Result.
+        Only the steps after the first changed step are simulated again.'''
+        board = self.model.board
+        if self._simulator == None or not self._simulator.isFor(board, self._start):
+            self._simulator = physics.Simulator(board, self._start)
+        return self._simulator.simulate(self._steps)
 
     def iterViewCoordinates(self):
         '''Coordinates are flipped after pipe jump, fitting to how it is drawn on the board.
         Includes intermediate results of uncounted jumps.
         Yields COR_END instead of coordinate on a door.'''
-        cor = self._start
-        isFlipped = False
-        
-        yield cor
-        for i, step in enumerate(self._steps):
-            if isinstance(step, PipeJump):
-                isFlipped = not isFlipped
-            cor = step.jump(*cor)
-            if self.model.isEndField(cor, isFlipped):
-                yield self.COR_END
-            else:
-                yield cor
+        yield self._start
+        for i in range(1, len(self._steps) + 1):
+            yield self.getViewCoordinate(i)
 
     def iterIsFlipped(self):
         '''corresponds to iterCoordinates (_calculateCoordinates):
         corresponds to step number.
         Omits start coordinate.'''
-        isFlipped = False
-        for step in self._steps:
-            if isinstance(step, PipeJump):
-                isFlipped = not isFlipped
-            elif not step.isUncountedJump():
-                yield isFlipped
+        steps = self._steps
+        self._updateCache(len(steps))
+        flipped = self._cacheIsFlipped
+        for i in range(len(steps)):
+            if not steps[i].isUncountedJump():
+                yield flipped[i+1]
 
 
     # ---------- sanity check ----------
 
+    @classmethod
+    def getStepKind(cls, step):
+        '''returns step if it is a normal step, otherwise the class of the jump'''
+        if cls.isNormalStep(step):
+            return step
+        return type(step)
+
     @staticmethod
     def isNormalStep(step):
         if step in (Solution.STEP_UP, Solution.STEP_DOWN, Solution.STEP_LEFT, Solution.STEP_RIGHT):
@@ -784,6 +1044,44 @@ class Solution(object):
 
 
 
+class Change(str):
+
+    '''
+    The argument passed to the listeners of Model.
+
+    It is equal to one of the Model.CHANGE_* constants so that listeners can
+    compare it with them. If several changes have been made in one
+    transaction (see Model.transaction) they are coalesced into one:
+    kinds contains all of them and the value is the most general of them.
+
+    fields is the set of fields (x,y) whose values have changed if the value
+    is CHANGE_BOARD, otherwise None (= unknown, any field may have changed).
+    '''
+
+    def __new__(cls, kinds, fields=None):
+        kinds = frozenset(kinds)
+        self = str.__new__(cls, cls.coalesce(kinds))
+        self.kinds = kinds
+        self.fields = fields
+        return self
+
+    @staticmethod
+    def coalesce(kinds):
+        '''returns the one change a listener needs to handle for all changes in kinds'''
+        # a change of the board is drawn together with the cursor and implies that the level has changed
+        significant = set(kinds) - {Model.CHANGE_CURSOR, Model.CHANGE_HAS_CHANGED}
+        if len(significant) == 0:
+            if Model.CHANGE_HAS_CHANGED in kinds:
+                return Model.CHANGE_HAS_CHANGED
+            return Model.CHANGE_CURSOR
+        if len(significant) == 1:
+            return next(iter(significant))
+        if significant <= Model.CHANGES_BG:
+            return Model.CHANGE_BG
+        return Model.CHANGE_ALL
+
+
+
 class Model(object):
 
     """
@@ -791,6 +1089,7 @@ class Model(object):
     """
 
     EXT_TASK = '.afg'
+    EXT_PACK = '.afp'
     ENCODING = objects.ENCODING
 
     HEADER = u'35+\xa1\xb3/r\xe7!\xe6\xa7'
@@ -815,6 +1114,13 @@ class Model(object):
     CHANGE_AUTHOR       = "author"
     CHANGE_HAS_CHANGED  = "has-changed"
     CHANGE_ALL          = "*"
+
+    CHANGES_BG = frozenset((CHANGE_BG_TOUCHED, CHANGE_BG_UNTOUCHED, CHANGE_BG_BORDER, CHANGE_BG))
+
+    # see Solution
+    USE_DELTA_HISTORY = True
+    HISTORY_MAX_MEMORY = 256 * 1024
+    HISTORY_MAX_SIZE = 30
     
 
     # ---------- initialization ----------
@@ -822,7 +1128,7 @@ class Model(object):
     def __init__(self):
         self.onChangeListeners = set()
         self._logger = Logger()
-        self.history = model_history.History(self, self._ATTRIBUTES_TO_BACKUP, 30, self._onUndoOrRedo)
+        self.history = createHistory(self, self._onUndoOrRedo)
         self.clipboard = None
         self.solution = Solution()
         self.solution.addOnStepsChangeListener( self.onSolutionChange )
@@ -846,20 +1152,28 @@ class Model(object):
             self._saveSelection()
 
         self._notificationsDisabled = False
+        # (change, performBackup) of the changes in the running transaction
+        self._transaction = None
 
         self._hasChanged = False
         self._hasChangedSinceSolutionEdit = False
+        self._forbiddenFields = None
+        self._changedFields = None
         self.onChange(self.CHANGE_ALL, updateChangedFlag=False)
 
     def _createEmptyBoard(self):
-        return list(list(self.FLD_EMPTY for i in range(self.ROWS)) for i in range(self.COLS))
+        return model_board.Board(fill=self.FLD_EMPTY)
+
+    def createSnapshot(self):
+        '''returns a ModelSnapshot of the current state, see there'''
+        return ModelSnapshot(self)
 
     
     # ---------- history ----------
 
     _ATTRIBUTES_TO_BACKUP = (
         # name, function to make copy
-        ('board',       lambda l: list(list(i) for i in l)),
+        ('board',       model_board.Board.copy),
         ('author',      None),
         ('bgMargin',    None),
         ('bgUntouched', None),
@@ -899,6 +1213,30 @@ class Model(object):
     def notificationsAreDisabled(self):
         return self._notificationsDisabled
 
+    @contextlib.contextmanager
+    def transaction(self):
+        '''
+        with model.transaction():
+            ...
+
+        The listeners are notified once after the with block of all changes
+        made inside of it (see Change) and one backup is made for undo.
+        Transactions can be nested, the outermost transaction notifies.
+        '''
+        if self._transaction != None:
+            yield
+            return
+
+        self._transaction = list()
+        try:
+            yield
+        finally:
+            changes = self._transaction
+            self._transaction = None
+            if changes:
+                performBackup = any(backup for change, backup in changes)
+                self._notify([change for change, backup in changes], performBackup)
+
     def addOnChangeListener(self, func):
         self.onChangeListeners.add(func)
 
@@ -906,6 +1244,9 @@ class Model(object):
         self.onChange(self.CHANGE_CURSOR)
 
     def onChange(self, change, performBackup=True, updateChangedFlag=True, clearTmpBoard=True):
+        # the board may change while notifications are disabled, too
+        if change in (self.CHANGE_BOARD, self.CHANGE_ALL):
+            self._forbiddenFields = None
         if self._notificationsDisabled:
             return
         if updateChangedFlag and change not in (self.CHANGE_CURSOR, self.CHANGE_HAS_CHANGED):
@@ -914,11 +1255,31 @@ class Model(object):
                 self._clearTmpBoard()
             if change in (self.CHANGE_BOARD, self.CHANGE_ALL):
                 self._hasChangedSinceSolutionEdit = True
+        if self._transaction != None:
+            self._transaction.append((change, performBackup))
+            return
+        self._notify([change], performBackup)
+
+    def _notify(self, kinds, performBackup):
+        change = Change(kinds)
+        if change == self.CHANGE_BOARD:
+            change.fields = self.board.popChangedFields()
+        elif change == self.CHANGE_ALL:
+            self.board.popChangedFields()
+        self._changedFields = change.fields
         for listener in self.onChangeListeners:
             listener(change)
+        self._changedFields = None
         if performBackup:
             self.makeBackup(change)
 
+    def getChangedFields(self):
+        '''returns the set of fields (x,y) whose values have changed.
+        this is available to listeners while they are notified of CHANGE_BOARD.
+        returns None if unknown, in that case any field may have changed.
+        (the same as change.fields, see Change)'''
+        return self._changedFields
+
     def onSolutionChange(self):
         if self._notificationsDisabled:
             return
@@ -930,19 +1291,31 @@ class Model(object):
     # ---------- setters & getters ----------
     
     def getField(self, x, y):
-        return self.board[x][y]
+        return self.board.get(x, y)
         
     def setField(self, x, y, value):
-        self.board[x][y] = value
+        self.board.set(x, y, value)
         self.onChange(self.CHANGE_BOARD)
 
     def setFieldAtCursor(self, value):
         for x,y in self.cursors:
-            self.board[x][y] = value
+            self.board.set(x, y, value)
+        self.onChange(self.CHANGE_BOARD)
+
+    def getBitboard(self):
+        '''returns the fields as model_bitboard.Bitboard, the cat is on the start field'''
+        start = self.getStartField()
+        if start[0] == None:
+            start = None
+        return model_bitboard.Bitboard.fromBoard(self.board, start)
+
+    def setBitboard(self, bitboard):
+        '''replaces all fields by the fields of bitboard'''
+        self.board[:] = bitboard.toBoard().toBytes()
         self.onChange(self.CHANGE_BOARD)
 
     def count(self, value):
-        return sum(l.count(value) for l in self.board)
+        return self.board.count(value)
 
     def isBelow(self, cor, value, isFlipped = False):
         # untested
@@ -982,17 +1355,10 @@ class Model(object):
         return self.getField(*cor) == self.FLD_END
 
     def find(self, value):
-        for x in range(self.COLS):
-            for y in range(self.ROWS):
-                if self.getField(x, y) == value:
-                    return x, y
-        return None, None
+        return self.board.find(value)
 
     def findAll(self, value):
-        for x in range(self.COLS):
-            for y in range(self.ROWS):
-                if self.getField(x, y) == value:
-                    yield x, y
+        return self.board.findAll(value)
 
     def getStartField(self):
         return self.find(self.FLD_START)
@@ -1046,15 +1412,19 @@ class Model(object):
 
 
     def has(self, obj):
-        return self.find(obj)[0] != None
+        return self.board.has(obj)
 
     def hasOneOf(self, *objs):
-        for obj in objs:
-            if self.has(obj):
-                return True
-        return False
+        return self.board.countOneOf(objs) > 0
 
     def getForbiddenFields(self):
+        '''returns a frozenset of the coordinates which can never be entered.
+        the result is cached until the board changes.'''
+        if self._forbiddenFields is None:
+            self._forbiddenFields = frozenset(self._calculateForbiddenFields())
+        return self._forbiddenFields
+
+    def _calculateForbiddenFields(self):
         # explosives can destroy any obstacle
         if (self.has(85) and self.has(86)) or self.has(106) or self.has(107) or self.has(108):
             return list()
@@ -1150,7 +1520,7 @@ class Model(object):
             x,y = self.cursors[i]
             val = self.clipboard[i]
             if pasteEmpty or val != self.FLD_EMPTY:
-                self.board[x][y] = val
+                self.board.set(x, y, val)
         self.onChange(self.CHANGE_BOARD)
 
     def cut(self):
@@ -1175,21 +1545,16 @@ class Model(object):
         self._swapField(self.getFieldBelowOf, self.getCursorsForSwapDown())
     
     def _swapField(self, getNextField, cursors):
-        notifications = self.disableNotifications()
-
-        cursors = tuple(cursors)
-        self.moveCursor(getNextField)
-
-        for c in cursors:
-            n = getNextField(c)
-            toBeMoved = self.getField(*c)
-            tmp = self.getField(*n)
-            self.setField(*c, value=tmp)
-            self.setField(*n, value=toBeMoved)
+        with self.transaction():
+            cursors = tuple(cursors)
+            self.moveCursor(getNextField)
 
-        if notifications:
-            self.enableNotifications()
-            self.onChange(self.CHANGE_BOARD)
+            for c in cursors:
+                n = getNextField(c)
+                toBeMoved = self.getField(*c)
+                tmp = self.getField(*n)
+                self.setField(*c, value=tmp)
+                self.setField(*n, value=toBeMoved)
 
 
     def getCursorsForSwapLeft(self):
@@ -1253,40 +1618,24 @@ class Model(object):
     # swap fields to border (End + Alt + Arrow)
 
     def swapFieldToLeft(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToLeft()):
-            self.swapFieldLeft()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD)
+        with self.transaction():
+            for x in range(self.getCursorDistanceToLeft()):
+                self.swapFieldLeft()
 
     def swapFieldToRight(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToRight()):
-            self.swapFieldRight()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD)
+        with self.transaction():
+            for x in range(self.getCursorDistanceToRight()):
+                self.swapFieldRight()
 
     def swapFieldToTop(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToTop()):
-            self.swapFieldUp()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD)
+        with self.transaction():
+            for x in range(self.getCursorDistanceToTop()):
+                self.swapFieldUp()
 
     def swapFieldToBottom(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToBottom()):
-            self.swapFieldDown()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD)
+        with self.transaction():
+            for x in range(self.getCursorDistanceToBottom()):
+                self.swapFieldDown()
         
         
 
@@ -1306,32 +1655,36 @@ class Model(object):
     
 
     def _moveField(self, getNextField):
+        '''moves the selected values to getNextField(cursor).
+        the values which are covered by the selection are remembered in _tmpBoard
+        and restored when the selection is moved away from them.
+        only the fields of the old and the new selection are touched.'''
         if not self.hasCursor():
             return
 
         if self._hasSelectionChanged():
             self._clearTmpBoard()
 
-        selectedValues = list()
-        for c in self.cursors:
-            selectedValues.append(self.getField(*c))
-
-        for x in range(0, self.COLS):
-            for y in range(0, self.ROWS):
-                if (x,y) not in self.cursors:
-                    self._tmpBoard[x][y] = self.board[x][y]
+        oldCursors = self.cursors
+        selectedValues = [self.getField(*c) for c in oldCursors]
 
         newCursors = CursorList()
-        for c,v in zip(self.cursors, selectedValues):
-            x,y = getNextField(c)
-            self.board[x][y] = v
-            newCursors.append((x,y))
-        self.cursors = newCursors
+        for c in oldCursors:
+            newCursors.append(getNextField(c))
 
-        for x in range(0, self.COLS):
-            for y in range(0, self.ROWS):
-                if (x,y) not in self.cursors:
-                    self.board[x][y] = self._tmpBoard[x][y]
+        # remember the values which are going to be covered
+        for x,y in newCursors:
+            if (x,y) not in oldCursors:
+                self._tmpBoard.set(x, y, self.board.get(x, y))
+
+        # restore the values which are uncovered
+        for x,y in oldCursors:
+            if (x,y) not in newCursors:
+                self.board.set(x, y, self._tmpBoard.get(x, y))
+
+        for (x,y),v in zip(newCursors, selectedValues):
+            self.board.set(x, y, v)
+        self.cursors = newCursors
 
         self._saveSelection()
 
@@ -1352,40 +1705,23 @@ class Model(object):
     # move fields to border (End + Shift + Alt + Arrow)
     
     def moveFieldToLeft(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToLeft()):
-            self.moveFieldLeft()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD, clearTmpBoard=False)
+        self._moveFieldBy(-self.getCursorDistanceToLeft(), 0)
 
     def moveFieldToRight(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToRight()):
-            self.moveFieldRight()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD, clearTmpBoard=False)
+        self._moveFieldBy(self.getCursorDistanceToRight(), 0)
 
     def moveFieldToTop(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToTop()):
-            self.moveFieldUp()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD, clearTmpBoard=False)
+        self._moveFieldBy(0, -self.getCursorDistanceToTop())
 
     def moveFieldToBottom(self):
-        self.disableNotifications()
-        
-        for x in range(self.getCursorDistanceToBottom()):
-            self.moveFieldDown()
-        
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BOARD, clearTmpBoard=False)
+        self._moveFieldBy(0, self.getCursorDistanceToBottom())
+
+    def _moveFieldBy(self, dx, dy):
+        '''has the same effect like moving the fields abs(dx) or abs(dy) times by one field.
+        the selection must not cross the border of the board.'''
+        if dx == 0 and dy == 0:
+            return
+        self._moveField(lambda c: (c[0] + dx, c[1] + dy))
 
 
     # ---------- background ----------
@@ -1401,43 +1737,31 @@ class Model(object):
     prevBgTouched   = lambda self:  self.setBgTouched(   self.__nextElement(backgrounds.CATEGORY_TOUCHED,   self.getBgTouched(),   -1) )
     
     def nextBg(self):
-        self.disableNotifications()
-
-        self.nextBgBorder()
-        self.nextBgUntouched()
-        self.nextBgTouched()
-
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BG)
+        with self.transaction():
+            self.nextBgBorder()
+            self.nextBgUntouched()
+            self.nextBgTouched()
     
     def prevBg(self):
-        self.disableNotifications()
-
-        self.prevBgBorder()
-        self.prevBgUntouched()
-        self.prevBgTouched()
-
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BG)
+        with self.transaction():
+            self.prevBgBorder()
+            self.prevBgUntouched()
+            self.prevBgTouched()
 
     
     def setBgScheme(self, scheme):
-        self.disableNotifications()
-
-        out = False
-        value = backgrounds.pattern_fn.format(fld=1, scheme=scheme)
-        if value in backgrounds.CATEGORY_BORDER:
-            self.setBgBorder(value)
-            value = backgrounds.pattern_fn.format(fld=2, scheme=scheme)
-            if value in backgrounds.CATEGORY_UNTOUCHED:
-                self.setBgUntouched(value)
-                value = backgrounds.pattern_fn.format(fld=3, scheme=scheme)
-                if value in backgrounds.CATEGORY_TOUCHED:
-                    self.setBgTouched(value)
-                    out = True
-
-        self.enableNotifications()
-        self.onChange(self.CHANGE_BG)
+        with self.transaction():
+            out = False
+            value = backgrounds.pattern_fn.format(fld=1, scheme=scheme)
+            if value in backgrounds.CATEGORY_BORDER:
+                self.setBgBorder(value)
+                value = backgrounds.pattern_fn.format(fld=2, scheme=scheme)
+                if value in backgrounds.CATEGORY_UNTOUCHED:
+                    self.setBgUntouched(value)
+                    value = backgrounds.pattern_fn.format(fld=3, scheme=scheme)
+                    if value in backgrounds.CATEGORY_TOUCHED:
+                        self.setBgTouched(value)
+                        out = True
         return out
 
 
@@ -2079,9 +2403,16 @@ class Model(object):
 
     RO_STEP = re.compile(RE_STEP)
 
-    JUMP_TYPES = tuple(cls.__name__ for cls in (NormalStep, HeliumJump, PipeJump, AmbiguousJumpStep, IllegalJumpStep))
+    # the index in this tuple is the kind of a step in a level pack, do not change the order
+    JUMP_CLASSES = (NormalStep, HeliumJump, PipeJump, AmbiguousJumpStep, IllegalJumpStep)
+    JUMP_TYPES = tuple(cls.__name__ for cls in JUMP_CLASSES)
+    JUMP_CONSTRUCTORS = dict(zip(JUMP_TYPES, JUMP_CLASSES))
+
+    def readFile(self, ffn, log, index=0):
+        '''reads a level file. if ffn is a level pack (EXT_PACK) the level with the given index is read.'''
+        if os.path.splitext(ffn)[1] == self.EXT_PACK:
+            return self.readPackFile(ffn, index, log)
 
-    def readFile(self, ffn, log):
         _logger = Logger() # I am not using self._logger because that is used by the sanity check which I am calling
         _logger.init(log)
         log = _logger.log
@@ -2102,12 +2433,13 @@ class Model(object):
                     cols = len(line)
                     if cols != self.COLS:
                         log(logging.ERROR, _("invalid number of columns in row {row}: {got} (should be {expected}) in line \"{line}\"").format(row=row, got=cols, expected=self.COLS, line=line))
-                    for col in range(min(self.COLS, cols)):
-                        value = ord(line[col])
-                        if imageOpener.getImage.isValid(value):
-                            self.setField(x=col, y=row, value=value)
+                    values = bytearray(self.board.getRow(row))
+                    for col, value in enumerate(model_board.Board.rowFromString(line[:self.COLS])):
+                        if value in objects.VALID_CODES:
+                            values[col] = value
                         else:
                             log(logging.ERROR, _("invalid object at field (row={row}, col={col}): {objChar} ({objCode})").format(row=row, col=col, objCode=value, objChar=line[col]))
+                    self.board.setRow(row, values)
 
                 # line 12: author
                 self.setAuthor(readln())
@@ -2147,24 +2479,30 @@ class Model(object):
                 maxUsedLogLevel = _logger.getMaxUsedLogLevel()
                 _logger.resetMaxUsedLogLevel()
                 solutionSteps = list()
+                # steps are not changed after creation, equal lines can share one object
+                parsedSteps = dict()
+                matchStep = self.RO_STEP.match
                 while True:
                     line = readln()
                     if line == "" or line == self.SENTINEL_NOTES:
                         break
-                    m = self.RO_STEP.match(line)
-                    if m == None:
-                        log(logging.ERROR, _("failed to parse step: {line!r}. I am stopping here.").format(line=line))
-                        break
-                    className = m.group('class')
-                    if className not in self.JUMP_TYPES:
-                        log(logging.ERROR, _("unknown step type {cls!r} in line: {line!r}. I am stopping here.").format(line=line, cls=className))
-                        break
-                    code = m.group('instantiation')
-                    try:
-                        step = eval(code)
-                    except Exception as e:
-                        log(logging.ERROR, _("error occured while trying to parse {code!r}: {error}. I am stopping here.").format(code=code, error=e))
-                        break
+                    step = parsedSteps.get(line)
+                    if step == None:
+                        m = matchStep(line)
+                        if m == None:
+                            log(logging.ERROR, _("failed to parse step: {line!r}. I am stopping here.").format(line=line))
+                            break
+                        className = m.group('class')
+                        if className not in self.JUMP_CONSTRUCTORS:
+                            log(logging.ERROR, _("unknown step type {cls!r} in line: {line!r}. I am stopping here.").format(line=line, cls=className))
+                            break
+                        try:
+                            step = self._createStepFromMatch(m)
+                        except Exception as e:
+                            code = m.group('instantiation')
+                            log(logging.ERROR, _("error occured while trying to parse {code!r}: {error}. I am stopping here.").format(code=code, error=e))
+                            break
+                        parsedSteps[line] = step
                     solutionSteps.append(step)
 
                 if _logger.getMaxUsedLogLevel() == LOGLEVEL_NONE and len(solutionSteps) > 0:
@@ -2175,7 +2513,7 @@ class Model(object):
                     except AssertionError:
                         log(logging.WARNING, _("read file has solution steps but no start field"))
                         self.solution._coordinates = cors
-                    if cors != self.solution._coordinates:
+                    if cors != self.solution.iterCoordinates():
                         log(logging.WARNING, _("solution coordinates and solution steps do not match. I am deciding for the steps."))
                     cors = None
 
@@ -2208,6 +2546,105 @@ class Model(object):
         return _logger.end()
 
 
+    @classmethod
+    def _createStepFromMatch(cls, m):
+        '''creates a step from a match of RO_STEP without evaluating the line.
+        the arguments are passed like they are written in the line.'''
+        args = [int(arg) for arg in m.group('dx', 'dy') if arg != None]
+        return cls.JUMP_CONSTRUCTORS[m.group('class')](*args)
+
+    def readPackFile(self, ffn, index, log):
+        '''reads the level with the given index from a level pack (see model_level_pack).
+        the other levels in the pack are not parsed.'''
+        _logger = Logger()
+        _logger.init(log)
+        log = _logger.log
+
+        try:
+            with model_level_pack.LevelPack(ffn) as pack:
+                level = pack.getLevel(index)
+        except (EnvironmentError, IndexError, model_level_pack.LevelPackError) as e:
+            log(logging.ERROR, _("failed to read file: {error}").format(error=e))
+            return _logger.end()
+
+        # a level pack can not be saved as a level file, a new file name must be chosen
+        self.ffn = None
+        self.readPackedLevel(level, log)
+        return _logger.end()
+
+    def readPackedLevel(self, level, log):
+        '''sets everything like readFile from a model_level_pack.Level'''
+        _logger = Logger()
+        _logger.init(log)
+        log = _logger.log
+
+        self.disableNotifications()
+        try:
+            self.board[:] = level.board
+            self.setAuthor(level.author)
+            self.bgMargin    = level.bgMargin
+            self.bgUntouched = level.bgUntouched
+            self.bgTouched   = level.bgTouched
+            self.sanityCheckBackgrounds(log)
+
+            self.solution.clear()
+            for cor in level.coordinates:
+                self.solution.appendCoordinate(tuple(cor))
+            if level.steps != None:
+                self.solution._steps = [self._createStep(*step) for step in level.steps]
+                try:
+                    self.solution.init(self)
+                except AssertionError:
+                    log(logging.WARNING, _("read file has solution steps but no start field"))
+                    self.solution.clear()
+                    for cor in level.coordinates:
+                        self.solution.appendCoordinate(tuple(cor))
+
+            self.setNotes(level.notes)
+
+        except Exception as e:
+            log(logging.ERROR, _("unforeseen exception while trying to read file: {error}. This ends my attempt to read this file.").format(error=e))
+
+        self.history.clear()
+        self._hasChanged = _logger.getMaxUsedLogLevel() != LOGLEVEL_NONE
+        self.enableNotifications()
+        self.onChange(self.CHANGE_ALL, updateChangedFlag=False)
+        return _logger.end()
+
+    def toPackedLevel(self, name=None):
+        '''returns everything which writeCopy would write as model_level_pack.Level.
+        name defaults to the name of the file.'''
+        if name == None:
+            name = os.path.split(self.ffn)[1] if self.ffn != None else u""
+        if self.solution.isInitialized():
+            steps = [self._packStep(step) for step in self.solution.iterSteps()]
+        else:
+            steps = None
+        return model_level_pack.Level(name, self.board.toBytes(), self.getAuthor(),
+            self.bgMargin, self.bgUntouched, self.bgTouched,
+            notes = self.notes,
+            coordinates = list(self.solution.iterCoordinates()),
+            steps = steps,
+        )
+
+    @classmethod
+    def _packStep(cls, step):
+        '''returns (kind, dx, dy), see model_level_pack'''
+        kind = cls.JUMP_CLASSES.index(type(step))
+        if isinstance(step, PipeJump):
+            return kind, 0, 0
+        return kind, step.getDistanceX(), step.getDistanceY()
+
+    @classmethod
+    def _createStep(cls, kind, dx, dy):
+        '''inverse of _packStep'''
+        stepClass = cls.JUMP_CLASSES[kind]
+        if stepClass == PipeJump:
+            return PipeJump()
+        if stepClass == HeliumJump:
+            return HeliumJump(dy)
+        return stepClass(dx, dy)
+
     def writeCopy(self, ffn):
         path = os.path.split(ffn)[0]
         if not os.path.isdir(path):
@@ -2257,12 +2694,7 @@ class Model(object):
             self.onChange(self.CHANGE_HAS_CHANGED)
 
     def boardToString(self):
-        out = u""
-        for row in range(self.ROWS):
-            for col in range(self.COLS):
-                out += objects.codeToChr(self.getField(x=col, y=row))
-            out += "\n"
-        return out.rstrip('\n')
+        return self.board.toString()
 
     __str__ = boardToString
 
@@ -2295,7 +2727,7 @@ class Model(object):
         for attr in ('margin', 'untouched', 'touched'):
             attr = "bg" + attr.capitalize()
             v = getattr(self, attr)
-            if not imageOpener.getBackground.isValid(v):
+            if not backgrounds.isValid(v):
                 log(logging.ERROR, _("invalid value for {attr}: '{value}'").format(attr=attr, value=v))
 
         if self.bgTouched == self.bgUntouched:
@@ -2363,21 +2795,63 @@ class Model(object):
         return False
 
     def getNumberObjectsToEat(self):
-        n = 0
-        for t in self.board:
-            for o in t:
-                if o in objects.CATEGORY_TO_EAT:
-                    n += 1
-        return n
+        return self.board.countOneOf(objects.CATEGORY_TO_EAT)
 
     def getNumberObjectsToMove(self):
         #TODO: check counter part
-        n = 0
-        for t in self.board:
-            for o in t:
-                if o in objects.CATEGORY_TO_MOVE:
-                    n += 1
-        return n
+        return self.board.countOneOf(objects.CATEGORY_TO_MOVE)
+
+
+class ModelSnapshot(object):
+
+    '''
+    A copy of everything the sanity checks of a Model look at.
+    It is taken in the main thread (which is cheap, the steps are not
+    copied because they are never changed) and toModel creates an
+    independent Model from it which can be checked in another thread.
+    '''
+
+    def __init__(self, model):
+        self.board = model.board.toBytes()
+        self.author = model.getAuthor()
+        self.bgMargin    = model.bgMargin
+        self.bgUntouched = model.bgUntouched
+        self.bgTouched   = model.bgTouched
+        self.hasChangedSinceSolutionEdit = model._hasChangedSinceSolutionEdit
+
+        solution = model.getSolution()
+        self.isSolutionDirty = solution.isDirty
+        self.coordinates = list(solution.iterCoordinates())
+        if solution.isInitialized():
+            self.steps = list(solution.iterSteps())
+        else:
+            self.steps = None
+
+    def toModel(self):
+        m = Model()
+        m.disableNotifications()
+        m.board = model_board.Board(self.board)
+        m.author = self.author
+        m.bgMargin    = self.bgMargin
+        m.bgUntouched = self.bgUntouched
+        m.bgTouched   = self.bgTouched
+
+        solution = m.getSolution()
+        if self.steps != None:
+            solution._steps = list(self.steps)
+            try:
+                solution.init(m)
+            except AssertionError:
+                # the start field has been removed after editing the solution
+                solution.clear()
+        if not solution.isInitialized():
+            for cor in self.coordinates:
+                solution.appendCoordinate(cor)
+        # init resets these
+        m._hasChangedSinceSolutionEdit = self.hasChangedSinceSolutionEdit
+        solution.isDirty = self.isSolutionDirty
+        m.enableNotifications()
+        return m
 
 
 if __name__=='__main__':
@@ -6,15 +6,19 @@ import logging
 import locales
 _ = locales._
 
-from gui_image_opener import toAbsPath, getBackground
+# this module is used by the model, it must not import anything from tk
+from model_object_catalog import toAbsPath
+from model_catalog_cache import cache
 
 PATH_BACKGROUNDS = toAbsPath('backgrounds/gif')
-pattern_fn = 'irka3_{fld}{scheme}.fld'
+EXT_BACKGROUND = '.fld'
+pattern_fn = 'irka3_{fld}{scheme}' + EXT_BACKGROUND
 
 TITLE_BORDER  = _("BG Border")
 TITLE_TOUCHED = _("BG Touched")
 TITLE_UNTOUCHED = _("BG Untouched")
 
+CATEGORY_ALL = list()
 CATEGORY_BORDER  = list()
 CATEGORY_TOUCHED = list()
 CATEGORY_UNTOUCHED = list()
@@ -23,24 +27,39 @@ def getBackgrounds():
     l = os.listdir(PATH_BACKGROUNDS)
     for fn in l:
         if fn[0] == '.':
-            logging.debug(_("ignoring hidden file {fn} in {path}").format(fn=fn, path=PATH_IMAGES))
+            logging.debug(_("ignoring hidden file {fn} in {path}").format(fn=fn, path=PATH_BACKGROUNDS))
             continue
-        fn = os.path.splitext(fn)[0] + ".fld"
+        fn = os.path.splitext(fn)[0] + EXT_BACKGROUND
         yield fn
 
-CATEGORY_ALL = list(getBackgrounds())
-CATEGORY_ALL.sort()
-
-for bg in CATEGORY_ALL:
-    short = getBackground.getShortName(bg)
-    if   "1" in short:
-        CATEGORY_BORDER.append(bg)
-    elif "2" in short:
-        CATEGORY_UNTOUCHED.append(bg)
-    elif "3" in short:
-        CATEGORY_TOUCHED.append(bg)
-    else:
-        logging.error("background with invalid name can not be categorized: %r" % (bg,))
+def getShortName(name):
+    return os.path.splitext(name[6:] if name[:6]=="irka3_" else name)[0]
+
+def isValid(name):
+    '''True if there is an image for the background name (with or without extension)'''
+    return os.path.splitext(name)[0] + EXT_BACKGROUND in VALID_NAMES
+
+def categorize(backgrounds):
+    '''returns a dict with the sorted lists for CATEGORY_ALL, CATEGORY_BORDER, CATEGORY_UNTOUCHED and CATEGORY_TOUCHED'''
+    result = dict(all=sorted(backgrounds), border=[], untouched=[], touched=[])
+    for bg in result['all']:
+        short = getShortName(bg)
+        if   "1" in short:
+            result['border'].append(bg)
+        elif "2" in short:
+            result['untouched'].append(bg)
+        elif "3" in short:
+            result['touched'].append(bg)
+        else:
+            logging.error("background with invalid name can not be categorized: %r" % (bg,))
+    return result
+
+_categories = cache.get('backgrounds', PATH_BACKGROUNDS, lambda: categorize(getBackgrounds()))
+CATEGORY_ALL.extend(_categories['all'])
+CATEGORY_BORDER.extend(_categories['border'])
+CATEGORY_UNTOUCHED.extend(_categories['untouched'])
+CATEGORY_TOUCHED.extend(_categories['touched'])
+VALID_NAMES = frozenset(CATEGORY_ALL)
 
 categories = (
    #(_("Background"), CATEGORY_ALL),
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+
+'''
+The fields of a level as bit masks.
+
+Every mask is an int with one bit per field, bit y*COLS + x stands for
+field (x, y) (the same order as in model_board.Board). There is one mask
+per object code and one mask per attribute class of model_object_catalog
+(obeying gravity, movable, eatable, fixed, killing) so that questions like
+"which objects can fall" or "is there fire below the cat" are answered
+with a few bit operations for all fields at once instead of walking
+through the fields one by one.
+
+"down" is the direction of increasing y. If the board is flipped
+(after a pipe jump) gravity points in the opposite direction,
+see the parameter isFlipped.
+'''
+
+# other libraries
+import model_board
+import model_object_catalog as objects
+
+
+COLS = model_board.Board.COLS
+ROWS = model_board.Board.ROWS
+SIZE = model_board.Board.SIZE
+
+FULL = (1 << SIZE) - 1
+
+def _createColumnMask(x):
+    mask = 0
+    for y in range(ROWS):
+        mask |= 1 << (y*COLS + x)
+    return mask
+
+COLUMNS = tuple(_createColumnMask(x) for x in range(COLS))
+FIRST_COLUMN = COLUMNS[0]
+LAST_COLUMN = COLUMNS[-1]
+
+EMPTY = objects.OBJ_NONE
+
+ATTRIBUTES = (
+    ('falls',   frozenset(objects.GRAVITY_OBEYING)),
+    ('movable', frozenset(objects.ATTR_MOVABLE)),
+    ('eatable', frozenset(objects.ATTR_EATABLE)),
+    ('fixed',   frozenset(objects.ATTR_FIXED)),
+    ('killing', frozenset(objects.ATTR_KILLING)),
+)
+
+
+# ---------- shifting ----------
+
+def bit(x, y):
+    return 1 << (y*COLS + x)
+
+def shiftDown(mask):
+    '''moves every field one row down, the last row is dropped'''
+    return (mask << COLS) & FULL
+
+def shiftUp(mask):
+    '''moves every field one row up, the first row is dropped'''
+    return mask >> COLS
+
+def shiftRight(mask):
+    '''moves every field one column to the right, the last column is dropped'''
+    return (mask & ~LAST_COLUMN) << 1
+
+def shiftLeft(mask):
+    '''moves every field one column to the left, the first column is dropped'''
+    return (mask & ~FIRST_COLUMN) >> 1
+
+def shiftGravity(mask, isFlipped):
+    '''moves every field one field in the direction of gravity'''
+    if isFlipped:
+        return shiftUp(mask)
+    return shiftDown(mask)
+
+def shiftAntiGravity(mask, isFlipped):
+    '''moves every field one field against the direction of gravity'''
+    if isFlipped:
+        return shiftDown(mask)
+    return shiftUp(mask)
+
+def iterFields(mask):
+    '''yields (x, y) for every bit which is set, row by row'''
+    i = 0
+    while mask:
+        if mask & 1:
+            yield i % COLS, i // COLS
+        mask >>= 1
+        i += 1
+
+def count(mask):
+    return bin(mask).count('1')
+
+
+class Bitboard(object):
+
+    __slots__ = ('codes', 'empty', 'cat') + tuple(name for name, codes in ATTRIBUTES)
+
+    # ---------- initialization ----------
+
+    def __init__(self, codes, cat=0):
+        '''codes: dict mapping object codes to masks, every field must be contained in exactly one mask
+        cat: mask of the field where the cat is or 0'''
+        self.codes = codes
+        self.cat = cat
+        self.updateAttributes()
+
+    @classmethod
+    def fromBoard(cls, board, cat=None):
+        '''board: model_board.Board, cat: (x, y) or None'''
+        codes = dict()
+        data = board.toBytes()
+        for code in set(bytearray(data)):
+            codes[code] = 0
+        for i, code in enumerate(bytearray(data)):
+            codes[code] |= 1 << i
+        if cat == None:
+            catMask = 0
+        else:
+            catMask = bit(*cat)
+        return cls(codes, catMask)
+
+    def toBoard(self):
+        data = bytearray(SIZE)
+        for code, mask in self.codes.items():
+            for x, y in iterFields(mask):
+                data[y*COLS + x] = code
+        return model_board.Board(data)
+
+    def copy(self):
+        bitboard = Bitboard.__new__(Bitboard)
+        bitboard.codes = dict(self.codes)
+        bitboard.cat = self.cat
+        for name, codes in ATTRIBUTES:
+            setattr(bitboard, name, getattr(self, name))
+        bitboard.empty = self.empty
+        return bitboard
+
+    def updateAttributes(self):
+        '''recalculates the attribute masks from the code masks'''
+        for name, codes in ATTRIBUTES:
+            mask = 0
+            for code, codeMask in self.codes.items():
+                if code in codes:
+                    mask |= codeMask
+            setattr(self, name, mask)
+        self.empty = self.codes.get(EMPTY, 0)
+
+
+    # ---------- getters & setters ----------
+
+    def get(self, x, y):
+        b = bit(x, y)
+        for code, mask in self.codes.items():
+            if mask & b:
+                return code
+        return None
+
+    def set(self, x, y, value):
+        b = bit(x, y)
+        old = self.get(x, y)
+        if old == value:
+            return
+        self._move(old, b, 0)
+        self.codes[value] = self.codes.get(value, 0) | b
+        self._updateAttributesOfField(old, value, b)
+
+    def find(self, value):
+        '''returns the mask of all fields containing value'''
+        return self.codes.get(value, 0)
+
+    def _move(self, code, fromMask, toMask):
+        mask = (self.codes[code] & ~fromMask) | toMask
+        if mask:
+            self.codes[code] = mask
+        else:
+            del self.codes[code]
+
+    def _updateAttributesOfField(self, old, new, b):
+        for name, codes in ATTRIBUTES:
+            if old in codes:
+                setattr(self, name, getattr(self, name) & ~b)
+            if new in codes:
+                setattr(self, name, getattr(self, name) | b)
+        if old == EMPTY:
+            self.empty &= ~b
+        if new == EMPTY:
+            self.empty |= b
+
+
+    # ---------- queries ----------
+
+    def getFree(self):
+        '''returns the mask of all empty fields which are not occupied by the cat'''
+        return self.empty & ~self.cat
+
+    def getFalling(self, isFlipped=False):
+        '''returns the mask of all objects which obey gravity and have an empty field below them'''
+        return self.falls & shiftAntiGravity(self.getFree(), isFlipped)
+
+    def isStable(self, isFlipped=False):
+        return self.getFalling(isFlipped) == 0
+
+    def isBelow(self, x, y, value, isFlipped=False):
+        '''returns True if value is somewhere below (x, y) in the same column'''
+        mask = self.codes.get(value, 0) & COLUMNS[x]
+        if isFlipped:
+            return mask & (bit(x, y) - 1) != 0
+        return mask >> (y*COLS + x + 1) != 0
+
+    def isAbove(self, x, y, value, isFlipped=False):
+        return self.isBelow(x, y, value, not isFlipped)
+
+    def isAboveOneOf(self, mask, isFlipped=False):
+        '''returns True if the cat is directly above one of the fields in mask'''
+        return shiftAntiGravity(mask, isFlipped) & self.cat != 0
+
+    def isBelowOneOf(self, mask, isFlipped=False):
+        '''returns True if the cat is directly below one of the fields in mask'''
+        return shiftGravity(mask, isFlipped) & self.cat != 0
+
+    def isAboveFire(self, isFlipped=False):
+        fire = self.codes.get(objects.OBJ_FIRE, 0) | self.codes.get(objects.OBJ_BURNING_CAN, 0)
+        return self.isAboveOneOf(fire, isFlipped)
+
+    def isBelowRain(self, isFlipped=False):
+        return self.isBelowOneOf(self.codes.get(objects.OBJ_RAIN, 0), isFlipped)
+
+    def getPushable(self, dx):
+        '''returns the mask of all movable objects which can be pushed in direction dx (-1 or +1)'''
+        if dx > 0:
+            return self.movable & shiftLeft(self.getFree())
+        return self.movable & shiftRight(self.getFree())
+
+
+    # ---------- changes ----------
+
+    def applyGravity(self, isFlipped=False):
+        '''lets all objects fall until they lie on something.
+        all objects which can fall are moved by one field at a time.
+        returns the mask of the fields which have changed.'''
+        changed = 0
+        falling = self.getFalling(isFlipped)
+        while falling:
+            target = shiftGravity(falling, isFlipped)
+            for code, mask in list(self.codes.items()):
+                moving = mask & falling
+                if moving:
+                    self.codes[code] = (mask & ~moving) | shiftGravity(moving, isFlipped)
+            self.codes[EMPTY] = (self.codes.get(EMPTY, 0) & ~target) | falling
+            for name, codes in ATTRIBUTES:
+                mask = getattr(self, name)
+                setattr(self, name, (mask & ~falling) | shiftGravity(mask & falling, isFlipped))
+            self.empty = self.codes[EMPTY]
+            changed |= falling | target
+            falling = self.getFalling(isFlipped)
+        return changed
+
+
+if __name__=='__main__':
+    board = model_board.Board(fill=EMPTY)
+    board.set(3, 2, 65)
+    board.set(3, 0, 37)
+    board.set(5, 9, objects.OBJ_FIRE)
+    board.set(7, 5, 58)
+    board.set(7, 1, 65)
+    bitboard = Bitboard.fromBoard(board, cat=(5, 8))
+    assert bitboard.toBoard() == board
+    assert bitboard.get(3, 2) == 65
+    assert not bitboard.isStable()
+    assert bitboard.isAboveFire()
+    assert not bitboard.isAboveFire(isFlipped=True)
+    assert bitboard.isBelow(3, 0, 65)
+    assert not bitboard.isBelow(3, 2, 65)
+    assert bitboard.isBelow(3, 2, 37, isFlipped=True)
+
+    b = bitboard.copy()
+    b.applyGravity()
+    assert b.isStable()
+    assert b.get(3, 9) == 65
+    assert b.get(3, 8) == 37
+    assert b.get(7, 4) == 65
+    assert bitboard.get(3, 2) == 65
+
+    b = bitboard.copy()
+    b.applyGravity(isFlipped=True)
+    assert b.get(3, 0) == 37
+    assert b.get(3, 1) == 65
+    assert b.get(7, 0) == 65
+
+    b.set(7, 0, EMPTY)
+    assert b.toBoard().get(7, 0) == EMPTY
+    assert count(b.falls) == 2
+
+    print("tests successful")
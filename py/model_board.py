@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+
+'''
+The fields of a level.
+
+Every field contains the code of an object. The codes are windows-1252
+characters and therefore fit into one byte. All fields are stored row by
+row in one bytearray so that copying a board is one buffer copy and
+converting a row from/to a line of a level file is one encode/decode call.
+'''
+
+# standard libraries
+import sys
+
+# other libraries
+import model_object_catalog as objects
+
+
+ENCODING = objects.ENCODING
+
+
+class Board(object):
+
+    __slots__ = ('_data', '_positions', '_changedFields', '_changedRange')
+
+    COLS = 18
+    ROWS = 10
+    SIZE = COLS * ROWS
+
+    NOTHING_CHANGED = (SIZE, 0)
+
+    # ---------- initialization ----------
+
+    def __init__(self, data=None, fill=0):
+        '''data: a Board or a bytes-like object of length SIZE to be copied.
+        if data is None all fields are set to fill.'''
+        if data is None:
+            self._data = bytearray((fill,)) * self.SIZE
+        elif isinstance(data, Board):
+            self._data = bytearray(data._data)
+        else:
+            self._data = bytearray(data)
+            assert len(self._data) == self.SIZE
+        # the index is not copied, it is built when it is needed the first time
+        self._positions = None
+        # fields which have been changed since the last call to popChangedFields, None if unknown
+        self._changedFields = set()
+        # (start, stop) of the indices which have been changed since the last call to popChangedRange, None if unknown
+        self._changedRange = self.NOTHING_CHANGED
+
+    def copy(self):
+        return Board(self)
+
+
+    # ---------- getters & setters ----------
+
+    def get(self, x, y):
+        return self._data[y*self.COLS + x]
+
+    def set(self, x, y, value):
+        i = y*self.COLS + x
+        old = self._data[i]
+        if old == value:
+            return
+        if self._positions is not None:
+            self._positions[old].discard((x, y))
+            self._positions.setdefault(value, set()).add((x, y))
+        if self._changedFields is not None:
+            self._changedFields.add((x, y))
+        if self._changedRange is not None:
+            start, stop = self._changedRange
+            self._changedRange = (min(start, i), max(stop, i+1))
+        self._data[i] = value
+
+    def getRow(self, y):
+        i = y*self.COLS
+        return bytes(self._data[i:i+self.COLS])
+
+    def setRow(self, y, values):
+        '''values: a bytes-like object of length COLS'''
+        assert len(values) == self.COLS
+        i = y*self.COLS
+        self._data[i:i+self.COLS] = values
+        self._positions = None
+        self._changedFields = None
+        if self._changedRange is not None:
+            start, stop = self._changedRange
+            self._changedRange = (min(start, i), max(stop, i+self.COLS))
+
+
+    def popChangedFields(self):
+        '''returns the set of (x,y) which have been changed since the last call
+        or None if that is unknown because the board has been changed as a sequence'''
+        changedFields = self._changedFields
+        self._changedFields = set()
+        return changedFields
+
+    def popChangedRange(self):
+        '''returns (start, stop) so that only the fields self[start:stop] have been changed since the last call.
+        start >= stop if nothing has been changed.
+        returns None if unknown. this is used by model_history.DeltaHistory.'''
+        changedRange = self._changedRange
+        self._changedRange = self.NOTHING_CHANGED
+        return changedRange
+
+
+    # ---------- position index ----------
+
+    def _getPositions(self):
+        '''returns a dict mapping every code on the board to the set of (x,y) where it is'''
+        if self._positions is None:
+            positions = dict()
+            i = 0
+            for y in range(self.ROWS):
+                for x in range(self.COLS):
+                    positions.setdefault(self._data[i], set()).add((x, y))
+                    i += 1
+            self._positions = positions
+        return self._positions
+
+    def find(self, value):
+        '''returns the position with the lowest x (and for equal x the lowest y) or (None, None)'''
+        positions = self._getPositions().get(value)
+        if not positions:
+            return None, None
+        return min(positions)
+
+    def findAll(self, value):
+        '''yields all positions of value, sorted by x and then by y'''
+        positions = self._getPositions().get(value)
+        if not positions:
+            return iter(())
+        return iter(sorted(positions))
+
+    def has(self, value):
+        return bool(self._getPositions().get(value))
+
+    def count(self, value):
+        positions = self._getPositions().get(value)
+        if not positions:
+            return 0
+        return len(positions)
+
+    def countOneOf(self, values):
+        positions = self._getPositions()
+        n = 0
+        for value in values:
+            if value in positions:
+                n += len(positions[value])
+        return n
+
+    # sequence protocol: the fields row by row, as used by model_history.DeltaHistory
+
+    def __iter__(self):
+        '''iterates over the codes of all fields, row by row'''
+        return iter(self._data)
+
+    def __len__(self):
+        return self.SIZE
+
+    def __getitem__(self, i):
+        '''i: index or slice of the fields row by row. a slice is returned as bytes.'''
+        if isinstance(i, slice):
+            return bytes(self._data[i])
+        return self._data[i]
+
+    def __setitem__(self, i, value):
+        '''the number of fields can not be changed'''
+        if isinstance(i, slice):
+            n = len(self._data)
+            self._data[i] = value
+            assert len(self._data) == n
+        else:
+            self._data[i] = value
+        self._positions = None
+        self._changedFields = None
+        self._changedRange = None
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self._data)
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self._data == other._data
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return eq
+        return not eq
+
+    __hash__ = None
+
+    def toBytes(self):
+        return bytes(self._data)
+
+
+    # ---------- conversion ----------
+
+    def toString(self):
+        text = self._data.decode(ENCODING)
+        return u"\n".join(text[i:i+self.COLS] for i in range(0, self.SIZE, self.COLS))
+
+    @classmethod
+    def rowFromString(cls, line):
+        return bytearray(line.encode(ENCODING))
+
+    __str__ = toString
+
+
+if __name__=='__main__':
+    b = Board(fill=ord('!'))
+    assert len(b) == Board.SIZE
+    assert b.count(ord('!')) == Board.SIZE
+    b.set(17, 9, ord('0'))
+    assert b.get(17, 9) == ord('0')
+    assert b.count(ord('0')) == 1
+
+    b.popChangedFields()
+    b.set(1, 2, ord('X'))
+    b.set(1, 2, ord('!'))
+    b.set(3, 4, ord('!'))
+    assert b.popChangedFields() == set([(1, 2)])
+    assert b.popChangedFields() == set()
+
+    c = b.copy()
+    c.set(0, 0, ord('['))
+    assert b.get(0, 0) == ord('!')
+    assert c.get(0, 0) == ord('[')
+    assert b != c
+
+    assert b.find(ord('0')) == (17, 9)
+    assert b.find(ord('[')) == (None, None)
+    assert c.find(ord('[')) == (0, 0)
+    c.set(5, 3, ord('['))
+    c.set(5, 1, ord('['))
+    assert list(c.findAll(ord('['))) == [(0, 0), (5, 1), (5, 3)]
+    c.set(0, 0, ord('!'))
+    assert c.find(ord('[')) == (5, 1)
+    assert c.count(ord('[')) == 2
+    assert c.countOneOf((ord('['), ord('0'))) == 3
+    assert c.has(ord('0'))
+    assert not c.has(ord('X'))
+
+    s = b.toString()
+    lines = s.split('\n')
+    assert len(lines) == Board.ROWS
+    assert lines[-1][-1] == u'0'
+    assert b[:Board.COLS] == b.getRow(0)
+    d = Board(b)
+    d[3:5] = b'[['
+    assert d.get(3, 0) == ord('[')
+    assert d.find(ord('[')) == (3, 0)
+    assert sys.getsizeof(d) > Board.SIZE
+
+    d = Board(fill=0)
+    for y, ln in enumerate(lines):
+        d.setRow(y, Board.rowFromString(ln))
+    assert d == b
+
+    print("tests successful")
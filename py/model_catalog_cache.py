@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+'''
+Remembers the results of scanning the image directories between starts.
+
+model_object_catalog and model_background_catalog list a directory and
+match the file names on every start which is slow if the program is
+installed on a network drive. The results are saved in a json file in
+metainfo.PATH_CONFIG together with the modification time of the directory
+they have been computed from. As long as the modification time does not
+change (no file has been added, removed or renamed) the saved result is
+used and the directory is not listed.
+
+If the cache file can not be read or written the results are computed
+as if there was no cache.
+'''
+
+# standard libraries
+import os
+import json
+import logging
+log = logging.getLogger(__name__)
+
+# other libraries
+import metainfo
+
+
+FILENAME = 'catalog-cache.json'
+VERSION = 1
+
+KEY_VERSION = 'version'
+KEY_ENTRIES = 'entries'
+KEY_PATH    = 'path'
+KEY_MTIME   = 'mtime'
+KEY_VALUE   = 'value'
+
+
+class CatalogCache(object):
+
+    def __init__(self, ffn):
+        self.ffn = ffn
+        self._entries = None
+        # number of values computed and number of values taken from the cache
+        self.misses = 0
+        self.hits = 0
+
+    def get(self, key, path, compute):
+        '''returns the cached value for key if path has not been modified since it has been computed.
+        otherwise the value is computed with compute() and saved.
+        the value must be serializable with json, tuples become lists.'''
+        mtime = self._getMtime(path)
+        entries = self._load()
+        entry = entries.get(key)
+        if mtime != None and entry != None and entry.get(KEY_PATH) == path and entry.get(KEY_MTIME) == mtime:
+            self.hits += 1
+            return entry[KEY_VALUE]
+
+        self.misses += 1
+        value = compute()
+        if mtime != None:
+            entries[key] = {KEY_PATH: path, KEY_MTIME: mtime, KEY_VALUE: value}
+            self._save()
+        return value
+
+    @staticmethod
+    def _getMtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _load(self):
+        if self._entries != None:
+            return self._entries
+
+        self._entries = dict()
+        try:
+            with open(self.ffn, 'rt') as f:
+                data = json.load(f)
+        except (EnvironmentError, ValueError):
+            return self._entries
+
+        if isinstance(data, dict) and data.get(KEY_VERSION) == VERSION and isinstance(data.get(KEY_ENTRIES), dict):
+            self._entries = data[KEY_ENTRIES]
+        return self._entries
+
+    def _save(self):
+        data = {KEY_VERSION: VERSION, KEY_ENTRIES: self._entries}
+        # write to a temporary file first so that other processes never read a half written file
+        tmp = "{ffn}.{pid}.tmp".format(ffn=self.ffn, pid=os.getpid())
+        try:
+            path = os.path.split(self.ffn)[0]
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            with open(tmp, 'wt') as f:
+                json.dump(data, f)
+            if hasattr(os, 'replace'):
+                os.replace(tmp, self.ffn)
+            else:
+                # Python 2: os.rename does not replace existing files on windows
+                if os.path.exists(self.ffn):
+                    os.remove(self.ffn)
+                os.rename(tmp, self.ffn)
+        except EnvironmentError as e:
+            log.debug("failed to save catalog cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            try:
+                os.remove(tmp)
+            except EnvironmentError:
+                pass
+
+
+cache = CatalogCache(os.path.join(metainfo.PATH_CONFIG, FILENAME))
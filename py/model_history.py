@@ -1,5 +1,9 @@
 #!/usr/bin/env python
 
+# standard libraries
+import sys
+
+
 UPDATE_LAST = 'update-last'
 
 
@@ -44,6 +48,15 @@ class History(object):
         return len(self.history)
 
 
+    # ---------- changes ----------
+
+    def recordSplice(self, attr, start, stop, newStop):
+        '''is called by the model after it has replaced value[start:stop] of the attribute attr
+        by the items which are now in value[start:newStop].
+        this history makes full copies, it does not need to know that.'''
+        pass
+
+
     # ---------- save ----------
     
     def makeBackup(self):
@@ -101,6 +114,275 @@ class History(object):
 
 
 
+class _Splice(object):
+
+    '''a change of a sequence: value[start:stop] = items'''
+
+    __slots__ = ('start', 'stop', 'items')
+
+    def __init__(self, start, stop, items):
+        self.start = start
+        self.stop = stop
+        self.items = items
+
+    def apply(self, value):
+        value[self.start:self.stop] = self.items
+
+
+class _Entry(object):
+
+    __slots__ = ('isKeyframe', 'values', 'size')
+
+    def __init__(self, isKeyframe, values):
+        self.isKeyframe = isKeyframe
+        self.values = values
+        self.size = sys.getsizeof(self) + sys.getsizeof(values) + sum(sizeOf(v) for v in values.values())
+
+
+def sizeOf(value):
+    '''estimates the memory used by value in bytes'''
+    if isinstance(value, _Splice):
+        return sys.getsizeof(value) + sizeOf(value.items)
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(i) for i in value)
+    return size
+
+
+def commonPrefixLength(a, b):
+    '''a, b: sequences. compares element by element so that
+    no copies are made and the comparison stops at the first difference.'''
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+def commonSuffixLength(a, b, maxLength):
+    la = len(a)
+    lb = len(b)
+    n = min(maxLength, la, lb)
+    i = 0
+    while i < n and a[la-1-i] == b[lb-1-i]:
+        i += 1
+    return i
+
+def diff(old, new):
+    '''returns a _Splice which changes old into new or None if they are equal'''
+    prefix = commonPrefixLength(old, new)
+    if prefix == len(old) == len(new):
+        return None
+    suffix = commonSuffixLength(old, new, min(len(old), len(new)) - prefix)
+    return _Splice(prefix, len(old) - suffix, new[prefix:len(new) - suffix])
+
+def mergeSplices(pending, start, stop, newStop):
+    '''pending: None or (s, oldStop, curStop) meaning that value[s:curStop] has replaced mirror[s:oldStop]
+    and everything else is equal.
+    afterwards value[start:stop] has been replaced by what is now value[start:newStop].
+    returns the (s, oldStop, curStop) which describes both changes.'''
+    if pending == None:
+        return (start, stop, newStop)
+    s, oldStop, curStop = pending
+    delta = newStop - stop
+    # where curStop is after the second change
+    if curStop <= start:
+        end = curStop
+    elif curStop >= stop:
+        end = curStop + delta
+    else:
+        end = newStop
+    end = max(end, newStop)
+    # the items behind end are the items behind oldStop in the mirror
+    totalDelta = (curStop - oldStop) + delta
+    return (min(s, start), end - totalDelta, end)
+
+
+class DeltaHistory(History):
+
+    '''
+    A history which saves memory by storing only the changes between two backups.
+
+    Attributes which have a copy function are expected to be mutable sequences
+    which support slicing (e.g. list or Board) or None. For these only the changed
+    range is stored. The first entry and every keyframeInterval-th entry
+    store a full copy instead. Loading an entry replays the changes starting
+    at the nearest preceding keyframe.
+    Attributes without a copy function are stored in every entry.
+
+    The changed range is taken from what the model has reported with
+    recordSplice (or, if the value has a method popChangedRange like
+    model_board.Board, from that). This is used only if the attribute is still
+    the same object as at the last backup; if it has been replaced or a change
+    is unknown the range is found by comparing the value with a copy of it's
+    state at the last backup (the mirror). The mirror is updated by applying
+    the change, it is not copied again.
+
+    Instead of a maximum number of entries the oldest entries are dropped
+    if the estimated memory used by all entries exceeds maxMemory (in bytes).
+    At least two entries are kept so that the last change can always be undone.
+    '''
+
+    KEYFRAME_INTERVAL = 20
+
+    # ---------- initialize ----------
+
+    def __init__(self, model, attributesToBackup, maxMemory, onUndoOrRedoListener=None, keyframeInterval=None):
+        self.maxMemory = maxMemory
+        if keyframeInterval == None:
+            keyframeInterval = self.KEYFRAME_INTERVAL
+        self.keyframeInterval = keyframeInterval
+        History.__init__(self, model, attributesToBackup, None, onUndoOrRedoListener)
+
+    def clear(self):
+        History.clear(self)
+        self.memory = 0
+        # copies of the sequence attributes as they are in self.history[self.historyIndex]
+        self._mirror = dict()
+        # the objects which the mirrors are copies of
+        self._sources = dict()
+        # attr -> (start, oldStop, curStop) reported since the last backup, see mergeSplices
+        self._pending = dict()
+
+
+    # ---------- changes ----------
+
+    def recordSplice(self, attr, start, stop, newStop):
+        self._pending[attr] = mergeSplices(self._pending.get(attr), start, stop, newStop)
+
+    def _popSplice(self, attr, val, old):
+        '''returns the _Splice which changes old (the mirror) into val or None if they are equal'''
+        pending = self._pending.pop(attr, None)
+        isKnown = val is self._sources.get(attr)
+        if hasattr(val, 'popChangedRange'):
+            changedRange = val.popChangedRange()
+            if changedRange == None:
+                isKnown = False
+            elif changedRange[0] < changedRange[1]:
+                pending = mergeSplices(pending, changedRange[0], changedRange[1], changedRange[1])
+
+        if not isKnown:
+            return diff(old, val)
+        if pending == None:
+            return None
+        start, oldStop, curStop = pending
+        return _Splice(start, oldStop, val[start:curStop])
+
+
+    # ---------- getters ----------
+
+    def getMemory(self):
+        return self.memory
+
+
+    # ---------- save ----------
+
+    def makeBackup(self):
+        self.historyIndex += 1
+        while self.historyIndex < len(self.history):
+            self.memory -= self.history[-1].size
+            del self.history[-1]
+
+        if len(self.history) > 0:
+            prior = self.history[-1]
+            isKeyframe = self.historyIndex - self._getKeyframeIndex(self.historyIndex - 1) >= self.keyframeInterval
+        else:
+            prior = None
+            isKeyframe = True
+
+        d = dict()
+        for attr, copy, updateLast in self.attributesToBackup:
+            val = getattr(self.model, attr)
+            if copy == None:
+                d[attr] = val
+                if updateLast == UPDATE_LAST and prior != None:
+                    prior.values[attr] = val
+                continue
+
+            assert updateLast != UPDATE_LAST, "UPDATE_LAST is not supported for attributes with copy function"
+            old = self._mirror.get(attr)
+            if old == None or val == None:
+                self._pending.pop(attr, None)
+                if val != None and hasattr(val, 'popChangedRange'):
+                    val.popChangedRange()
+                self._mirror[attr] = self._copy(copy, val)
+                d[attr] = self._copy(copy, val)
+            else:
+                splice = self._popSplice(attr, val, old)
+                if splice != None:
+                    splice.apply(old)
+                if isKeyframe:
+                    d[attr] = self._copy(copy, val)
+                elif splice != None:
+                    d[attr] = splice
+            self._sources[attr] = val
+
+        entry = _Entry(isKeyframe, d)
+        self.history.append(entry)
+        self.memory += entry.size
+
+        while self.memory > self.maxMemory and len(self.history) > 2:
+            self._dropFirst()
+
+    def _dropFirst(self):
+        second = self.history[1]
+        if not second.isKeyframe:
+            values = dict(second.values)
+            values.update(self._getState(1))
+            self.memory -= second.size
+            second = _Entry(True, values)
+            self.memory += second.size
+            self.history[1] = second
+        self.memory -= self.history[0].size
+        del self.history[0]
+        self.historyIndex -= 1
+
+
+    # ---------- load ----------
+
+    def _getKeyframeIndex(self, index):
+        while not self.history[index].isKeyframe:
+            index -= 1
+        return index
+
+    def _getState(self, index):
+        '''returns a dict with new copies of all sequence attributes as they are in self.history[index]'''
+        k = self._getKeyframeIndex(index)
+        state = dict()
+        for attr, copy, updateLast in self.attributesToBackup:
+            if copy == None:
+                continue
+            val = self._copy(copy, self.history[k].values[attr])
+            for entry in self.history[k+1:index+1]:
+                change = entry.values.get(attr)
+                if isinstance(change, _Splice):
+                    change.apply(val)
+                elif attr in entry.values:
+                    val = self._copy(copy, change)
+            state[attr] = val
+        return state
+
+    def _load(self):
+        state = self._getState(self.historyIndex)
+        values = self.history[self.historyIndex].values
+        for attr, copy, updateLast in self.attributesToBackup:
+            if copy == None:
+                val = values[attr]
+            else:
+                val = state[attr]
+                self._mirror[attr] = self._copy(copy, val)
+                self._sources[attr] = val
+                self._pending.pop(attr, None)
+            setattr(self.model, attr, val)
+        if self.onLoadListener != None:
+            self.onLoadListener()
+
+    @staticmethod
+    def _copy(copy, val):
+        if val == None:
+            return None
+        return copy(val)
+
+
 if __name__=='__main__':
 
     class Model(object):
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+
+'''
+Many levels in one binary file.
+
+A level pack starts with a header and an index so that a single level
+can be read without parsing the others. The file is mapped into memory
+with mmap, reading level N only touches the index entry and the record
+of level N.
+
+All numbers are little endian.
+
+    header:  magic (4 bytes), version (uint8), number of levels (uint32)
+    index:   for every level: offset (uint32), length (uint32) of its record
+    records: for every level:
+        board        (COLS*ROWS bytes, one object code per field, row by row)
+        flags        (uint8, see FLAG_*)
+        name, author, bgMargin, bgUntouched, bgTouched
+                     (each a string)
+        notes        (a string, only if FLAG_NOTES is set)
+        coordinates  (uint32 number, then x, y (int16 each) for every coordinate)
+        steps        (only if FLAG_STEPS is set:
+                      uint32 number, then kind (uint8), dx, dy (int8 each) for every step)
+
+A string is a uint32 length followed by that many bytes encoded in ENCODING.
+
+This module does not know the Model, a level is exchanged as a Level
+(see Model.toPackedLevel and Model.readPackedLevel). The kind of a step
+is the index of it's class in Model.JUMP_CLASSES.
+'''
+
+# standard libraries
+import mmap
+import struct
+from io import open
+
+# other libraries
+import model_board
+
+
+MAGIC = b'IKLP'
+VERSION = 1
+
+ENCODING = 'utf-8'
+
+FLAG_NOTES = 1 << 0
+FLAG_STEPS = 1 << 1
+
+_HEADER = struct.Struct('<4sBI')
+_INDEX_ENTRY = struct.Struct('<II')
+_FLAGS = struct.Struct('<B')
+_LENGTH = struct.Struct('<I')
+_COORDINATE = struct.Struct('<hh')
+_STEP = struct.Struct('<Bbb')
+
+BOARD_SIZE = model_board.Board.SIZE
+
+
+class LevelPackError(Exception):
+    pass
+
+
+class Level(object):
+
+    '''the content of one level file in a form which does not depend on the Model'''
+
+    __slots__ = ('name', 'board', 'author', 'bgMargin', 'bgUntouched', 'bgTouched', 'notes', 'coordinates', 'steps')
+
+    def __init__(self, name, board, author, bgMargin, bgUntouched, bgTouched, notes=None, coordinates=(), steps=None):
+        '''name: usually the file name of the level.
+        board: bytes of length BOARD_SIZE.
+        notes: a string or None if the level has no notes.
+        coordinates: list of (x, y).
+        steps: list of (kind, dx, dy) or None if the solution is not initialized.'''
+        self.name = name
+        self.board = board
+        self.author = author
+        self.bgMargin = bgMargin
+        self.bgUntouched = bgUntouched
+        self.bgTouched = bgTouched
+        self.notes = notes
+        self.coordinates = list(coordinates)
+        if steps != None:
+            steps = list(steps)
+        self.steps = steps
+
+    def __eq__(self, other):
+        if type(self) != type(other):
+            return False
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.name)
+
+
+# ---------- writing ----------
+
+def _packString(text):
+    data = text.encode(ENCODING)
+    return _LENGTH.pack(len(data)) + data
+
+def packLevel(level):
+    '''returns the record of level as bytes'''
+    assert len(level.board) == BOARD_SIZE
+    flags = 0
+    if level.notes != None:
+        flags |= FLAG_NOTES
+    if level.steps != None:
+        flags |= FLAG_STEPS
+
+    parts = [bytes(level.board), _FLAGS.pack(flags)]
+    for text in (level.name, level.author, level.bgMargin, level.bgUntouched, level.bgTouched):
+        parts.append(_packString(text))
+    if level.notes != None:
+        parts.append(_packString(level.notes))
+
+    parts.append(_LENGTH.pack(len(level.coordinates)))
+    parts.extend(_COORDINATE.pack(x, y) for x, y in level.coordinates)
+
+    if level.steps != None:
+        parts.append(_LENGTH.pack(len(level.steps)))
+        parts.extend(_STEP.pack(kind, dx, dy) for kind, dx, dy in level.steps)
+
+    return b''.join(parts)
+
+def writePack(ffn, levels):
+    '''writes all levels (an iterable of Level) to the pack file ffn.
+    returns the number of levels.'''
+    records = [packLevel(level) for level in levels]
+    offset = _HEADER.size + len(records) * _INDEX_ENTRY.size
+    with open(ffn, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records)))
+        for record in records:
+            f.write(_INDEX_ENTRY.pack(offset, len(record)))
+            offset += len(record)
+        for record in records:
+            f.write(record)
+    return len(records)
+
+
+# ---------- reading ----------
+
+class _Reader(object):
+
+    '''reads the fields of one record one after another'''
+
+    def __init__(self, data, offset, end):
+        self.data = data
+        self.offset = offset
+        self.end = end
+
+    def unpack(self, st):
+        if self.offset + st.size > self.end:
+            raise LevelPackError("unexpected end of record")
+        values = st.unpack_from(self.data, self.offset)
+        self.offset += st.size
+        return values
+
+    def read(self, n):
+        if self.offset + n > self.end:
+            raise LevelPackError("unexpected end of record")
+        data = self.data[self.offset:self.offset+n]
+        self.offset += n
+        return data
+
+    def readString(self):
+        n, = self.unpack(_LENGTH)
+        return self.read(n).decode(ENCODING)
+
+    def readList(self, st):
+        n, = self.unpack(_LENGTH)
+        return [self.unpack(st) for i in range(n)]
+
+
+class LevelPack(object):
+
+    '''
+    Random access to the levels of a pack file.
+    Use it as a context manager or call close when done.
+    '''
+
+    def __init__(self, ffn):
+        self.ffn = ffn
+        self._file = open(ffn, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can not be mapped
+            self._file.close()
+            raise LevelPackError("empty file")
+
+        try:
+            if len(self._data) < _HEADER.size:
+                raise LevelPackError("file is too short")
+            magic, version, self._length = _HEADER.unpack_from(self._data, 0)
+            if magic != MAGIC:
+                raise LevelPackError("not a level pack")
+            if version != VERSION:
+                raise LevelPackError("unsupported version {version}".format(version=version))
+            if _HEADER.size + self._length * _INDEX_ENTRY.size > len(self._data):
+                raise LevelPackError("index is incomplete")
+        except:
+            self.close()
+            raise
+
+    def close(self):
+        if self._data != None:
+            self._data.close()
+            self._data = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._length
+
+    def _getRecord(self, index):
+        '''returns a _Reader for the record of the level with the given index'''
+        if not 0 <= index < self._length:
+            raise IndexError("level index out of range: {index}".format(index=index))
+        offset, length = _INDEX_ENTRY.unpack_from(self._data, _HEADER.size + index * _INDEX_ENTRY.size)
+        end = offset + length
+        if end > len(self._data):
+            raise LevelPackError("record {index} is outside of the file".format(index=index))
+        return _Reader(self._data, offset, end)
+
+    def getName(self, index):
+        reader = self._getRecord(index)
+        reader.offset += BOARD_SIZE + _FLAGS.size
+        return reader.readString()
+
+    def getLevel(self, index):
+        '''returns the Level with the given index, the other levels are not parsed'''
+        reader = self._getRecord(index)
+        board = reader.read(BOARD_SIZE)
+        flags, = reader.unpack(_FLAGS)
+        name = reader.readString()
+        author = reader.readString()
+        bgMargin = reader.readString()
+        bgUntouched = reader.readString()
+        bgTouched = reader.readString()
+        if flags & FLAG_NOTES:
+            notes = reader.readString()
+        else:
+            notes = None
+        coordinates = reader.readList(_COORDINATE)
+        if flags & FLAG_STEPS:
+            steps = reader.readList(_STEP)
+        else:
+            steps = None
+        if reader.offset != reader.end:
+            raise LevelPackError("record {index} is longer than expected".format(index=index))
+        return Level(name, board, author, bgMargin, bgUntouched, bgTouched, notes, coordinates, steps)
+
+    def iterNames(self):
+        for i in range(self._length):
+            yield self.getName(i)
+
+    def iterLevels(self):
+        for i in range(self._length):
+            yield self.getLevel(i)
+
+
+if __name__=='__main__':
+    import os
+    import tempfile
+
+    levels = [
+        Level(u"a.afg", bytes(bytearray(range(BOARD_SIZE))), u"me", u"m", u"u", u"t"),
+        Level(u"b.afg", bytes(bytearray(BOARD_SIZE)), u"\xe4", u"m", u"u", u"t", notes=u"x\ny", coordinates=[(1, 2), (-1, 11)], steps=[(0, 1, 0), (2, 0, 0)]),
+    ]
+    fd, ffn = tempfile.mkstemp(suffix='.afp')
+    os.close(fd)
+    try:
+        assert writePack(ffn, levels) == 2
+        with LevelPack(ffn) as pack:
+            assert len(pack) == 2
+            assert pack.getName(1) == u"b.afg"
+            assert pack.getLevel(1) == levels[1]
+            assert list(pack.iterLevels()) == levels
+    finally:
+        os.remove(ffn)
+
+    print("tests successful")
@@ -7,12 +7,13 @@ import logging
 
 # other
 import system
+from model_catalog_cache import cache
 import locales
 _ = locales._
 
 
 def toAbsPath(relPath):
-    return os.path.join(os.path.split(os.path.split(__file__)[0])[0], relPath)
+    return os.path.join(os.path.split(os.path.split(os.path.abspath(__file__))[0])[0], relPath)
 
 PATH = toAbsPath('images/gif')
 
@@ -111,15 +112,19 @@ def getObjects():
     l = os.listdir(PATH)
     for fn in l:
         if fn[0] == '.':
-            logging.debug(_("ignoring hidden file {fn} in {path}").format(fn=fn, path=PATH_IMAGES))
+            logging.debug(_("ignoring hidden file {fn} in {path}").format(fn=fn, path=PATH))
             continue
         m = reo.match(fn)
         if not m:
-            logging.warning(_("invalid file {fn} in {path}").format(fn=fn, path=PATH_IMAGES))
+            logging.warning(_("invalid file {fn} in {path}").format(fn=fn, path=PATH))
             continue
         yield int(m.group('id'))
 
-CATEGORY_ALL = list(getObjects())
+# all codes which have an image, including the open door.
+# a level may only contain these codes.
+VALID_CODES = frozenset(cache.get('objects', PATH, lambda: sorted(getObjects())))
+
+CATEGORY_ALL = list(VALID_CODES)
 CATEGORY_ALL.append(OBJ_NONE)
 CATEGORY_ALL.remove(93) # open door
 CATEGORY_ALL.sort()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python
+
+'''
+A deterministic simulation of the game physics to verify solutions.
+
+The rules of the original game are not documented. This simulation
+implements the rules which are known from the object catalog
+(see model_object_catalog):
+ - the cat can step on empty fields and on the door
+ - stepping on an eatable object eats it
+   (a pipe can be smoked later on, a wand disables gravity for two steps,
+   a drum converts all 061 into 040, a sun removes all balls)
+ - a movable object can be pushed left or right if the field behind it is empty
+ - stepping on a deadly object kills the cat, so does standing above fire
+   or a burning can or below rain
+ - everything else is an obstacle
+ - after every step all objects which obey gravity fall down until they
+   hit something. The cat does not fall.
+ - a pipe jump flips the board, a helium jump carries the cat upward
+   if there is helium below it
+
+The board is stored as a bytearray row by row (like model_board.Board).
+Coordinates are board coordinates (not flipped), "down" and "up" refer to
+the direction of gravity which is reversed when the board is flipped.
+
+To make it fast enough to be run after every change of the solution
+the state before every step is kept so that only the steps after a
+change need to be simulated again. Gravity is only applied to the
+columns in which something has changed.
+'''
+
+# standard libraries
+import struct
+
+# other libraries
+import model_board
+import model_object_catalog as objects
+import locales
+_ = locales._
+
+
+COLS = model_board.Board.COLS
+ROWS = model_board.Board.ROWS
+SIZE = model_board.Board.SIZE
+
+ALL_COLUMNS = (1 << COLS) - 1
+
+STEP_KIND_NORMAL  = 'normal'
+STEP_KIND_PIPE    = 'pipe'
+STEP_KIND_HELIUM  = 'helium'
+STEP_KIND_INVALID = 'invalid'
+
+OUTCOME_OK      = 'ok'
+OUTCOME_DIES    = 'dies'
+OUTCOME_BLOCKED = 'blocked'
+
+REASON_OUTSIDE      = 'outside'
+REASON_OBSTACLE     = 'obstacle'
+REASON_KILLED       = 'killed'
+REASON_FIRE         = 'fire'
+REASON_RAIN         = 'rain'
+REASON_NO_PIPE      = 'no-pipe'
+REASON_NO_HELIUM    = 'no-helium'
+REASON_INVALID_JUMP = 'invalid-jump'
+REASON_DOOR         = 'door'
+
+REASON_DESCRIPTIONS = {
+    REASON_OUTSIDE      : _("leaves the board"),
+    REASON_OBSTACLE     : _("is blocked by an obstacle"),
+    REASON_KILLED       : _("steps on a deadly object"),
+    REASON_FIRE         : _("stands above fire"),
+    REASON_RAIN         : _("stands below rain"),
+    REASON_NO_PIPE      : _("smokes a pipe without having eaten one"),
+    REASON_NO_HELIUM    : _("jumps without helium below"),
+    REASON_INVALID_JUMP : _("performs an invalid jump"),
+    REASON_DOOR         : _("has already left through the door"),
+}
+
+EMPTY  = objects.OBJ_NONE
+END    = objects.OBJ_END
+START  = objects.OBJ_START
+HELIUM = objects.OBJ_HELIUM
+PIPE   = objects.OBJ_PIPE
+WAND   = objects.OBJ_WAND
+DRUM   = objects.OBJ_DRUM
+SUN    = objects.OBJ_SUN
+RAIN   = objects.OBJ_RAIN
+
+FIRE = (objects.OBJ_FIRE, objects.OBJ_BURNING_CAN)
+BALLS = (37, 38, 39, 40, 41, 42)
+DRUM_CONVERTS = (61, 40)
+
+# number of steps (including the one in which the wand is eaten) without gravity
+WAND_STEPS = 2
+
+
+def createTable(codes):
+    table = [False] * 256
+    for code in codes:
+        table[code] = True
+    return tuple(table)
+
+FALLS   = createTable(objects.GRAVITY_OBEYING)
+MOVABLE = createTable(objects.ATTR_MOVABLE)
+EATABLE = createTable(objects.ATTR_EATABLE)
+KILLING = createTable(objects.ATTR_KILLING)
+
+# indices of the fields of every column, from the bottom to the top
+_COLUMNS_UPWARD = tuple(tuple(range((ROWS-1)*COLS + x, -1, -COLS)) for x in range(COLS))
+_COLUMNS_DOWNWARD = tuple(tuple(reversed(column)) for column in _COLUMNS_UPWARD)
+
+
+class State(object):
+
+    '''the state of the level before or after a step'''
+
+    __slots__ = ('fields', 'cat', 'isFlipped', 'pipes', 'gravityPause', 'unstableColumns', 'hasLeft')
+
+    def __init__(self, fields, cat):
+        '''fields: bytearray of all fields row by row
+        cat: index of the field where the cat is'''
+        self.fields = fields
+        self.cat = cat
+        self.isFlipped = False
+        # number of eaten pipes which have not been smoked yet
+        self.pipes = 0
+        # number of steps in which gravity is disabled
+        self.gravityPause = 0
+        # bit mask of columns in which objects may fall
+        self.unstableColumns = ALL_COLUMNS
+        # True if the cat has stepped on the door
+        self.hasLeft = False
+
+    def copy(self):
+        state = State(bytearray(self.fields), self.cat)
+        state.isFlipped = self.isFlipped
+        state.pipes = self.pipes
+        state.gravityPause = self.gravityPause
+        state.unstableColumns = self.unstableColumns
+        state.hasLeft = self.hasLeft
+        return state
+
+    def getCat(self):
+        '''returns the board coordinates (x,y) of the cat'''
+        return self.cat % COLS, self.cat // COLS
+
+    def getField(self, x, y):
+        return self.fields[y*COLS + x]
+
+    def getKey(self):
+        '''returns a compact bytes object which is equal for equal states and can be hashed'''
+        return bytes(self.fields) + _KEY_FORMAT.pack(self.cat, self.isFlipped, self.pipes, self.gravityPause, self.unstableColumns)
+
+_KEY_FORMAT = struct.Struct('<B?BBI')
+
+
+class Result(object):
+
+    '''the outcome of a simulation.
+    index: the index of the step in which the cat dies or is blocked or the number of steps if OUTCOME_OK.
+    cor: board coordinates of the cat at that time.'''
+
+    __slots__ = ('outcome', 'reason', 'index', 'cor', 'isFlipped')
+
+    def __init__(self, outcome, reason, index, cor, isFlipped):
+        self.outcome = outcome
+        self.reason = reason
+        self.index = index
+        self.cor = cor
+        self.isFlipped = isFlipped
+
+    def isOk(self):
+        return self.outcome == OUTCOME_OK
+
+    def getDescription(self):
+        return REASON_DESCRIPTIONS.get(self.reason, u"")
+
+    def __repr__(self):
+        return "%s(%r, %r, %r, %r, %r)" % (self.__class__.__name__, self.outcome, self.reason, self.index, self.cor, self.isFlipped)
+
+
+class Simulator(object):
+
+    def __init__(self, board, start):
+        '''board: model_board.Board which is copied, start: board coordinates of the cat before the first step'''
+        self._board = board.toBytes()
+        self._start = start
+        fields = bytearray(self._board)
+        x, y = start
+        cat = y*COLS + x
+        fields[cat] = EMPTY
+        state = State(fields, cat)
+        applyGravity(state)
+        # _states[i] is the state before step i
+        self._states = [state]
+        # the result of the step after the last state if the cat dies or is blocked in that step
+        self._failure = None
+
+    def isFor(self, board, start):
+        '''returns True if this simulator has been created for the given board and start'''
+        return self._start == start and self._board == board.toBytes()
+
+    def invalidate(self, index):
+        '''index: the first step which has been changed'''
+        if index < len(self._states):
+            del self._states[index+1:]
+            self._failure = None
+
+    def getState(self, index):
+        '''returns the state before step index or None if it has not been simulated.
+        the returned state must not be changed.'''
+        if index < len(self._states):
+            return self._states[index]
+        return None
+
+    def simulate(self, steps):
+        '''steps: list of jumps with an attribute physicsKind (see model.Jump).
+        returns a Result. steps which have been simulated before are not simulated again
+        unless they have been invalidated.'''
+        states = self._states
+        if len(states) > len(steps) + 1:
+            self.invalidate(len(steps))
+        if self._failure != None:
+            return self._failure
+
+        state = states[-1]
+        for i in range(len(states) - 1, len(steps)):
+            state = state.copy()
+            failure = self.performStep(state, steps[i])
+            if failure != None:
+                outcome, reason = failure
+                self._failure = Result(outcome, reason, i, state.getCat(), state.isFlipped)
+                return self._failure
+            states.append(state)
+
+        return Result(OUTCOME_OK, None, len(steps), state.getCat(), state.isFlipped)
+
+
+    # ---------- rules ----------
+
+    def performStep(self, state, step):
+        '''changes state according to step.
+        returns None or (outcome, reason) if the cat dies or is blocked
+        in which case state is undefined.'''
+        if state.hasLeft:
+            return OUTCOME_BLOCKED, REASON_DOOR
+
+        kind = step.physicsKind
+        if kind == STEP_KIND_NORMAL:
+            failure = self._normalStep(state, step.getDistanceX(), step.getDistanceY())
+        elif kind == STEP_KIND_PIPE:
+            failure = self._pipeJump(state)
+        elif kind == STEP_KIND_HELIUM:
+            failure = self._heliumJump(state, -step.getDistanceY())
+        else:
+            failure = OUTCOME_BLOCKED, REASON_INVALID_JUMP
+        if failure != None:
+            return failure
+
+        if state.gravityPause > 0:
+            state.gravityPause -= 1
+        else:
+            applyGravity(state)
+
+        return self._checkDeath(state)
+
+    def _normalStep(self, state, dx, dy):
+        if state.isFlipped:
+            dy = -dy
+        fields = state.fields
+        cat = state.cat
+        x = cat % COLS
+        y = cat // COLS
+        x1 = x + dx
+        y1 = y + dy
+        if not (0 <= x1 < COLS and 0 <= y1 < ROWS):
+            return OUTCOME_BLOCKED, REASON_OUTSIDE
+        target = y1*COLS + x1
+        obj = fields[target]
+
+        if obj == EMPTY:
+            pass
+        elif obj == END:
+            state.hasLeft = True
+        elif KILLING[obj]:
+            return OUTCOME_DIES, REASON_KILLED
+        elif EATABLE[obj]:
+            fields[target] = EMPTY
+            self._eat(state, obj)
+        elif MOVABLE[obj] and dy == 0:
+            x2 = x1 + dx
+            if not (0 <= x2 < COLS) or fields[target+dx] != EMPTY:
+                return OUTCOME_BLOCKED, REASON_OBSTACLE
+            fields[target+dx] = obj
+            fields[target] = EMPTY
+            state.unstableColumns |= 1 << x2
+        else:
+            return OUTCOME_BLOCKED, REASON_OBSTACLE
+
+        state.cat = target
+        state.unstableColumns |= (1 << x) | (1 << x1)
+        return None
+
+    def _eat(self, state, obj):
+        if obj == PIPE:
+            state.pipes += 1
+        elif obj == WAND:
+            state.gravityPause = WAND_STEPS
+        elif obj == DRUM:
+            old, new = DRUM_CONVERTS
+            state.fields = state.fields.replace(bytearray((old,)), bytearray((new,)))
+            state.unstableColumns = ALL_COLUMNS
+        elif obj == SUN:
+            fields = state.fields
+            for ball in BALLS:
+                fields = fields.replace(bytearray((ball,)), bytearray((EMPTY,)))
+            state.fields = fields
+            state.unstableColumns = ALL_COLUMNS
+
+    def _pipeJump(self, state):
+        if state.pipes <= 0:
+            return OUTCOME_BLOCKED, REASON_NO_PIPE
+        state.pipes -= 1
+        state.isFlipped = not state.isFlipped
+        state.unstableColumns = ALL_COLUMNS
+        return None
+
+    def _heliumJump(self, state, distance):
+        '''distance: number of fields the cat is carried upward'''
+        fields = state.fields
+        down = -COLS if state.isFlipped else COLS
+
+        # the first object below the cat must be the helium
+        helium = state.cat + down
+        while 0 <= helium < SIZE and fields[helium] == EMPTY:
+            helium += down
+        if not (0 <= helium < SIZE) or fields[helium] != HELIUM:
+            return OUTCOME_BLOCKED, REASON_NO_HELIUM
+
+        cat = state.cat
+        for i in range(distance):
+            cat -= down
+            if not (0 <= cat < SIZE):
+                return OUTCOME_BLOCKED, REASON_OUTSIDE
+            obj = fields[cat]
+            if obj == END:
+                state.hasLeft = True
+            elif obj != EMPTY:
+                return OUTCOME_BLOCKED, REASON_OBSTACLE
+
+        fields[helium] = EMPTY
+        fields[cat + down] = HELIUM
+        state.cat = cat
+        state.unstableColumns |= 1 << (cat % COLS)
+        return None
+
+    def _checkDeath(self, state):
+        fields = state.fields
+        down = -COLS if state.isFlipped else COLS
+        below = state.cat + down
+        if 0 <= below < SIZE and fields[below] in FIRE:
+            return OUTCOME_DIES, REASON_FIRE
+        above = state.cat - down
+        if 0 <= above < SIZE and fields[above] == RAIN:
+            return OUTCOME_DIES, REASON_RAIN
+        return None
+
+
+def applyGravity(state):
+    '''lets the objects in state.unstableColumns fall down (or up if state.isFlipped)'''
+    columns = state.unstableColumns
+    if columns == 0:
+        return
+    if state.isFlipped:
+        down = -COLS
+        indices = _COLUMNS_DOWNWARD
+    else:
+        down = COLS
+        indices = _COLUMNS_UPWARD
+    fields = state.fields
+    cat = state.cat
+    for x in range(COLS):
+        if not columns & (1 << x):
+            continue
+        # lowest empty field which can be reached by falling objects
+        free = None
+        for i in indices[x]:
+            obj = fields[i]
+            if i == cat:
+                free = None
+            elif obj == EMPTY:
+                if free == None:
+                    free = i
+            elif free != None and FALLS[obj]:
+                fields[free] = obj
+                fields[i] = EMPTY
+                free -= down
+            else:
+                free = None
+    state.unstableColumns = 0
+
+
+if __name__=='__main__':
+    import timeit
+
+    class Step(object):
+        physicsKind = STEP_KIND_NORMAL
+        def __init__(self, dx, dy):
+            self.dx = dx
+            self.dy = dy
+        def getDistanceX(self):
+            return self.dx
+        def getDistanceY(self):
+            return self.dy
+
+    RIGHT = Step(1, 0)
+    LEFT  = Step(-1, 0)
+    UP    = Step(0, -1)
+
+    board = model_board.Board(fill=EMPTY)
+    board.set(0, 9, START)
+    board.set(1, 9, 65)
+    board.set(2, 5, 65)
+    board.set(3, 9, 37)
+    simulator = Simulator(board, (0, 9))
+    assert simulator.getState(0).getField(2, 9) == 65
+    assert simulator.simulate([RIGHT, RIGHT, RIGHT]).isOk()
+    state = simulator.getState(3)
+    assert state.getCat() == (3, 9)
+    assert state.getField(4, 9) == 37
+    assert state.getField(1, 9) == EMPTY
+
+    board.set(5, 9, objects.OBJ_FIRE)
+    simulator = Simulator(board, (0, 9))
+    result = simulator.simulate([RIGHT, RIGHT, RIGHT, RIGHT])
+    assert result.outcome == OUTCOME_BLOCKED and result.index == 3, result
+    simulator.invalidate(0)
+    result = simulator.simulate([UP, RIGHT, RIGHT, RIGHT, RIGHT, RIGHT])
+    assert result.outcome == OUTCOME_DIES and result.reason == REASON_FIRE and result.index == 5, result
+    assert result.cor == (5, 8)
+    simulator.invalidate(1)
+    assert simulator.simulate([UP]).isOk()
+
+    steps = [RIGHT if i % 2 == 0 else LEFT for i in range(500)]
+    board = model_board.Board(fill=EMPTY)
+    board.set(0, 9, START)
+    def simulateFromScratch():
+        Simulator(board, (0, 9)).simulate(steps)
+    t = min(timeit.repeat(simulateFromScratch, number=10, repeat=3)) / 10
+    print("500 steps: %.3f ms" % (t*1e3))
+
+    print("tests successful")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+'''
+Shortens the stored solution of a level.
+
+The states of the level after the steps of the stored solution
+(see model_physics) are used as waypoints. The solution is split into
+segments between waypoints and for every segment model_solver searches
+a shorter way from the state at the beginning of the segment to exactly
+the same state as at the end of the segment. Because the state at the end
+of the segment is the same the rest of the solution stays valid.
+
+The segments are independent of each other and can therefore be searched
+in parallel by a pool of worker processes. The workers get everything they
+need as arguments (board, steps and the indices of the segment) so that
+they do not depend on the level file.
+
+Only the part of the solution which model_physics can simulate without
+the cat dying or being blocked is shortened.
+'''
+
+# standard libraries
+import time
+
+# other libraries
+import model
+import model_board
+import model_physics as physics
+import model_solver
+
+
+class SegmentSolver(model_solver.Solver):
+
+    '''searches a shorter way from the state before steps[i0] to the state before steps[i1]'''
+
+    def __init__(self, model, steps, i0, i1, **kw):
+        model_solver.Solver.__init__(self, model, **kw)
+        result = self._simulator.simulate(steps[:i1])
+        assert result.isOk()
+        self._initialState = self._simulator.getState(i0)
+        target = self._simulator.getState(i1)
+        self._targetKey = target.getKey()
+        self._targetX = target.cat % physics.COLS
+        # only a shorter way is of interest
+        self.maxCost = model_solver.countSteps(steps[i0:i1]) - 1
+
+    def _getInitialState(self):
+        return self._initialState
+
+    def _isGoal(self, state, key, food):
+        return key == self._targetKey
+
+    def _heuristic(self, state, food):
+        return abs(state.cat % physics.COLS - self._targetX), None
+
+
+# ---------- worker ----------
+
+def shortenSegment(task):
+    '''task: (board data, steps, i0, i1, maxMemory, timeBudget)
+    returns (i0, i1, steps or None if no shorter way has been found, status)'''
+    boardData, steps, i0, i1, maxMemory, timeBudget = task
+    m = model.Model()
+    # the model is not used for anything but the solver, no notifications or history are needed
+    m.board = model_board.Board(boardData)
+    solver = SegmentSolver(m, steps, i0, i1, maxMemory=maxMemory, timeBudget=timeBudget)
+    return i0, i1, solver.solve(), solver.status
+
+
+# ---------- shortener ----------
+
+class Shortener(object):
+
+    SEGMENT_LENGTH = 16
+
+    def __init__(self, model, pool=None, segmentLength=SEGMENT_LENGTH,
+            maxMemory=model_solver.Solver.DEFAULT_MAX_MEMORY, timeBudget=model_solver.Solver.DEFAULT_TIME_BUDGET):
+        '''model: a level with an initialized solution.
+        pool: a multiprocessing.Pool to search the segments in parallel or None to search them one after another.
+        segmentLength: the maximum number of counted steps per segment.
+        maxMemory, timeBudget: limits for the search of one segment.'''
+        self.model = model
+        self.pool = pool
+        self.segmentLength = segmentLength
+        self.maxMemory = maxMemory
+        self.timeBudget = timeBudget
+
+        self.numberStepsBefore = None
+        self.numberStepsAfter = None
+        self.numberSegments = 0
+        self.numberShortenedSegments = 0
+        self.duration = 0.0
+
+    def getNumberSavedSteps(self):
+        return self.numberStepsBefore - self.numberStepsAfter
+
+    def iterSegments(self, steps, stop):
+        '''yields (i0, i1) so that steps[i0:i1] contains at most segmentLength counted steps.
+        stop: the number of steps which are to be split.'''
+        i0 = 0
+        n = 0
+        for i in range(stop):
+            if not steps[i].isUncountedJump():
+                n += 1
+            if n == self.segmentLength:
+                yield i0, i + 1
+                i0 = i + 1
+                n = 0
+        if n > 1:
+            yield i0, stop
+
+    def shorten(self):
+        '''replaces the segments of the solution for which a shorter way has been found.
+        returns the number of saved steps.'''
+        t0 = time.time()
+        solution = self.model.getSolution()
+        steps = list(solution.iterSteps())
+        self.numberStepsBefore = model_solver.countSteps(steps)
+
+        # the solution is only valid until the first step which can not be simulated
+        stop = solution.simulate().index
+
+        board = self.model.board.toBytes()
+        tasks = [(board, steps[:i1], i0, i1, self.maxMemory, self.timeBudget) for i0, i1 in self.iterSegments(steps, stop)]
+        self.numberSegments = len(tasks)
+        if self.pool == None:
+            results = [shortenSegment(task) for task in tasks]
+        else:
+            results = list(self.pool.imap_unordered(shortenSegment, tasks))
+
+        # replace from the end so that the indices of the other segments stay valid
+        results.sort(key=lambda result: result[0], reverse=True)
+        self.numberShortenedSegments = 0
+        for i0, i1, newSteps, status in results:
+            if newSteps == None:
+                continue
+            solution.replaceSteps(i0, i1, newSteps)
+            self.numberShortenedSegments += 1
+
+        self.numberStepsAfter = model_solver.countSteps(solution.iterSteps())
+        self.duration = time.time() - t0
+        return self.getNumberSavedSteps()
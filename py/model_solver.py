@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+'''
+Searches a shortest solution for a level.
+
+The search is an A* search over the states of model_physics.
+Equal states are detected with a transposition table which maps the
+compact key of a state (see model_physics.State.getKey) to the number
+of steps needed to reach it and how it has been reached.
+
+The length of a solution is the number of counted steps, pipe and helium
+jumps are free. The heuristic is the number of horizontal steps which are
+needed to visit all columns which still contain something to eat (and the
+door). It is admissible because only normal steps change the column of the
+cat and objects to eat can not be pushed, therefore A* finds a shortest
+solution.
+
+A level is solved if everything to eat has been eaten and the cat has
+stepped on the door (if there is a door). Objects to move are not part of
+the goal because model_physics does not know how they are combined.
+The solution is as correct as the rules implemented in model_physics.
+'''
+
+# standard libraries
+import sys
+import time
+import heapq
+import itertools
+
+# other libraries
+import model
+import model_physics as physics
+import model_object_catalog as objects
+
+
+STATUS_NOT_STARTED = 'not started'
+STATUS_SOLVED      = 'solved'
+STATUS_UNSOLVABLE  = 'unsolvable'
+STATUS_TIMEOUT     = 'timeout'
+STATUS_OUT_OF_MEMORY = 'out of memory'
+
+FOOD = physics.createTable(objects.CATEGORY_TO_EAT)
+FOOD_BYTES = bytes(bytearray(objects.CATEGORY_TO_EAT))
+
+NORMAL_STEPS = (model.Solution.STEP_LEFT, model.Solution.STEP_RIGHT, model.Solution.STEP_UP, model.Solution.STEP_DOWN)
+PIPE_JUMP = model.PipeJump()
+HELIUM_JUMPS = tuple(model.HeliumJump(-dy) for dy in range(1, physics.ROWS))
+
+
+def countSteps(steps):
+    '''returns the number of steps which are not uncounted jumps'''
+    return sum(1 for step in steps if not step.isUncountedJump())
+
+
+class Solver(object):
+
+    DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+    DEFAULT_TIME_BUDGET = 60.0
+
+    # the time is checked every time this number of nodes has been expanded
+    CHECK_INTERVAL = 1000
+
+    def __init__(self, model, maxMemory=DEFAULT_MAX_MEMORY, timeBudget=DEFAULT_TIME_BUDGET):
+        '''model: the level to be solved. it is not changed unless writeSolution is called.
+        maxMemory: approximate upper limit of the memory used by the search in bytes.
+        timeBudget: upper limit of the duration of the search in seconds.'''
+        self.model = model
+        self.maxMemory = maxMemory
+        self.timeBudget = timeBudget
+
+        start = model.getStartField()
+        assert start[0] != None
+        self._simulator = physics.Simulator(model.board, start)
+        self._end = model.getEndField()
+
+        # solutions with a higher number of counted steps are not searched, None for no limit
+        self.maxCost = None
+
+        self.status = STATUS_NOT_STARTED
+        self.steps = None
+        self.nodesExpanded = 0
+        self.nodesGenerated = 0
+        self.tableSize = 0
+        self.duration = 0.0
+
+
+    # ---------- search ----------
+
+    def solve(self):
+        '''returns the list of steps of a shortest solution or None.
+        self.status tells why no solution has been found.'''
+        t0 = time.time()
+        try:
+            self.steps = self._search(t0, self._getInitialState())
+        finally:
+            self.duration = time.time() - t0
+        return self.steps
+
+    def _getInitialState(self):
+        return self._simulator.getState(0)
+
+    def _search(self, t0, state):
+        key = state.getKey()
+        maxCost = self.maxCost
+        maxNodes = max(1, self.maxMemory // self._estimateBytesPerNode(state, key))
+
+        # key -> (number of steps, key of previous state, step)
+        table = {key: (0, None, None)}
+        counter = itertools.count()
+        h, food = self._heuristic(state, None)
+        # (f, -g, tie breaker, g, state, key, food)
+        openList = [(h, 0, next(counter), 0, state, key, food)]
+        self.nodesGenerated = 1
+
+        while openList:
+            f, _dummy, _dummy, g, state, key, food = heapq.heappop(openList)
+            if table[key][0] < g:
+                # a shorter way to this state has been found after it has been added
+                continue
+
+            if self._isGoal(state, key, food):
+                self.status = STATUS_SOLVED
+                self.tableSize = len(table)
+                return self._reconstructSteps(table, key)
+
+            self.nodesExpanded += 1
+            if self.nodesExpanded % self.CHECK_INTERVAL == 0:
+                if time.time() - t0 > self.timeBudget:
+                    self.status = STATUS_TIMEOUT
+                    self.tableSize = len(table)
+                    return None
+
+            if state.hasLeft:
+                # the door has been reached too early
+                continue
+
+            for step, cost, successor in self._iterSuccessors(state):
+                g1 = g + cost
+                key1 = successor.getKey()
+                entry = table.get(key1)
+                if entry != None and entry[0] <= g1:
+                    continue
+                h1, food1 = self._heuristic(successor, food)
+                if maxCost != None and g1 + h1 > maxCost:
+                    continue
+                table[key1] = (g1, key, step)
+                heapq.heappush(openList, (g1 + h1, -g1, next(counter), g1, successor, key1, food1))
+                self.nodesGenerated += 1
+
+            if len(table) > maxNodes:
+                self.status = STATUS_OUT_OF_MEMORY
+                self.tableSize = len(table)
+                return None
+
+        self.status = STATUS_UNSOLVABLE
+        self.tableSize = len(table)
+        return None
+
+    def _iterSuccessors(self, state):
+        '''yields (step, cost, state after step) for all steps which do not kill or block the cat'''
+        simulator = self._simulator
+        for step in NORMAL_STEPS:
+            successor = state.copy()
+            if simulator.performStep(successor, step) == None:
+                yield step, 1, successor
+
+        if state.pipes > 0:
+            successor = state.copy()
+            if simulator.performStep(successor, PIPE_JUMP) == None:
+                yield PIPE_JUMP, 0, successor
+
+        for step in HELIUM_JUMPS:
+            successor = state.copy()
+            failure = simulator.performStep(successor, step)
+            if failure == None:
+                yield step, 0, successor
+            elif failure[1] in (physics.REASON_NO_HELIUM, physics.REASON_OUTSIDE, physics.REASON_OBSTACLE):
+                # a longer jump is not possible either
+                break
+
+    def _reconstructSteps(self, table, key):
+        steps = list()
+        while True:
+            g, key, step = table[key]
+            if step == None:
+                break
+            steps.append(step)
+        steps.reverse()
+        return steps
+
+
+    # ---------- goal & heuristic ----------
+
+    def _isGoal(self, state, key, food):
+        if food[0] > 0:
+            return False
+        if self._end[0] != None:
+            return state.hasLeft
+        return True
+
+    def _heuristic(self, state, food):
+        '''returns (h, food) where food is (number of objects to eat, columns containing them).
+        food of the previous state is used to check only columns which can contain something to eat.'''
+        fields = state.fields
+        number = physics.SIZE - len(fields.translate(None, FOOD_BYTES))
+        if food == None:
+            columns = tuple(x for x in range(physics.COLS) if self._hasFood(fields, x))
+        elif number != food[0]:
+            columns = tuple(x for x in food[1] if self._hasFood(fields, x))
+        else:
+            columns = food[1]
+        food = (number, columns)
+
+        if self._end[0] != None:
+            columns = columns + (self._end[0],)
+        if not columns:
+            return 0, food
+        x = state.cat % physics.COLS
+        left = min(columns)
+        right = max(columns)
+        h = right - left + min(abs(x - left), abs(x - right))
+        return h, food
+
+    @staticmethod
+    def _hasFood(fields, x):
+        for i in range(x, physics.SIZE, physics.COLS):
+            if FOOD[fields[i]]:
+                return True
+        return False
+
+    @staticmethod
+    def _estimateBytesPerNode(state, key):
+        # the table entry, the state in the open list and the overhead of dict and heap
+        return sys.getsizeof(key) + sys.getsizeof(state.fields) + 3 * 64 + 200
+
+
+    # ---------- statistics & output ----------
+
+    def getNodesPerSecond(self):
+        if self.duration <= 0:
+            return float('inf')
+        return self.nodesExpanded / self.duration
+
+    def getNumberCountedSteps(self):
+        if self.steps == None:
+            return None
+        return countSteps(self.steps)
+
+    def writeSolution(self):
+        '''replaces the solution of the model by the solution which has been found.
+        the model can then be saved with Model.writeCopy.'''
+        assert self.steps != None
+        solution = self.model.getSolution()
+        solution.init(self.model)
+        solution.setSteps(self.steps)
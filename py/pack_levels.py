@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""
+Command line tool to convert between level files and level packs.
+
+    python pack_levels.py create PACK [PATH ...]
+        reads all level files (see validate_levels.iterTasks)
+        and writes them into one level pack.
+    python pack_levels.py extract PACK DIRECTORY
+        writes every level of a pack as a level file into DIRECTORY.
+        the files are named like the files they have been created from.
+
+A level of a pack can be opened directly with Model.readFile,
+see model_level_pack for the file format.
+
+This tool does not open a window. It does not need a display.
+"""
+
+# standard libraries
+import os
+import sys
+import logging
+import argparse
+
+# other libraries
+import model
+import model_level_pack
+import validate_levels
+import locales
+_ = locales._
+
+
+def createPack(packFfn, paths, log):
+    '''returns the number of levels written to packFfn.
+    files which can not be read without errors are skipped.'''
+    levels = list()
+    for ffn in validate_levels.iterTasks(paths):
+        m = model.Model()
+        messages = list()
+        if m.readFile(ffn, lambda lv, msg: messages.append((lv, msg))) >= logging.ERROR:
+            for lv, msg in messages:
+                log(lv, u"{ffn}: {msg}".format(ffn=ffn, msg=msg))
+            log(logging.ERROR, _("{ffn}: skipped").format(ffn=ffn))
+            continue
+        levels.append(m.toPackedLevel())
+    return model_level_pack.writePack(packFfn, levels)
+
+def extractPack(packFfn, path, log):
+    '''returns the number of level files written to path'''
+    n = 0
+    with model_level_pack.LevelPack(packFfn) as pack:
+        for i in range(len(pack)):
+            m = model.Model()
+            m.readPackedLevel(pack.getLevel(i), log)
+            name = pack.getName(i) or u"%04d%s" % (i, model.Model.EXT_TASK)
+            m.writeCopy(os.path.join(path, name))
+            n += 1
+    return n
+
+
+def main(args=None):
+    p = argparse.ArgumentParser(description=_("Convert between Irre Katze level files and level packs."))
+    sub = p.add_subparsers(dest='command')
+    sub.required = True
+
+    pCreate = sub.add_parser('create', help=_("write level files into a level pack"))
+    pCreate.add_argument('pack', metavar='PACK',
+        help=_("the level pack to be written"))
+    pCreate.add_argument('paths', nargs='*', metavar='PATH', default=validate_levels.DEFAULT_PATHS,
+        help=_("level files or directories containing level files"))
+
+    pExtract = sub.add_parser('extract', help=_("write the levels of a level pack as level files"))
+    pExtract.add_argument('pack', metavar='PACK',
+        help=_("the level pack to be read"))
+    pExtract.add_argument('output', metavar='DIRECTORY',
+        help=_("the directory where the level files are saved"))
+    args = p.parse_args(args)
+
+    errors = list()
+    def log(lv, msg):
+        if lv >= logging.ERROR:
+            errors.append(msg)
+        sys.stderr.write(u"[{levelname:<8}] {msg}\n".format(levelname=logging.getLevelName(lv), msg=msg))
+
+    if args.command == 'create':
+        n = createPack(args.pack, args.paths, log)
+        sys.stdout.write(_("wrote {n} levels to {ffn}").format(n=n, ffn=args.pack) + "\n")
+    else:
+        n = extractPack(args.pack, args.output, log)
+        sys.stdout.write(_("wrote {n} level files to {path}").format(n=n, path=args.output) + "\n")
+
+    if errors:
+        return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+Command line tool to shorten the stored solutions of many level files.
+
+The levels are processed one after another, the segments of every
+solution are searched in parallel by a pool of worker processes
+(see model_shortener). For every level the number of saved steps and
+the wall time is printed.
+
+The shortened levels are saved in the output directory if one is given.
+The original files are never changed.
+
+This tool does not open a window. It does not need a display.
+"""
+
+# standard libraries
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+# other libraries
+import model
+import model_solver
+import model_shortener
+import validate_levels
+import locales
+_ = locales._
+
+
+RESULT_FORMAT = u"{ffn}: {before} -> {after} steps ({saved} saved in {shortened}/{segments} segments, {t:.1f}s)"
+
+
+def shortenFile(ffn, pool, args):
+    m = model.Model()
+    log = lambda lv, msg: None
+    m.readFile(ffn, log)
+    m.getSolution().init(m)
+
+    shortener = model_shortener.Shortener(m, pool=pool,
+        segmentLength = args.segment_length,
+        maxMemory = args.max_memory * 1024 * 1024,
+        timeBudget = args.time_budget,
+    )
+    shortener.shorten()
+
+    if args.output != None and shortener.getNumberSavedSteps() > 0:
+        m.writeCopy(os.path.join(args.output, os.path.split(ffn)[1]))
+
+    return shortener
+
+
+def main(args=None):
+    p = argparse.ArgumentParser(description=_("Shorten the solutions of Irre Katze level files."))
+    p.add_argument('paths', nargs='*', metavar='PATH', default=validate_levels.DEFAULT_PATHS,
+        help=_("level files or directories containing level files"))
+    p.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+        help=_("number of worker processes (default: number of cpus)"))
+    p.add_argument('-l', '--segment-length', type=int, default=model_shortener.Shortener.SEGMENT_LENGTH,
+        help=_("maximum number of steps which are replaced at once (default: %(default)s)"))
+    p.add_argument('-t', '--time-budget', type=float, default=model_solver.Solver.DEFAULT_TIME_BUDGET,
+        help=_("maximum number of seconds per segment (default: %(default)s)"))
+    p.add_argument('-m', '--max-memory', type=int, default=model_solver.Solver.DEFAULT_MAX_MEMORY // (1024*1024),
+        help=_("approximate maximum memory per segment in MiB (default: %(default)s)"))
+    p.add_argument('-o', '--output', metavar='DIRECTORY',
+        help=_("save shortened levels in this directory"))
+    args = p.parse_args(args)
+
+    if args.jobs > 1:
+        pool = multiprocessing.Pool(processes=args.jobs)
+    else:
+        pool = None
+
+    numberFiles = 0
+    numberSaved = 0
+    numberErrors = 0
+    t0 = time.time()
+    try:
+        for ffn in validate_levels.iterTasks(args.paths):
+            numberFiles += 1
+            try:
+                shortener = shortenFile(ffn, pool, args)
+            except Exception as e:
+                numberErrors += 1
+                sys.stdout.write(u"{ffn}: {msg}\n".format(ffn=ffn, msg=_("error: {error!r}").format(error=e)))
+                continue
+            numberSaved += shortener.getNumberSavedSteps()
+            sys.stdout.write(RESULT_FORMAT.format(
+                ffn = ffn,
+                before = shortener.numberStepsBefore,
+                after = shortener.numberStepsAfter,
+                saved = shortener.getNumberSavedSteps(),
+                shortened = shortener.numberShortenedSegments,
+                segments = shortener.numberSegments,
+                t = shortener.duration,
+            ) + "\n")
+            sys.stdout.flush()
+    finally:
+        if pool != None:
+            pool.terminate()
+            pool.join()
+    t1 = time.time()
+
+    sys.stdout.write(_("saved {saved} steps in {n} files in {t:.1f}s with {jobs} process(es)").format(
+        saved = numberSaved,
+        n = numberFiles,
+        t = t1 - t0,
+        jobs = args.jobs,
+    ) + "\n")
+
+    if numberErrors > 0:
+        return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
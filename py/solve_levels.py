@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+Command line tool to search shortest solutions for many level files at once.
+
+Every file is solved with model_solver.Solver. The files are distributed
+over a pool of worker processes like in validate_levels. The time budget
+and the memory limit apply to every single file.
+
+If an output directory is given the solved levels are saved there
+(including the solution which has been found). The original files are
+never changed.
+
+This tool does not open a window. It does not need a display.
+"""
+
+# standard libraries
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+# other libraries
+import model
+import model_solver
+import validate_levels
+import locales
+_ = locales._
+
+
+RESULT_FORMAT = u"{ffn}: {status} ({steps} steps, {nodes} nodes, {rate:.0f} nodes/s, {t:.1f}s)"
+
+
+# ---------- worker ----------
+
+def solveFile(task):
+    '''task: (ffn, maxMemory, timeBudget, outputPath)
+    returns (ffn, status, numberSteps, nodesExpanded, nodesPerSecond, duration)'''
+    ffn, maxMemory, timeBudget, outputPath = task
+    m = model.Model()
+    log = lambda lv, msg: None
+    try:
+        m.readFile(ffn, log)
+        solver = model_solver.Solver(m, maxMemory=maxMemory, timeBudget=timeBudget)
+        solver.solve()
+    except Exception as e:
+        return ffn, _("error: {error!r}").format(error=e), None, 0, 0.0, 0.0
+
+    if solver.status == model_solver.STATUS_SOLVED and outputPath != None:
+        solver.writeSolution()
+        m.writeCopy(os.path.join(outputPath, os.path.split(ffn)[1]))
+
+    return ffn, solver.status, solver.getNumberCountedSteps(), solver.nodesExpanded, solver.getNodesPerSecond(), solver.duration
+
+
+def iterResults(tasks, jobs):
+    if jobs == 1:
+        for task in tasks:
+            yield solveFile(task)
+        return
+
+    pool = multiprocessing.Pool(processes=jobs)
+    try:
+        for result in pool.imap_unordered(solveFile, tasks):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# ---------- main ----------
+
+def main(args=None):
+    p = argparse.ArgumentParser(description=_("Search shortest solutions for Irre Katze level files."))
+    p.add_argument('paths', nargs='*', metavar='PATH', default=validate_levels.DEFAULT_PATHS,
+        help=_("level files or directories containing level files"))
+    p.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+        help=_("number of worker processes (default: number of cpus)"))
+    p.add_argument('-t', '--time-budget', type=float, default=model_solver.Solver.DEFAULT_TIME_BUDGET,
+        help=_("maximum number of seconds per level (default: %(default)s)"))
+    p.add_argument('-m', '--max-memory', type=int, default=model_solver.Solver.DEFAULT_MAX_MEMORY // (1024*1024),
+        help=_("approximate maximum memory per level in MiB (default: %(default)s)"))
+    p.add_argument('-o', '--output', metavar='DIRECTORY',
+        help=_("save solved levels with the solution in this directory"))
+    args = p.parse_args(args)
+
+    maxMemory = args.max_memory * 1024 * 1024
+    tasks = [(ffn, maxMemory, args.time_budget, args.output) for ffn in validate_levels.iterTasks(args.paths)]
+    jobs = max(1, min(args.jobs, len(tasks)))
+
+    numberFiles = 0
+    numberSolved = 0
+    nodes = 0
+    t0 = time.time()
+    for ffn, status, numberSteps, nodesExpanded, nodesPerSecond, duration in iterResults(tasks, jobs):
+        numberFiles += 1
+        nodes += nodesExpanded
+        if status == model_solver.STATUS_SOLVED:
+            numberSolved += 1
+        sys.stdout.write(RESULT_FORMAT.format(ffn=ffn, status=status, steps=numberSteps, nodes=nodesExpanded, rate=nodesPerSecond, t=duration) + "\n")
+        sys.stdout.flush()
+    t1 = time.time()
+
+    sys.stdout.write(_("solved {solved} of {n} files in {t:.1f}s with {jobs} process(es), {nodes} nodes expanded").format(
+        solved = numberSolved,
+        n = numberFiles,
+        t = t1 - t0,
+        jobs = jobs,
+        nodes = nodes,
+    ) + "\n")
+
+    if numberSolved < numberFiles:
+        return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+"""
+Measures where the time is spent while the level editor is starting.
+
+It is enabled with the command line option --profile-startup. It must be
+imported before any other module of this program so that it can measure
+the imports:
+
+    import startup_profiler as profiler
+    profiler.init(sys.argv)
+
+Every module which is imported for the first time is recorded with the
+wall time of it's import (including the modules it imports, which are
+listed below it with a deeper indentation). Phases of the initialization
+are recorded with mark(name), the duration of a phase is the time since
+the previous mark. report() prints everything.
+
+If the profiler is not enabled all functions do nothing.
+"""
+
+# standard libraries
+import sys
+import time
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+
+OPTION = '--profile-startup'
+
+TIME_START = time.time()
+
+KIND_IMPORT = 'import'
+KIND_PHASE  = 'phase'
+
+REPORT_FORMAT = u"{t:8.1f} ms  {indentation}{kind} {name}"
+
+_enabled = False
+_originalImport = None
+_depth = 0
+_lastMark = TIME_START
+# (kind, name, depth, duration in seconds) in the order in which they have been started
+_records = list()
+
+
+def init(argv):
+    '''enables the profiler if OPTION is in argv. the option is removed from argv.'''
+    global _enabled, _originalImport
+    if OPTION not in argv:
+        return
+    argv.remove(OPTION)
+    _enabled = True
+    _originalImport = builtins.__import__
+    builtins.__import__ = _import
+
+def isEnabled():
+    return _enabled
+
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    if level > 0 or name in sys.modules:
+        # relative imports happen inside of packages which are measured as a whole
+        return _originalImport(name, globals, locals, fromlist, level)
+
+    record = [KIND_IMPORT, name, _depth, None]
+    _records.append(record)
+    _depth += 1
+    t0 = time.time()
+    try:
+        return _originalImport(name, globals, locals, fromlist, level)
+    finally:
+        record[3] = time.time() - t0
+        _depth -= 1
+
+
+def mark(name):
+    '''records the time since the previous mark (or the start) as phase name'''
+    global _lastMark
+    if not _enabled:
+        return
+    now = time.time()
+    _records.append([KIND_PHASE, name, _depth, now - _lastMark])
+    _lastMark = now
+
+
+def report(out=None, totalName="total"):
+    '''prints the durations of all imports and phases and the total time since the start to out (default: stderr).
+    totalName: how the total time is labeled, e.g. "time to interactive" if called when the main loop is idle for the first time'''
+    if not _enabled:
+        return
+    if out == None:
+        out = sys.stderr
+    for kind, name, depth, duration in _records:
+        out.write(REPORT_FORMAT.format(t=duration*1000, indentation="  "*depth, kind=kind, name=name) + "\n")
+    out.write(REPORT_FORMAT.format(t=(time.time()-TIME_START)*1000, indentation="", kind=totalName, name="") + "\n")
@@ -1,7 +1,78 @@
 #!/usr/bin/env python
 
+import os
+import sys
+import shutil
+import random
+import tempfile
+import subprocess
 import unittest
+import logging
 import model
+import model_history
+import model_physics
+import model_solver
+import model_shortener
+import model_bitboard
+import model_level_pack
+import model_catalog_cache
+import model_object_catalog as objects
+import validate_levels
+import gui_image_opener
+import model_background_catalog as backgrounds
+
+
+class ValidateLevelsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+        m = model.Model()
+        m.setField(0, 9, model.Model.FLD_START)
+        m.setField(5, 9, 65)
+        m.setField(17, 9, model.Model.FLD_END)
+        m.setAuthor("someone")
+        solution = m.getSolution()
+        solution.init(m)
+        solution.setSteps([model.Solution.STEP_RIGHT] * 17)
+        self.valid = os.path.join(self.path, "valid" + model.Model.EXT_TASK)
+        m.writeCopy(self.valid)
+
+        # no start field
+        m = model.Model()
+        m.setField(3, 4, 37)
+        self.broken = os.path.join(self.path, "broken" + model.Model.EXT_TASK)
+        m.writeCopy(self.broken)
+
+        # not a level file, must be ignored when the directory is checked
+        with open(os.path.join(self.path, "notes.txt"), 'w') as f:
+            f.write("no level")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def testIterTasks(self):
+        self.assertEqual(list(validate_levels.iterTasks([self.path])), [self.broken, self.valid])
+
+    def checkResults(self, jobs):
+        results = dict((ffn, (maxLogLevel, messages)) for ffn, maxLogLevel, messages in validate_levels.iterResults([self.valid, self.broken], jobs))
+        self.assertEqual(results[self.valid], (model.LOGLEVEL_NONE, []))
+        maxLogLevel, messages = results[self.broken]
+        self.assertEqual(maxLogLevel, logging.ERROR)
+        self.assertTrue(any(lv >= logging.ERROR for lv, msg in messages))
+
+    def testOneProcess(self):
+        self.checkResults(jobs=1)
+
+    def testPool(self):
+        self.checkResults(jobs=2)
+
+    def testExitStatus(self):
+        self.assertEqual(validate_levels.main(["-j", "1", self.valid]), 0)
+        self.assertEqual(validate_levels.main(["-j", "1", self.path]), 1)
+        self.assertEqual(validate_levels.main(["-j", "2", self.valid, self.valid]), 0)
+        self.assertEqual(validate_levels.main(["-j", "2", self.path]), 1)
+
 
 
 class CursorTest(unittest.TestCase):
@@ -29,12 +100,1012 @@ class CursorTest(unittest.TestCase):
         self.cursors.remove(cursor)
         self.assertEqual(len(self.cursors), 0)
 
+    def testContains(self):
+        self.cursors.append((1,2))
+        self.assertIn((1,2), self.cursors)
+        self.assertNotIn((2,1), self.cursors)
+        self.cursors.remove((1,2))
+        self.assertNotIn((1,2), self.cursors)
+
+    def testContainsDouble(self):
+        cursor = (0,0)
+        self.cursors.append(cursor)
+        self.cursors.append(cursor)
+        self.cursors.remove(cursor)
+        self.assertIn(cursor, self.cursors)
+
+    def testIndex(self):
+        for x in range(5):
+            self.cursors.append((x,0))
+        self.assertEqual(self.cursors.index((3,0)), 3)
+        self.cursors.remove((1,0))
+        self.assertEqual(self.cursors.index((3,0)), 2)
+        self.cursors.append((0,0))
+        self.assertEqual(self.cursors.index((0,0)), 0)
+        self.assertRaises(ValueError, self.cursors.index, (1,0))
+
+    def testSetItem(self):
+        self.cursors.append((0,0))
+        self.cursors.append((1,0))
+        self.cursors[0] = (1,0)
+        self.assertNotIn((0,0), self.cursors)
+        self.assertEqual(self.cursors.index((1,0)), 0)
+        self.cursors[1] = (2,0)
+        self.assertEqual(list(self.cursors), [(1,0), (2,0)])
+
+    def testSetLast(self):
+        for x in range(3):
+            self.cursors.append((x,0))
+        self.cursors.setLast((0,0))
+        self.assertEqual(list(self.cursors), [(1,0), (2,0), (0,0)])
+
     def tearDown(self):
-        self.assertEqual(len(self.cursors), len(self.cursors._orderLeftToRight))
-        self.assertEqual(len(self.cursors), len(self.cursors._orderTopToBottom))
-        
-        self.assertEqual(sorted(self.cursors._orderLeftToRight), range(len(self.cursors)))
-        self.assertEqual(sorted(self.cursors._orderTopToBottom), range(len(self.cursors)))
+        counts = dict()
+        for c in self.cursors._cursors:
+            counts[c] = counts.get(c, 0) + 1
+        self.assertEqual(self.cursors._counts, counts)
+
+        for c in self.cursors:
+            self.assertEqual(self.cursors.index(c), self.cursors._cursors.index(c))
+
+
+
+class BoardIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(3, 9, 65)
+        self.model.setField(4, 2, 65)
+        self.model.setField(17, 0, model.Model.FLD_END)
+
+    def assertIndexIsConsistent(self):
+        m = self.model
+        for value in set(m.board):
+            expected = [(x,y) for x in range(m.COLS) for y in range(m.ROWS) if m.getField(x,y) == value]
+            self.assertEqual(list(m.findAll(value)), expected)
+            self.assertEqual(m.find(value), expected[0])
+            self.assertEqual(m.count(value), len(expected))
+
+    def testSetField(self):
+        self.assertEqual(self.model.find(65), (3,9))
+        self.model.setField(3, 9, model.Model.FLD_EMPTY)
+        self.assertEqual(self.model.find(65), (4,2))
+        self.assertIndexIsConsistent()
+
+    def testMoveAndSwap(self):
+        self.model.cursors.append((3,9))
+        self.model.cursors.append((4,2))
+        self.model.moveFieldRight()
+        self.model.swapFieldUp()
+        self.model.moveFieldToLeft()
+        self.assertIndexIsConsistent()
+
+    def testPaste(self):
+        self.model.cursors.append((3,9))
+        self.model.copy()
+        self.model.cursors.clear()
+        self.model.cursors.append((10,5))
+        self.model.paste(pasteEmpty=True)
+        self.assertEqual(self.model.count(65), 3)
+        self.assertIndexIsConsistent()
+
+    def testUndoRedo(self):
+        self.model.setField(3, 9, model.Model.FLD_EMPTY)
+        self.model.undo()
+        self.assertEqual(self.model.count(65), 2)
+        self.assertIndexIsConsistent()
+        self.model.redo()
+        self.assertEqual(self.model.count(65), 1)
+        self.assertIndexIsConsistent()
+
+
+
+class ForbiddenFieldsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(5, 5, 58)
+
+    def testCacheIsInvalidatedByChange(self):
+        self.assertEqual(self.model.getForbiddenFields(), frozenset([(5,5)]))
+        self.model.setField(6, 5, 58)
+        self.assertEqual(self.model.getForbiddenFields(), frozenset([(5,5), (6,5)]))
+        self.model.setField(0, 0, 106)
+        self.assertEqual(self.model.getForbiddenFields(), frozenset())
+
+    def testCacheIsInvalidatedByUndo(self):
+        self.model.setField(6, 5, 58)
+        self.assertIn((6,5), self.model.getForbiddenFields())
+        self.model.undo()
+        self.assertNotIn((6,5), self.model.getForbiddenFields())
+
+    def testCacheIsInvalidatedWithDisabledNotifications(self):
+        self.assertNotIn((7,5), self.model.getForbiddenFields())
+        self.model.cursors.append((5,5))
+        self.model.swapFieldToRight()
+        self.assertEqual(self.model.getForbiddenFields(), frozenset([(17,5)]))
+
+
+
+class FullHistoryModel(model.Model):
+    USE_DELTA_HISTORY = False
+
+class DeltaHistoryTest(unittest.TestCase):
+
+    OBJECTS = (model.Model.FLD_EMPTY, model.Model.FLD_START, 65, 66, 58)
+
+    def setUp(self):
+        self.random = random.Random(0)
+
+    def randomChange(self, models):
+        x = self.random.randrange(model.Model.COLS)
+        y = self.random.randrange(model.Model.ROWS)
+        value = self.random.choice(self.OBJECTS)
+        for m in models:
+            m.setField(x, y, value)
+
+    def assertSameState(self, m0, m1):
+        self.assertEqual(m0.board, m1.board)
+        self.assertEqual(m0.hasChanged(), m1.hasChanged())
+
+    def testSameAsFullHistory(self):
+        full = FullHistoryModel()
+        delta = model.Model()
+        self.assertIsInstance(delta.history, model_history.DeltaHistory)
+        models = (full, delta)
+        for i in range(25):
+            for j in range(self.random.randrange(1, 10)):
+                self.randomChange(models)
+            for j in range(self.random.randrange(5)):
+                self.assertEqual(full.history.undo(), delta.history.undo())
+                self.assertSameState(full, delta)
+            for j in range(self.random.randrange(3)):
+                self.assertEqual(full.history.redo(), delta.history.redo())
+                self.assertSameState(full, delta)
+
+    def testMemoryLimit(self):
+        m = model.Model()
+        m.history.maxMemory = 5000
+        for i in range(200):
+            self.randomChange((m,))
+        self.assertLessEqual(m.history.getMemory(), 5000)
+        self.assertGreater(len(m.history), 2)
+
+        boards = list()
+        while True:
+            boards.append(m.board.copy())
+            if not m.history.undo():
+                break
+        for board in reversed(boards[:-1]):
+            self.assertTrue(m.history.redo())
+            self.assertEqual(m.board, board)
+
+    def testSolution(self):
+        m = model.Model()
+        m.setField(0, 9, model.Model.FLD_START)
+        m.setField(5, 9, 65)
+        solution = m.getSolution()
+        solution.init(m)
+        states = [list(solution.iterSteps())]
+        for step in (solution.STEP_RIGHT, solution.STEP_RIGHT, solution.STEP_UP, solution.STEP_DOWN):
+            solution.insertStep(step)
+            states.append(list(solution.iterSteps()))
+        solution.moveCursorTo(2)
+        solution.deleteStepAbove()
+        for expected in reversed(states):
+            self.assertTrue(solution.history.undo())
+            self.assertEqual(list(solution.iterSteps()), expected)
+            self.assertEqual(len(solution.iterCoordinates()), len(expected))
+        self.assertFalse(solution.history.undo())
+
+    def testMergeSplices(self):
+        for i in range(200):
+            original = [self.random.randrange(5) for j in range(self.random.randrange(10))]
+            value = list(original)
+            pending = None
+            for j in range(self.random.randrange(1, 4)):
+                start = self.random.randint(0, len(value))
+                stop = self.random.randint(start, len(value))
+                items = [self.random.randrange(5) for k in range(self.random.randrange(4))]
+                value[start:stop] = items
+                pending = model_history.mergeSplices(pending, start, stop, start + len(items))
+            start, oldStop, curStop = pending
+            mirror = list(original)
+            model_history._Splice(start, oldStop, value[start:curStop]).apply(mirror)
+            self.assertEqual(mirror, value)
+
+    def createSolution(self, cls):
+        m = model.Model()
+        m.setField(0, 9, model.Model.FLD_START)
+        solution = cls()
+        solution.init(m)
+        solution.history.clear()
+        solution.history.makeBackup()
+        return solution
+
+    def testSolutionReportedChanges(self):
+        class FullHistorySolution(model.Solution):
+            USE_DELTA_HISTORY = False
+        full = self.createSolution(FullHistorySolution)
+        delta = self.createSolution(model.Solution)
+        steps = (model.Solution.STEP_RIGHT, model.Solution.STEP_LEFT, model.Solution.STEP_UP)
+
+        # the reported changes are used, the steps are not compared
+        originalDiff = model_history.diff
+        diffCalls = list()
+        def countingDiff(old, new):
+            diffCalls.append(len(new))
+            return originalDiff(old, new)
+        model_history.diff = countingDiff
+        try:
+            for i in range(100):
+                n = len(full.iterSteps())
+                i0 = self.random.randint(0, n)
+                i1 = self.random.randint(i0, min(n, i0 + 3))
+                new = [self.random.choice(steps) for j in range(self.random.randrange(4))]
+                for solution in (full, delta):
+                    solution.replaceSteps(i0, i1, new)
+                if self.random.randrange(4) == 0:
+                    for j in range(self.random.randrange(1, 4)):
+                        self.assertEqual(full.history.undo(), delta.history.undo())
+                        self.assertEqual(list(full.iterSteps()), list(delta.iterSteps()))
+                    for j in range(self.random.randrange(3)):
+                        self.assertEqual(full.history.redo(), delta.history.redo())
+                        self.assertEqual(list(full.iterSteps()), list(delta.iterSteps()))
+        finally:
+            model_history.diff = originalDiff
+        self.assertEqual(diffCalls, [])
+
+        # the full history keeps fewer entries
+        while full.history.undo():
+            self.assertTrue(delta.history.undo())
+            self.assertEqual(list(full.iterSteps()), list(delta.iterSteps()))
+
+    def testReplacedObject(self):
+        m = model.Model()
+        m.setField(1, 1, 65)
+        board = m.board.copy()
+        m.board = m.board.copy()
+        m.board[:] = bytes(bytearray(model.Model.COLS * model.Model.ROWS))
+        m.onChange(m.CHANGE_ALL)
+        self.assertTrue(m.history.undo())
+        self.assertEqual(m.board, board)
+
+
+
+class SolutionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.random = random.Random(1)
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(5, 9, 65)
+        self.model.setField(9, 9, model.Model.FLD_PIPE)
+        self.model.setField(17, 0, model.Model.FLD_END)
+        self.solution = self.model.getSolution()
+        self.solution.init(self.model)
+
+    def assertCacheIsConsistent(self):
+        s = self.solution
+        cors = list()
+        viewCors = [s._start]
+        flipped = list()
+        cor = s._start
+        isFlipped = False
+        for step in s.iterSteps():
+            cor = step.jump(*cor)
+            if isinstance(step, model.PipeJump):
+                isFlipped = not isFlipped
+            viewCors.append(s.COR_END if self.model.isEndField(cor, isFlipped) else cor)
+            if not step.isUncountedJump():
+                cors.append(cor)
+                flipped.append(isFlipped)
+        self.assertEqual(len(s), len(cors))
+        self.assertEqual(list(s.iterCoordinates()), cors)
+        self.assertEqual(list(s.iterIsFlipped()), flipped)
+        self.assertEqual(list(s.iterViewCoordinates()), viewCors)
+        pipes = sum(1 for step in s.iterSteps()[:s.getCursorMain()] if isinstance(step, model.PipeJump))
+        self.assertEqual(bool(s.isFlipped()), bool(pipes % 2))
+
+        boardCors = [s._start]
+        cor = s._start
+        isFlipped = False
+        for step in s.iterSteps()[:s.getCursorMain()]:
+            if isinstance(step, model.PipeJump):
+                isFlipped = not isFlipped
+            elif isFlipped:
+                cor = step.flip().jump(*cor)
+            else:
+                cor = step.jump(*cor)
+            boardCors.append(cor)
+        self.assertEqual(s.getBoardCoordinates(), boardCors)
+        self.assertEqual(s.getBoardCoordinate(s.getCursorMain()), boardCors[-1])
+        self.assertEqual(set(s.getVisitedFields()), set(boardCors))
+
+        self.assertEqual(set(s.getStepKinds()), set(s.getStepKind(step) for step in s.iterSteps()))
+        self.assertEqual(s.getNumberCountedSteps(), len(cors))
+
+    def testRandomEdits(self):
+        s = self.solution
+        steps = (s.STEP_UP, s.STEP_DOWN, s.STEP_LEFT, s.STEP_RIGHT, s.STEP_RIGHT, model.PipeJump(), model.HeliumJump(-2))
+        for i in range(300):
+            r = self.random.random()
+            if r < 0.5:
+                s.insertStep(self.random.choice(steps))
+            elif r < 0.6:
+                s.deleteStepAbove()
+            elif r < 0.7:
+                s.deleteStepBelow()
+            elif r < 0.8:
+                s.moveCursorTo(self.random.randint(s.getCursorMin(), s.getCursorMax()))
+            elif r < 0.85:
+                s.expandCursorTo(self.random.randint(s.getCursorMin(), s.getCursorMax()))
+            elif r < 0.95:
+                s.history.undo()
+            else:
+                s.history.redo()
+            self.assertCacheIsConsistent()
+
+    def testFirstChangedStep(self):
+        s = self.solution
+        changed = list()
+        s.addOnStepsChangeListener(lambda: changed.append(s.getFirstChangedStepIndex()))
+        for i in range(5):
+            s.insertStep(s.STEP_RIGHT)
+        s.moveCursorTo(2)
+        s.deleteStepBelow()
+        s.history.undo()
+        self.assertEqual(changed, [0, 1, 2, 3, 4, 2, 0])
+        self.assertEqual(s.getFirstChangedStepIndex(), 0)
+
+
+
+class PhysicsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(2, 9, 65)
+        self.model.setField(4, 2, 65)
+        self.model.setField(6, 9, 37)
+        self.model.setField(9, 9, model.Model.FLD_PIPE)
+        self.model.setField(12, 9, model.Model.FLD_PIPE)
+        self.model.setField(12, 8, objects.OBJ_HELIUM)
+        self.model.setField(15, 5, objects.OBJ_FIRE)
+        self.solution = self.model.getSolution()
+        self.solution.init(self.model)
+
+    def insertSteps(self, *steps):
+        for step in steps:
+            self.solution.insertStep(step)
+
+    def testEatAndPush(self):
+        s = self.solution
+        self.insertSteps(*[s.STEP_RIGHT]*6)
+        result = s.simulate()
+        self.assertTrue(result.isOk(), result)
+        state = s._simulator.getState(result.index)
+        self.assertEqual(state.getCat(), (6, 9))
+        self.assertEqual(state.getField(7, 9), 37)
+        self.assertEqual(state.getField(2, 9), model.Model.FLD_EMPTY)
+
+    def testGravity(self):
+        s = self.solution
+        self.insertSteps(s.STEP_RIGHT, s.STEP_RIGHT, s.STEP_RIGHT, s.STEP_UP, s.STEP_RIGHT)
+        result = s.simulate()
+        self.assertTrue(result.isOk(), result)
+        state = s._simulator.getState(result.index)
+        # the object which has been in the air has fallen onto the cat's former position and is blocked by the cat
+        self.assertEqual(state.getField(4, 9), 65)
+        self.assertEqual(state.getCat(), (4, 8))
+
+    def testBlocked(self):
+        s = self.solution
+        self.insertSteps(s.STEP_LEFT)
+        result = s.simulate()
+        self.assertEqual(result.outcome, model_physics.OUTCOME_BLOCKED)
+        self.assertEqual(result.reason, model_physics.REASON_OUTSIDE)
+        self.assertEqual(result.index, 0)
+
+    def testPipeJump(self):
+        s = self.solution
+        self.insertSteps(s.STEP_UP, *[s.STEP_RIGHT]*8)
+        self.insertSteps(s.STEP_DOWN, s.STEP_RIGHT, model.PipeJump())
+        result = s.simulate()
+        self.assertTrue(result.isOk(), result)
+        self.assertTrue(result.isFlipped)
+        self.insertSteps(model.PipeJump())
+        result = s.simulate()
+        self.assertEqual(result.reason, model_physics.REASON_NO_PIPE)
+        self.assertEqual(result.index, 12)
+
+    def testDiesAboveFire(self):
+        s = self.solution
+        self.insertSteps(*[s.STEP_UP]*5)
+        self.insertSteps(*[s.STEP_RIGHT]*15)
+        result = s.simulate()
+        self.assertEqual(result.outcome, model_physics.OUTCOME_DIES)
+        self.assertEqual(result.reason, model_physics.REASON_FIRE)
+        self.assertEqual(result.cor, (15, 4))
+        self.assertEqual(result.index, 19)
+
+    def testIncrementalSameAsFromScratch(self):
+        rnd = random.Random(2)
+        s = self.solution
+        steps = (s.STEP_UP, s.STEP_DOWN, s.STEP_LEFT, s.STEP_RIGHT, s.STEP_RIGHT, model.PipeJump(), model.HeliumJump(-2))
+        for i in range(200):
+            r = rnd.random()
+            if r < 0.6:
+                s.insertStep(rnd.choice(steps))
+            elif r < 0.7:
+                s.deleteStepAbove()
+            elif r < 0.8:
+                s.moveCursorTo(rnd.randint(s.getCursorMin(), s.getCursorMax()))
+            elif r < 0.9:
+                s.history.undo()
+            else:
+                s.history.redo()
+            result = s.simulate()
+            expected = model_physics.Simulator(self.model.board, s._start).simulate(s.iterSteps())
+            self.assertEqual(repr(result), repr(expected))
+
+
+
+class SolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(17, 9, model.Model.FLD_END)
+
+    def testStraightLine(self):
+        self.model.setField(5, 9, 65)
+        solver = model_solver.Solver(self.model)
+        steps = solver.solve()
+        self.assertEqual(solver.status, model_solver.STATUS_SOLVED)
+        self.assertEqual(steps, [model.Solution.STEP_RIGHT] * 17)
+
+    def testShortestWayAroundObstacle(self):
+        self.model.setField(5, 9, 58)
+        self.model.setField(10, 2, 65)
+        solver = model_solver.Solver(self.model)
+        steps = solver.solve()
+        self.assertEqual(solver.status, model_solver.STATUS_SOLVED)
+        # the food falls down to the ground, the cat needs to go up and down once
+        self.assertEqual(solver.getNumberCountedSteps(), 17 + 2)
+
+        solver.writeSolution()
+        solution = self.model.getSolution()
+        self.assertEqual(solution.iterSteps(), steps)
+        self.assertTrue(solution.simulate().isOk())
+        self.assertTrue(self.model.isEndField(solution.iterCoordinates()[-1]))
+
+    def testUnsolvable(self):
+        self.model.setField(1, 9, 58)
+        self.model.setField(0, 8, 58)
+        self.model.setField(1, 8, 58)
+        solver = model_solver.Solver(self.model)
+        self.assertEqual(solver.solve(), None)
+        self.assertEqual(solver.status, model_solver.STATUS_UNSOLVABLE)
+
+    def testMemoryLimit(self):
+        self.model.setField(17, 9, model.Model.FLD_EMPTY)
+        self.model.setField(17, 0, model.Model.FLD_END)
+        solver = model_solver.Solver(self.model, maxMemory=10000)
+        self.assertEqual(solver.solve(), None)
+        self.assertEqual(solver.status, model_solver.STATUS_OUT_OF_MEMORY)
+
+
+
+class ShortenerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(5, 9, 65)
+        self.model.setField(10, 9, 58)
+        self.model.setField(17, 9, model.Model.FLD_END)
+        self.solution = self.model.getSolution()
+        self.solution.init(self.model)
+
+    def testShorten(self):
+        s = self.solution
+        R, U, D = s.STEP_RIGHT, s.STEP_UP, s.STEP_DOWN
+        s.setSteps([R, U, D, R, R, U, R, D, R, R, R, R, U, U, R, R, R, R, D, U, R, D, R, R, R, D])
+        result = s.simulate()
+        self.assertTrue(result.isOk(), result)
+        end = s._simulator.getState(result.index).getKey()
+        s.moveCursorTo(5)
+
+        shortener = model_shortener.Shortener(self.model, segmentLength=6)
+        saved = shortener.shorten()
+        self.assertEqual(shortener.numberStepsBefore, 26)
+        self.assertEqual(shortener.numberStepsAfter, len(s))
+        self.assertEqual(saved, 26 - len(s))
+        self.assertLess(shortener.numberStepsAfter, 26)
+
+        result = s.simulate()
+        self.assertTrue(result.isOk(), result)
+        self.assertEqual(s._simulator.getState(result.index).getKey(), end)
+        self.assertTrue(s.getCursorMin() <= s.getCursorMain() <= s.getCursorMax())
+
+    def testNothingToShorten(self):
+        s = self.solution
+        s.setSteps([s.STEP_RIGHT] * 9 + [s.STEP_UP] + [s.STEP_RIGHT] * 8 + [s.STEP_DOWN])
+        steps = list(s.iterSteps())
+        shortener = model_shortener.Shortener(self.model, segmentLength=5)
+        self.assertEqual(shortener.shorten(), 0)
+        self.assertEqual(s.iterSteps(), steps)
+
+
+
+class BitboardTest(unittest.TestCase):
+
+    def createRandomModel(self, seed):
+        rnd = random.Random(seed)
+        m = model.Model()
+        codes = (65, 37, 44, 58, 55, objects.OBJ_FIRE, objects.OBJ_PIPE, objects.OBJ_HELIUM)
+        for i in range(60):
+            m.setField(rnd.randrange(m.COLS), rnd.randrange(m.ROWS), rnd.choice(codes))
+        m.setField(0, 9, model.Model.FLD_START)
+        return m
+
+    def testConversion(self):
+        m = self.createRandomModel(1)
+        board = m.board.copy()
+        bitboard = m.getBitboard()
+        self.assertEqual(bitboard.toBoard(), board)
+        self.assertEqual(bitboard.cat, model_bitboard.bit(0, 9))
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                self.assertEqual(bitboard.get(x, y), m.getField(x, y))
+                self.assertEqual(bool(bitboard.movable & model_bitboard.bit(x, y)), m.getField(x, y) in objects.ATTR_MOVABLE)
+
+        bitboard.set(3, 3, 65)
+        m.setBitboard(bitboard)
+        self.assertEqual(m.getField(3, 3), 65)
+        self.assertEqual(m.getBitboard().toBoard(), m.board)
+
+    def testGravitySameAsPhysics(self):
+        for seed in range(10):
+            m = self.createRandomModel(seed)
+            for isFlipped in (False, True):
+                bitboard = m.getBitboard()
+                bitboard.applyGravity(isFlipped)
+                self.assertTrue(bitboard.isStable(isFlipped))
+
+                state = model_physics.State(bytearray(m.board.toBytes()), 9*m.COLS)
+                state.fields[state.cat] = model.Model.FLD_EMPTY
+                state.isFlipped = isFlipped
+                model_physics.applyGravity(state)
+                board = bitboard.toBoard()
+                board.set(0, 9, model.Model.FLD_EMPTY)
+                self.assertEqual(board.toBytes(), bytes(state.fields))
+
+    def testQueries(self):
+        m = self.createRandomModel(3)
+        bitboard = m.getBitboard()
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                for value in (65, objects.OBJ_FIRE):
+                    self.assertEqual(bitboard.isBelow(x, y, value), m.isBelow((x, y), value))
+                    self.assertEqual(bitboard.isBelow(x, y, value, isFlipped=True), m.isBelow((x, y), value, isFlipped=True))
+
+
+
+class LevelPackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def createModels(self):
+        m1 = model.Model()
+        m1.setField(0, 9, model.Model.FLD_START)
+        m1.setField(5, 9, 65)
+        m1.setField(9, 9, model.Model.FLD_PIPE)
+        m1.setField(9, 0, objects.OBJ_HELIUM)
+        m1.setField(17, 0, model.Model.FLD_END)
+        m1.setAuthor(u"K\xe4tzchen")
+        m1.setNotes(u"first line\nsecond line")
+        m1.bgTouched = "irka3_3b.fld"
+        solution = m1.getSolution()
+        solution.init(m1)
+        solution.setSteps([model.Solution.STEP_RIGHT] * 9 + [model.PipeJump(), model.HeliumJump(-3), model.IllegalJumpStep(2, 3)])
+
+        m2 = model.Model()
+        m2.setField(3, 4, 37)
+        m2.getSolution().appendCoordinate((1, 1))
+        m2.getSolution().appendCoordinate((1, 2))
+        return [m1, m2]
+
+    def readBytes(self, ffn):
+        with open(ffn, 'rb') as f:
+            return f.read()
+
+    def testRoundTrip(self):
+        levels = list()
+        originals = list()
+        for i, m in enumerate(self.createModels()):
+            ffn = os.path.join(self.path, "%s.afg" % i)
+            m.writeCopy(ffn)
+            originals.append(self.readBytes(ffn))
+            m = model.Model()
+            self.assertEqual(m.readFile(ffn, log=self.fail), model.LOGLEVEL_NONE)
+            levels.append(m.toPackedLevel())
+        pack = os.path.join(self.path, "levels" + model.Model.EXT_PACK)
+        self.assertEqual(model_level_pack.writePack(pack, levels), 2)
+
+        with model_level_pack.LevelPack(pack) as p:
+            self.assertEqual(len(p), 2)
+            self.assertEqual(list(p.iterNames()), ["0.afg", "1.afg"])
+            self.assertEqual(list(p.iterLevels()), levels)
+
+        for i in (1, 0):
+            m = model.Model()
+            self.assertEqual(m.readFile(pack, log=self.fail, index=i), model.LOGLEVEL_NONE)
+            self.assertEqual(m.getFileName(), None)
+            self.assertFalse(m.hasChanged())
+            ffn = os.path.join(self.path, "copy-%s.afg" % i)
+            m.writeCopy(ffn)
+            self.assertEqual(self.readBytes(ffn), originals[i])
+
+    def testInvalidFile(self):
+        ffn = os.path.join(self.path, "invalid" + model.Model.EXT_PACK)
+        with open(ffn, 'wb') as f:
+            f.write(b"no level pack")
+        messages = list()
+        m = model.Model()
+        lv = m.readFile(ffn, log=lambda lv, msg: messages.append(msg))
+        self.assertEqual(lv, model.logging.ERROR)
+        self.assertEqual(len(messages), 1)
+
+        model_level_pack.writePack(ffn, [])
+        lv = m.readFile(ffn, log=lambda lv, msg: messages.append(msg))
+        self.assertEqual(lv, model.logging.ERROR)
+
+
+
+class StepParserTest(unittest.TestCase):
+
+    def parse(self, line):
+        m = model.Model.RO_STEP.match(line)
+        self.assertNotEqual(m, None)
+        return model.Model._createStepFromMatch(m)
+
+    def testAllStepTypes(self):
+        steps = [model.NormalStep(1, 0), model.NormalStep(0, -1), model.PipeJump(), model.HeliumJump(-3),
+            model.AmbiguousJumpStep(-2, 1), model.IllegalJumpStep(3, -4)]
+        for step in steps:
+            parsed = self.parse("#%r" % (step,))
+            self.assertEqual(type(parsed), type(step))
+            self.assertEqual(parsed, step)
+        self.assertEqual(self.parse("#NormalStep(-1, 0)"), model.NormalStep(-1, 0))
+
+    def testInvalidSteps(self):
+        path = tempfile.mkdtemp()
+        try:
+            m = model.Model()
+            m.setField(0, 9, model.Model.FLD_START)
+            m.getSolution().init(m)
+            m.getSolution().setSteps([model.Solution.STEP_RIGHT] * 3)
+            ffn = os.path.join(path, "steps.afg")
+            m.writeCopy(ffn)
+            with open(ffn, 'rb') as f:
+                data = f.read()
+
+            for line in (b"#NormalStep(2,0)", b"#HeliumJump(1,2)", b"#Jump(1,0)", b"#__import__('os')", b"#NormalStep(1,0);x"):
+                with open(ffn, 'wb') as f:
+                    f.write(data + line + b"\r\n")
+                messages = list()
+                lv = model.Model().readFile(ffn, log=lambda lv, msg: messages.append(msg))
+                self.assertEqual(lv, model.logging.ERROR, line)
+                self.assertEqual(len(messages), 1, line)
+        finally:
+            shutil.rmtree(path)
+
+
+
+class HeadlessTest(unittest.TestCase):
+
+    def testImportWithoutTk(self):
+        code = "import sys, model; print(sorted(m for m in sys.modules if m.startswith(('gui_', 'tkinter', 'Tkinter'))))"
+        out = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(model.__file__)))
+        self.assertEqual(out.decode().strip().splitlines()[-1], "[]")
+
+    def testValidCodes(self):
+        for code in (model.Model.FLD_EMPTY, model.Model.FLD_START, model.Model.FLD_END, 65, 93):
+            self.assertIn(code, objects.VALID_CODES)
+        self.assertNotIn(0, objects.VALID_CODES)
+        self.assertTrue(set(objects.CATEGORY_ALL) <= objects.VALID_CODES)
+
+    def testValidBackgrounds(self):
+        m = model.Model()
+        for name in (m.bgMargin, m.bgUntouched, m.bgTouched, "irka3_1a"):
+            self.assertTrue(backgrounds.isValid(name), name)
+        self.assertFalse(backgrounds.isValid("irka3_9z.fld"))
+        self.assertEqual(backgrounds.getShortName("irka3_2b.fld"), "2b")
+
+
+
+class ImageOpenerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.createFile("irka65.gif")
+        # a directory is not an image
+        os.mkdir(os.path.join(self.path, "irka67.gif"))
+        self.opener = gui_image_opener.ImageOpener(path=self.path, pattern="irka{0}.gif")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def createFile(self, fn):
+        with open(os.path.join(self.path, fn), 'wb') as f:
+            f.write(b"GIF89a")
+
+    def testListing(self):
+        self.assertTrue(self.opener.isValid(65))
+        self.assertEqual((self.opener.cacheMisses, self.opener.cacheHits), (1, 0))
+        self.assertFalse(self.opener.isValid(66))
+        self.assertFalse(self.opener.isValid(67))
+        self.assertEqual((self.opener.cacheMisses, self.opener.cacheHits), (1, 2))
+
+    def testModificationTime(self):
+        self.assertFalse(self.opener.isValid(66))
+        self.createFile("irka66.gif")
+        # the modification time of the directory may have a low resolution
+        mtime = os.path.getmtime(self.path) + 10
+        os.utime(self.path, (mtime, mtime))
+
+        # the modification time is not checked again within MTIME_CHECK_INTERVAL
+        self.assertFalse(self.opener.isValid(66))
+        self.assertEqual(self.opener.cacheMisses, 1)
+
+        self.opener.MTIME_CHECK_INTERVAL = 0
+        self.assertTrue(self.opener.isValid(66))
+        self.assertEqual(self.opener.cacheMisses, 2)
+        self.assertTrue(self.opener.isValid(65))
+        self.assertEqual((self.opener.cacheMisses, self.opener.cacheHits), (2, 2))
+
+    def testRefresh(self):
+        self.assertFalse(self.opener.isValid(66))
+        self.createFile("irka66.gif")
+        self.opener.refresh()
+        self.assertTrue(self.opener.isValid(66))
+        self.assertEqual(self.opener.cacheMisses, 2)
+
+    def testPreloadSkipsCreatedImages(self):
+        self.createFile("irka66.gif")
+        # a placeholder, creating a PhotoImage requires a display
+        self.opener.images[65] = object()
+        self.opener.preload([65, 66]).join()
+        self.assertEqual(list(self.opener._fileData), [66])
+
+
+
+class CatalogCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.directory = os.path.join(self.path, "images")
+        os.mkdir(self.directory)
+        self.ffn = os.path.join(self.path, "config", "cache.json")
+        self.computed = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def compute(self):
+        self.computed += 1
+        return sorted(os.listdir(self.directory))
+
+    def get(self):
+        return model_catalog_cache.CatalogCache(self.ffn).get('images', self.directory, self.compute)
+
+    def testReuseUntilModified(self):
+        self.assertEqual(self.get(), [])
+        self.assertEqual(self.get(), [])
+        self.assertEqual(self.computed, 1)
+
+        with open(os.path.join(self.directory, "a.gif"), 'w'):
+            pass
+        # make sure the modification time differs even on file systems with a coarse resolution
+        mtime = os.path.getmtime(self.directory)
+        os.utime(self.directory, (mtime + 10, mtime + 10))
+        self.assertEqual(self.get(), ["a.gif"])
+        self.assertEqual(self.get(), ["a.gif"])
+        self.assertEqual(self.computed, 2)
+
+    def testBrokenCacheFile(self):
+        os.mkdir(os.path.dirname(self.ffn))
+        with open(self.ffn, 'w') as f:
+            f.write("{not json")
+        self.assertEqual(self.get(), [])
+        self.assertEqual(self.get(), [])
+        self.assertEqual(self.computed, 1)
+
+
+
+class ModelSnapshotTest(unittest.TestCase):
+
+    CHECKS = ('sanityCheckBoard', 'sanityCheckSolutionUpdated', 'sanityCheckSolution', 'sanityCheckBackgrounds', 'sanityCheckAuthor')
+
+    def setUp(self):
+        self.model = model.Model()
+        self.model.setField(0, 9, model.Model.FLD_START)
+        self.model.setField(5, 9, objects.OBJ_FIRE)
+        self.model.setField(17, 9, model.Model.FLD_END)
+        self.model.bgTouched = self.model.bgUntouched
+
+    def getMessages(self, m, checks=CHECKS):
+        messages = list()
+        for name in checks:
+            getattr(m, name)(lambda lv, msg: messages.append((lv, msg)))
+        return messages
+
+    def testSameMessages(self):
+        solution = self.model.getSolution()
+        solution.init(self.model)
+        solution.setSteps([model.Solution.STEP_RIGHT] * 6)
+        snapshot = self.model.createSnapshot()
+        expected = self.getMessages(self.model)
+        self.assertTrue(expected)
+        self.assertEqual(self.getMessages(snapshot.toModel()), expected)
+
+    def testLevelEditor(self):
+        self.model.getSolution().appendCoordinate((1, 9))
+        checks = ('sanityCheckBoard', 'sanityCheckSolutionUpdated', 'sanityCheckBackgrounds', 'sanityCheckAuthor')
+        snapshot = self.model.createSnapshot()
+        self.assertEqual(self.getMessages(snapshot.toModel(), checks), self.getMessages(self.model, checks))
+
+    def testIndependentOfLaterChanges(self):
+        solution = self.model.getSolution()
+        solution.init(self.model)
+        solution.setSteps([model.Solution.STEP_RIGHT] * 3)
+        snapshot = self.model.createSnapshot()
+        expected = self.getMessages(self.model)
+
+        solution.insertStep(model.Solution.STEP_RIGHT)
+        self.model.setAuthor("someone")
+        self.model.setField(0, 9, model.Model.FLD_EMPTY)
+
+        checked = snapshot.toModel()
+        self.assertEqual(self.getMessages(checked), expected)
+        self.assertEqual(len(checked.getSolution()), 3)
+
+
+
+class TransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model.Model()
+        self.changes = list()
+        # bound methods of builtin types are not hashable in Python 2
+        self.model.addOnChangeListener(lambda change: self.changes.append(change))
+
+    def testCoalesce(self):
+        m = self.model
+        with m.transaction():
+            m.setField(1, 2, 65)
+            with m.transaction():
+                m.setField(3, 4, 66)
+            self.assertEqual(self.changes, [])
+        self.assertEqual(self.changes, [m.CHANGE_BOARD])
+        change = self.changes[0]
+        self.assertIsInstance(change, model.Change)
+        self.assertEqual(change.kinds, {m.CHANGE_BOARD})
+        self.assertEqual(change.fields, {(1, 2), (3, 4)})
+
+    def testOneBackup(self):
+        m = self.model
+        m.setField(0, 0, 65)
+        board = m.board.copy()
+        m.setCursor(0, 0)
+        m.addCursor(1, 0)
+        m.moveFieldToRight()
+        self.assertEqual(len(self.changes), 4)
+        self.assertEqual(self.changes[-1].kinds, {m.CHANGE_BOARD})
+        self.assertEqual(m.getField(m.COLS-1, 0), m.FLD_EMPTY)
+        self.assertEqual(m.getField(m.COLS-2, 0), 65)
+        self.assertTrue(m.history.undo())
+        self.assertEqual(m.board, board)
+
+    def testMixedKinds(self):
+        m = self.model
+        m.nextBg()
+        self.assertEqual(self.changes, [m.CHANGE_BG])
+        self.assertEqual(self.changes[0].kinds, {m.CHANGE_BG_BORDER, m.CHANGE_BG_UNTOUCHED, m.CHANGE_BG_TOUCHED})
+        with m.transaction():
+            m.setField(0, 0, 65)
+            m.setAuthor("someone")
+        self.assertEqual(self.changes[-1], m.CHANGE_ALL)
+        self.assertEqual(self.changes[-1].fields, None)
+
+    def testNoChange(self):
+        with self.model.transaction():
+            pass
+        self.assertEqual(self.changes, [])
+
+
+
+class MoveFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        self.random = random.Random(0)
+
+    def createModel(self):
+        m = model.Model()
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                m.setField(x, y, self.random.choice(DeltaHistoryTest.OBJECTS))
+        return m
+
+    def selectRandom(self, models, n):
+        cors = self.random.sample([(x, y) for x in range(model.Model.COLS) for y in range(model.Model.ROWS)], n)
+        for m in models:
+            m.cursors = model.CursorList()
+            for c in cors:
+                m.cursors.append(c)
+
+    @staticmethod
+    def moveFieldOld(m, getNextField):
+        # the previous implementation which copies every field
+        if m._hasSelectionChanged():
+            m._clearTmpBoard()
+        selectedValues = [m.getField(*c) for c in m.cursors]
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                if (x,y) not in m.cursors:
+                    m._tmpBoard.set(x, y, m.board.get(x, y))
+        newCursors = model.CursorList()
+        for c,v in zip(m.cursors, selectedValues):
+            x,y = getNextField(c)
+            m.board.set(x, y, v)
+            newCursors.append((x,y))
+        m.cursors = newCursors
+        for x in range(m.COLS):
+            for y in range(m.ROWS):
+                if (x,y) not in m.cursors:
+                    m.board.set(x, y, m._tmpBoard.get(x, y))
+        m._saveSelection()
+        m.onChange(m.CHANGE_BOARD, clearTmpBoard=False)
+
+    def testSameAsCopyingAllFields(self):
+        m0 = self.createModel()
+        m1 = model.Model()
+        m1.board = m0.board.copy()
+        directions = ('Left', 'Right', 'Above', 'Below')
+        for i in range(20):
+            self.selectRandom((m0, m1), self.random.choice((1, 5, 20, 180)))
+            for j in range(10):
+                direction = self.random.choice(directions)
+                m0._moveField(getattr(m0, 'getField%sOf' % direction))
+                self.moveFieldOld(m1, getattr(m1, 'getField%sOf' % direction))
+                self.assertEqual(m0.board, m1.board)
+                self.assertEqual(list(m0.cursors), list(m1.cursors))
+
+    def testMoveToBorder(self):
+        m0 = self.createModel()
+        m1 = model.Model()
+        m1.board = m0.board.copy()
+        for name, single, distance in (
+            ('Left',   'Left',  m0.getCursorDistanceToLeft),
+            ('Right',  'Right', m0.getCursorDistanceToRight),
+            ('Top',    'Up',    m0.getCursorDistanceToTop),
+            ('Bottom', 'Down',  m0.getCursorDistanceToBottom),
+        ):
+            for n in (1, 5, 20):
+                self.selectRandom((m0, m1), n)
+                for k in range(distance()):
+                    getattr(m1, 'moveField%s' % single)()
+                getattr(m0, 'moveFieldTo%s' % name)()
+                self.assertEqual(m0.board, m1.board)
+                self.assertEqual(list(m0.cursors), list(m1.cursors))
 
 
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+"""
+Command line tool to check many level files at once.
+
+Every file is read and checked with the same sanity checks
+the level editor performs (see Model.sanityCheck*).
+The files are distributed over a pool of worker processes,
+each worker owns it's own Model.
+The results are printed in the order in which they are completed.
+
+The exit status is 1 if at least one file has an error, 0 otherwise.
+
+This tool does not open a window. It does not need a display.
+"""
+
+# standard libraries
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+
+# other libraries
+import model
+import model_object_catalog as objects
+import locales
+_ = locales._
+
+
+DEFAULT_PATHS = (
+    objects.toAbsPath("_level-vorlagen"),
+    objects.toAbsPath(os.path.join("_level-eigene", "finished")),
+    objects.toAbsPath("_level-tests"),
+)
+
+LOG_FORMAT = u"[{levelname:<8}] {msg}"
+LOGLEVEL_ALL = model.LOGLEVEL_NONE
+
+
+# ---------- collect files ----------
+
+def iterTasks(paths):
+    '''yields all level files which are given explicitly or are contained in a given directory'''
+    for path in paths:
+        if os.path.isdir(path):
+            fns = os.listdir(path)
+            fns.sort()
+            for fn in fns:
+                if os.path.splitext(fn)[1] != model.Model.EXT_TASK:
+                    continue
+                yield os.path.join(path, fn)
+        else:
+            yield path
+
+
+# ---------- worker ----------
+
+_model = None
+
+def initWorker():
+    global _model
+    _model = model.Model()
+
+def checkFile(ffn):
+    '''returns (ffn, maxLogLevel, messages) where messages is a list of (logLevel, msg)'''
+    m = _model
+    messages = list()
+    log = lambda lv, msg: messages.append((lv, msg))
+    maxLogLevel = model.LOGLEVEL_NONE
+    try:
+        # readFile does not clear fields which are missing in the file
+        m.reset()
+        maxLogLevel = max(maxLogLevel, m.readFile(ffn, log))
+        maxLogLevel = max(maxLogLevel, m.sanityCheckBoard(log))
+        #m.sanityCheckBackgrounds(log) # is already performed in readFile
+        maxLogLevel = max(maxLogLevel, m.sanityCheckSolutionUpdated(log))
+        try:
+            m.solution.init(m)
+        except AssertionError:
+            # a missing start field has already been reported by sanityCheckBoard
+            pass
+        else:
+            maxLogLevel = max(maxLogLevel, m.sanityCheckSolution(log))
+    except Exception as e:
+        # the model may be in an inconsistent state
+        initWorker()
+        log(logging.ERROR, _("unforeseen exception while checking file: {error}").format(error=e))
+        maxLogLevel = logging.ERROR
+    return ffn, maxLogLevel, messages
+
+
+def iterResults(tasks, jobs):
+    if jobs == 1:
+        initWorker()
+        for ffn in tasks:
+            yield checkFile(ffn)
+        return
+
+    pool = multiprocessing.Pool(processes=jobs, initializer=initWorker)
+    try:
+        for result in pool.imap_unordered(checkFile, tasks):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+# ---------- output ----------
+
+def formatMessage(logLevel, msg):
+    msg = msg.replace("\n", " ")
+    return LOG_FORMAT.format(levelname=logging.getLevelName(logLevel), msg=msg)
+
+def printResult(ffn, maxLogLevel, messages, minLogLevel, out=sys.stdout):
+    messages = [(lv, msg) for lv, msg in messages if lv >= minLogLevel]
+    if len(messages) == 0 and maxLogLevel < minLogLevel:
+        return
+    out.write(u"%s\n" % ffn)
+    for lv, msg in messages:
+        out.write(u"%s\n" % formatMessage(lv, msg))
+    out.flush()
+
+
+# ---------- main ----------
+
+def main(args=None):
+    p = argparse.ArgumentParser(description=_("Check Irre Katze level files."))
+    p.add_argument('paths', nargs='*', metavar='PATH', default=DEFAULT_PATHS,
+        help=_("level files or directories containing level files"))
+    p.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+        help=_("number of worker processes (default: number of cpus)"))
+    p.add_argument('-q', '--quiet', action='store_true',
+        help=_("print only files which have warnings or errors"))
+    args = p.parse_args(args)
+
+    if args.quiet:
+        minLogLevel = logging.WARNING
+    else:
+        minLogLevel = LOGLEVEL_ALL
+
+    tasks = [ffn for ffn in iterTasks(args.paths)]
+    jobs = max(1, min(args.jobs, len(tasks)))
+
+    numberFiles = 0
+    numberFilesWithWarnings = 0
+    numberFilesWithErrors = 0
+    t0 = time.time()
+    for ffn, maxLogLevel, messages in iterResults(tasks, jobs):
+        numberFiles += 1
+        if maxLogLevel >= logging.ERROR:
+            numberFilesWithErrors += 1
+        elif maxLogLevel >= logging.WARNING:
+            numberFilesWithWarnings += 1
+        printResult(ffn, maxLogLevel, messages, minLogLevel)
+    t1 = time.time()
+
+    dt = t1 - t0
+    filesPerSecond = numberFiles / dt if dt > 0 else float('inf')
+    sys.stdout.write(_("checked {n} files in {t:.3f}s ({rate:.1f} files/s) with {jobs} process(es): {errors} with errors, {warnings} with warnings").format(
+        n = numberFiles,
+        t = dt,
+        rate = filesPerSecond,
+        jobs = jobs,
+        errors = numberFilesWithErrors,
+        warnings = numberFilesWithWarnings,
+    ) + "\n")
+
+    if numberFilesWithErrors > 0:
+        return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main())